@@ -23,6 +23,13 @@ class Settings(BaseSettings):
     # Stripe
     stripe_secret_key: str = ""
     stripe_webhook_secret: str = ""
+    stripe_api_base: str = ""  # Override for a local Stripe stand-in (scripts/fake_stripe.py)
+    stripe_max_workers: int = 4  # Dedicated threads for blocking Stripe SDK calls
+    stripe_timeout_seconds: float = 10.0  # Per-request HTTP timeout
+    stripe_max_network_retries: int = 1
+    stripe_event_batch_size: int = 20  # Webhook events applied per worker pass
+    stripe_event_poll_seconds: float = 5.0  # Worker re-checks for pending events at least this often
+    stripe_event_max_attempts: int = 5
 
     # Frontend URL for redirects
     frontend_url: str = "http://localhost:5173"
@@ -35,6 +42,38 @@ class Settings(BaseSettings):
     # CORS
     cors_origins: str = "*"
 
+    # Logging
+    log_level: str = "INFO"
+    log_levels: str = ""  # Per-logger overrides, e.g. "app.socket_manager=DEBUG,engineio=ERROR"
+    log_format: str = "text"  # "text" or "json"
+    log_sample_rate: float = 0.01  # Share of high-frequency (per emit/request) records kept
+    socketio_packet_logging: bool = False  # python-socketio/engineio packet logs; very noisy
+
+    # Socket.IO message queue for multi-worker fan-out: "", redis://..., postgres or postgresql://...
+    socketio_message_queue: str = ""
+    socketio_channel: str = "mos_socketio"
+    socketio_max_order_rooms: int = 20  # Order rooms one connection may track at once
+    socketio_slow_queue_depth: int = 50  # Queued packets before a client counts as slow
+    socketio_slow_send_seconds: float = 2.0  # ...or once its oldest queued packet has waited this long
+    socketio_max_send_seconds: float = 30.0  # Slow clients whose queue doesn't drain for this long are disconnected
+    socketio_max_queue_bytes: int = 512 * 1024  # Per-client send queue budget; over it the client is disconnected
+    socketio_replay_buffer_size: int = 100  # Recent events kept per kitchen/order room for reconnect replay
+    socketio_replay_max_rooms: int = 5000  # Least recently used room buffers are dropped beyond this
+    socketio_coalesce_ms: int = 50  # Order updates committed within this window share one emit per room
+    order_events_channel: str = "mos_order_events"  # NOTIFY channel that wakes the outbox dispatcher
+    order_event_batch_size: int = 100  # Outbox events dispatched per pass
+    order_event_poll_seconds: float = 5.0  # Dispatcher re-checks the outbox at least this often
+    order_event_max_attempts: int = 5
+    order_event_lease_seconds: float = 60.0  # A claimed batch not finished within this is dispatched again
+    order_event_retention_hours: int = 24  # Delivered events are pruned after this
+    rfm_cache_seconds: int = 3600  # Customer segments are recomputed at least this often
+    metrics_token: str = ""  # When set, /metrics requires "Authorization: Bearer <token>"
+    query_stats_enabled: bool = False  # Per-request query count/DB time in Server-Timing (development/benchmarks)
+    query_repeat_warn_threshold: int = 10  # Warn when one statement runs more often than this in a request
+    tracing_enabled: bool = False  # Spans for SQL, Stripe, Supabase and Socket.IO emits (see app/tracing.py)
+    tracing_sample_rate: float = 0.1  # Share of traces recorded
+    tracing_exporter: str = "traces.jsonl"  # OTLP/JSON lines file, or an OTLP/HTTP collector URL (http://...:4318/v1/traces)
+
     @property
     def is_development(self) -> bool:
         return self.environment == "development"
@@ -1,10 +1,29 @@
 """
 Mo's Burritos FastAPI Backend - Database Connection
 """
-from sqlalchemy import create_engine
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Optional
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from sqlalchemy import create_engine, event, text
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .metrics import POOL_TIMEOUTS, POOL_WAIT, register_pool_gauges
+
+logger = logging.getLogger(__name__)
+
+
+# Shared by the engine and the LISTEN connection
+CONNECT_ARGS = {
+    "sslmode": "require",  # Require SSL for Supabase connections
+    "connect_timeout": 10,  # Connection timeout in seconds
+}
 
 # PostgreSQL configuration for all environments (Supabase)
 # Optimized for both local development and serverless production
@@ -16,10 +35,7 @@ engine = create_engine(
     pool_recycle=300,  # Recycle connections after 5 minutes
     pool_timeout=10,  # Timeout for getting connection from pool
     echo=False,  # Set to True for SQL query logging in debug
-    connect_args={
-        "sslmode": "require",  # Require SSL for Supabase connections
-        "connect_timeout": 10,  # Connection timeout in seconds
-    }
+    connect_args=CONNECT_ARGS,
 )
 
 # # SQLite configuration (DISABLED - using PostgreSQL only)
@@ -29,15 +45,137 @@ engine = create_engine(
 #         connect_args={"check_same_thread": False}
 #     )
 
+register_pool_gauges(engine.pool)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
+# Checkout wait times for /metrics, from public session events: a session
+# notes when it first needs a connection (a query or a flush), and
+# after_begin fires once the pool has handed one over
+_CHECKOUT_STARTED = "pool_checkout_started"
+_CONNECTED = "pool_connected"
+
+
+def _mark_checkout(session) -> None:
+    if _CONNECTED not in session.info:
+        session.info[_CHECKOUT_STARTED] = time.perf_counter()
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _checkout_for_execute(orm_execute_state):
+    _mark_checkout(orm_execute_state.session)
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _checkout_for_flush(session, flush_context, instances):
+    _mark_checkout(session)
+
+
+@event.listens_for(SessionLocal, "after_begin")
+def _checkout_done(session, transaction, connection):
+    started = session.info.pop(_CHECKOUT_STARTED, None)
+    session.info[_CONNECTED] = True
+    if started is not None:
+        POOL_WAIT.observe(time.perf_counter() - started)
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _connection_released(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_CONNECTED, None)
+        session.info.pop(_CHECKOUT_STARTED, None)
+
+
+# Columns and indexes added to tables that existed before them; create_all()
+# only creates missing tables. Indexes are built CONCURRENTLY so startup never
+# blocks order writes.
+ADDED_COLUMNS = [
+    "ALTER TABLE orders ADD COLUMN IF NOT EXISTS guest_id VARCHAR(36) REFERENCES guest_customers(id)",
+]
+
+ADDED_INDEXES = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_order_status_history_order_id ON order_status_history (order_id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_orders_customer_id ON orders (customer_id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_orders_guest_id ON orders (guest_id)",
+]
+
+
+def ensure_schema() -> None:
+    """Apply ADDED_COLUMNS and ADDED_INDEXES to existing databases (run at startup, after create_all)"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for statement in ADDED_COLUMNS + ADDED_INDEXES:
+            connection.execute(text(statement))
+
+
 def get_db():
     """Dependency for getting database session"""
     db = SessionLocal()
     try:
         yield db
+    except exc.TimeoutError:
+        POOL_TIMEOUTS.inc()
+        raise
     finally:
         db.close()
+
+
+def create_listen_connection(url: Optional[str] = None):
+    """
+    Open a dedicated autocommit psycopg2 connection for LISTEN/NOTIFY.
+    Kept outside the SQLAlchemy pool so a long-lived listener never holds
+    one of the few pooled connections.
+    """
+    dsn = make_url(url or settings.db_url).set(drivername="postgresql")
+    conn = psycopg2.connect(dsn.render_as_string(hide_password=False), **CONNECT_ARGS)
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    return conn
+
+
+async def pg_listen(channel: str, url: Optional[str] = None, retry_seconds: float = 2.0) -> AsyncIterator[str]:
+    """
+    Yield NOTIFY payloads received on `channel`, reconnecting after errors.
+    The socket is watched with the event loop's reader callbacks, so waiting
+    for notifications costs no thread.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            conn = await asyncio.to_thread(create_listen_connection, url)
+        except psycopg2.Error as e:
+            logger.warning("LISTEN connection failed, retrying", extra={
+                "channel": channel, "retry_seconds": retry_seconds, "error": str(e)})
+            await asyncio.sleep(retry_seconds)
+            continue
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def on_readable():
+            try:
+                conn.poll()
+            except psycopg2.Error as e:
+                queue.put_nowait(e)
+                return
+            while conn.notifies:
+                queue.put_nowait(conn.notifies.pop(0).payload)
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN "{channel}"')
+            loop.add_reader(conn.fileno(), on_readable)
+            while True:
+                item = await queue.get()
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        except psycopg2.Error as e:
+            logger.warning("LISTEN connection lost, reconnecting", extra={"channel": channel, "error": str(e)})
+        finally:
+            try:
+                loop.remove_reader(conn.fileno())
+            except (ValueError, psycopg2.Error):
+                pass
+            conn.close()
+        await asyncio.sleep(retry_seconds)
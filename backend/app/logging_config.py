@@ -0,0 +1,120 @@
+"""
+Mo's Burritos FastAPI Backend - Logging
+Structured, leveled logging shared by the app. Records are handed to a queue
+and formatted/written on a background thread, so request handlers and the
+Socket.IO hot path never block on stdout.
+
+    LOG_LEVEL=INFO                                     root level
+    LOG_LEVELS=app.socket_manager=DEBUG,engineio=ERROR per-logger overrides
+    LOG_FORMAT=json                                    one JSON object per line (default: text)
+    LOG_SAMPLE_RATE=0.01                               share of sampled() records that are kept
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import random
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from .config import settings
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def sampled(rate: Optional[float] = None, **fields: Any) -> Dict[str, Any]:
+    """
+    `extra=` for high-frequency records (per emit, per join, per request):
+    only a `rate` share of them is kept (default LOG_SAMPLE_RATE).
+
+        logger.debug("Emitted update", extra=sampled(room=room))
+    """
+    return {"sample_rate": settings.log_sample_rate if rate is None else rate, **fields}
+
+
+class SamplingFilter(logging.Filter):
+    """Drops records marked with sampled() according to their rate"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample_rate", None)
+        return rate is None or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra=` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key != "sample_rate":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Readable single-line format with `extra=` fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = [
+            f"{key}={value}" for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS and key != "sample_rate"
+        ]
+        return f"{line} {' '.join(fields)}" if fields else line
+
+
+def _parse_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging() -> None:
+    """Install the queue handler on the root logger (safe to call more than once)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if settings.log_format == "json" else TextFormatter())
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # Sample before enqueueing so dropped records cost nothing downstream
+    queue_handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.log_level.upper())
+
+    for name, level in _parse_levels(settings.log_levels).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,14 +1,21 @@
 """
 Mo's Burritos FastAPI Backend - Main Application Entry Point
 """
-from fastapi import FastAPI, File, UploadFile, Depends, HTTPException
+from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 from pathlib import Path
 import uuid
 
 from .config import settings
-from .database import Base, engine
+from .logging_config import setup_logging, shutdown_logging
+
+# Before anything else logs, so python-socketio/engineio pick up the root handler
+setup_logging()
+
+from .database import Base, engine, ensure_schema
 from .models import User, Location, MenuCategory, MenuItem, Order, UserLocation, LiveLocation
 from .routers import (
     auth_router,
@@ -20,7 +27,16 @@ from .routers import (
     live_locations_router,
     admin_router,
 )
+from .middleware import QueryStatsMiddleware, RequestMetricsMiddleware, TracingMiddleware
+from .metrics import render_metrics
+from .tracing import shutdown_tracing
 from .socket_manager import sio
+from .services import (
+    shutdown_stripe_executor,
+    run_stripe_event_worker,
+    run_order_event_listener,
+    run_order_event_dispatcher,
+)
 import socketio
 
 
@@ -35,16 +51,30 @@ async def lifespan(app: FastAPI):
     # Create database tables
     try:
         Base.metadata.create_all(bind=engine)
+        ensure_schema()
         print("✅ Database tables created/verified")
     except Exception as e:
         print(f"⚠️  Database connection failed (this is expected on Render free tier with Supabase): {e}")
         print("   App will start but database operations may fail")
         print("   Consider upgrading Render plan or switching to Fly.io")
-    
+
+    # Apply stored Stripe webhook events in the background
+    stripe_event_worker = asyncio.create_task(run_stripe_event_worker())
+
+    # Deliver the order_events outbox to Socket.IO, woken by NOTIFY on commit
+    order_event_listener = asyncio.create_task(run_order_event_listener())
+    order_event_dispatcher = asyncio.create_task(run_order_event_dispatcher())
+
     yield
     
     # Shutdown
     print("👋 Shutting down Mo's Burritos Backend...")
+    stripe_event_worker.cancel()
+    order_event_listener.cancel()
+    order_event_dispatcher.cancel()
+    shutdown_stripe_executor()
+    shutdown_tracing()
+    shutdown_logging()
 
 
 # Create FastAPI application
@@ -64,6 +94,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Route latency and in-flight requests for /metrics
+app.add_middleware(RequestMetricsMiddleware)
+
+# Query counts and N+1 warnings per request (opt-in, adds a listener to every query)
+if settings.query_stats_enabled:
+    app.add_middleware(QueryStatsMiddleware)
+
+# Sampled traces of SQL, Stripe, Supabase and Socket.IO calls (opt-in)
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(auth_router, prefix="/api")
 app.include_router(locations_router, prefix="/api")
@@ -87,6 +128,14 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape endpoint (per worker process)"""
+    if settings.metrics_token and request.headers.get("authorization") != f"Bearer {settings.metrics_token}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/debug/cors")
 async def debug_cors():
     """Debug endpoint to check CORS configuration"""
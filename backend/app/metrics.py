@@ -0,0 +1,196 @@
+"""
+Mo's Burritos FastAPI Backend - Metrics
+A small in-process metrics registry rendered in the Prometheus text format
+at /metrics: request latency per route, in-flight requests, database pool
+usage and Socket.IO connections/emits. Each worker process reports its own
+numbers; Prometheus sums them across instances.
+"""
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label combination"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            for bound, count in zip(self.buckets + (float("inf"),), values):
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {values[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {values[-2]}")
+        return lines
+
+
+class Gauge:
+    """A value that goes up and down, or is read from a callback at scrape time"""
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                 callback: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, float] = {} if labels else {(): 0}
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, amount: float = 1, *labels: str) -> None:
+        self.inc(-amount, *labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        if self.callback is not None:
+            values = self.callback()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Counter(Gauge):
+    """A value that only goes up"""
+    type = "counter"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                # A failing callback must not take the whole scrape down
+                continue
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# HTTP
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    labels=("method", "route", "status"),
+))
+REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled",
+))
+
+# Database pool
+POOL_WAIT = registry.register(Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled database connection",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0),
+))
+POOL_TIMEOUTS = registry.register(Counter(
+    "db_pool_timeouts_total", "Connection checkouts that gave up waiting (pool_timeout)",
+))
+
+# Socket.IO
+EMIT_LATENCY = registry.register(Histogram(
+    "socketio_emit_duration_seconds", "Time to hand one Socket.IO emit to its rooms or the message queue",
+    labels=("event",),
+))
+
+
+def register_pool_gauges(pool) -> None:
+    """Pool size, checked-out and overflow connections, read at scrape time"""
+    registry.register(Gauge(
+        "db_pool_size", "Connections kept in the pool (pool_size)",
+        callback=lambda: {(): pool.size()},
+    ))
+    registry.register(Gauge(
+        "db_pool_checked_out", "Connections currently checked out",
+        callback=lambda: {(): pool.checkedout()},
+    ))
+    registry.register(Gauge(
+        "db_pool_overflow", "Connections open beyond pool_size (negative while the pool is not yet full)",
+        callback=lambda: {(): pool.overflow()},
+    ))
+
+
+def register_socketio_gauges(server) -> None:
+    """Connected clients, rooms and backlogged clients of a Socket.IO server"""
+    def rooms():
+        counts: Dict[LabelValues, float] = {}
+        for namespace, namespace_rooms in server.manager.rooms.items():
+            for room in namespace_rooms:
+                # Every client has a room named after its sid; count the shared ones by kind
+                kind = room.split(":", 1)[0] if isinstance(room, str) and ":" in room else None
+                if kind:
+                    counts[(namespace, kind)] = counts.get((namespace, kind), 0) + 1
+        return counts
+
+    registry.register(Gauge(
+        "socketio_connected_clients", "Engine.IO connections to this worker",
+        callback=lambda: {(): len(server.eio.sockets)},
+    ))
+    registry.register(Gauge(
+        "socketio_rooms", "Rooms with members on this worker, by kind (order, kitchen)",
+        labels=("namespace", "kind"), callback=rooms,
+    ))
+    registry.register(Gauge(
+        "socketio_backlogged_clients", "Clients with packets waiting in their send queue",
+        callback=lambda: {(): len(server.client_backlog_stats())},
+    ))
+
+
+def render_metrics() -> str:
+    return registry.render()
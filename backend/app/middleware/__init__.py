@@ -2,6 +2,7 @@
 Mo's Burritos - Middleware Package
 """
 from .auth import (
+    get_supabase_user,
     get_current_user,
     get_current_active_user,
     require_role,
@@ -9,12 +10,23 @@ from .auth import (
     require_manager_or_above,
     require_staff_or_above,
 )
+from .request_metrics import RequestMetricsMiddleware
+from .query_stats import (
+    QueryStatsMiddleware,
+    current_query_stats,
+)
+from .tracing import TracingMiddleware
 
 __all__ = [
+    "get_supabase_user",
     "get_current_user",
     "get_current_active_user",
     "require_role",
     "require_owner",
     "require_manager_or_above",
     "require_staff_or_above",
+    "RequestMetricsMiddleware",
+    "QueryStatsMiddleware",
+    "current_query_stats",
+    "TracingMiddleware",
 ]
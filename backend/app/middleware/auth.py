@@ -8,19 +8,43 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import logging
 
 from ..database import get_db
 from ..config import settings
 from ..models import User, UserRole as ModelUserRole
 from ..schemas import UserRole
 from ..services import decode_token, get_supabase_user_from_token
+from ..logging_config import sampled
+
+logger = logging.getLogger(__name__)
 
 # HTTP Bearer token security
 security = HTTPBearer()
 
 
+async def get_supabase_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> dict:
+    """
+    Validate the bearer token with Supabase and return its user. FastAPI
+    caches dependencies per request, so routes that also need the verified
+    e-mail/phone share get_current_user's Supabase call.
+    """
+    supabase_user = await get_supabase_user_from_token(credentials.credentials)
+
+    if not supabase_user:
+        logger.info("Supabase token validation failed")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return supabase_user
+
+
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    supabase_user: dict = Depends(get_supabase_user),
     db: Session = Depends(get_db)
 ) -> User:
     """
@@ -32,19 +56,6 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
-    token = credentials.credentials
-    
-    print(f"[AUTH] Validating Supabase token...")
-    
-    # Validate token with Supabase
-    supabase_user = await get_supabase_user_from_token(token)
-    
-    if not supabase_user:
-        print(f"[AUTH] Supabase token validation failed")
-        raise credentials_exception
-    
-    print(f"[AUTH] Supabase token valid for user: {supabase_user.get('email')}")
 
     # Find user by supabase_id FIRST (most reliable)
     user = db.query(User).filter(User.supabase_id == supabase_user["id"]).first()
@@ -54,7 +65,7 @@ async def get_current_user(
         user = db.query(User).filter(User.email == supabase_user.get("email")).first()
         if user and not user.supabase_id:
             # Link existing user to Supabase account
-            print(f"[AUTH] Linking existing user to Supabase ID: {user.email}")
+            logger.info("Linking existing user to Supabase ID", extra={"user_id": user.id})
             user.supabase_id = supabase_user["id"]
             db.commit()
 
@@ -62,13 +73,13 @@ async def get_current_user(
     if not user and supabase_user.get("phone"):
         user = db.query(User).filter(User.phone == supabase_user.get("phone")).first()
         if user and not user.supabase_id:
-            print(f"[AUTH] Linking existing phone user to Supabase ID: {user.phone}")
+            logger.info("Linking existing phone user to Supabase ID", extra={"user_id": user.id})
             user.supabase_id = supabase_user["id"]
             db.commit()
 
     # Auto-sync user from Supabase on first login
     if not user and (supabase_user.get("email") or supabase_user.get("phone")):
-        print(f"[AUTH] Auto-creating user from Supabase: {supabase_user.get('email') or supabase_user.get('phone')}")
+        logger.info("Auto-creating user from Supabase", extra={"supabase_id": supabase_user["id"]})
 
         # Convert empty strings to None to avoid unique constraint violations
         phone = supabase_user.get("phone")
@@ -89,20 +100,20 @@ async def get_current_user(
         db.add(user)
         db.commit()
         db.refresh(user)
-        print(f"[AUTH] User created successfully: {user.id}")
+        logger.info("User created", extra={"user_id": user.id})
     
     if not user:
-        print(f"[AUTH] User not found after Supabase validation")
+        logger.warning("User not found after Supabase validation", extra={"supabase_id": supabase_user["id"]})
         raise credentials_exception
     
     if not user.is_active:
-        print(f"[AUTH] User account is disabled: {user.email}")
+        logger.info("User account is disabled", extra={"user_id": user.id})
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is disabled"
         )
     
-    print(f"[AUTH] Authentication successful - User: {user.email}, Role: {user.role.value}")
+    logger.debug("Authenticated request", extra=sampled(user_id=user.id, role=user.role.value))
     return user
 
 
@@ -0,0 +1,140 @@
+"""
+Mo's Burritos - Query Stats Middleware
+Opt-in (QUERY_STATS_ENABLED=true) per-request SQL accounting for development
+and benchmark runs: every response gets a Server-Timing header with the
+number of queries and the time spent in the database, and a warning is
+logged when one statement shape runs more than QUERY_REPEAT_WARN_THRESHOLD
+times in a single request - the usual sign of an N+1.
+
+    Server-Timing: db;dur=12.4;desc="17 queries", app;dur=20.1
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Expanded IN lists (%(id_1_1)s, %(id_1_2)s, ...) and literals vary per call
+_PARAM_LIST = re.compile(r"\(\s*(?:%\([^)]+\)s|\?)(?:\s*,\s*(?:%\([^)]+\)s|\?))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with parameter lists collapsed, so repeats of one query compare equal"""
+    return _WHITESPACE.sub(" ", _PARAM_LIST.sub("(?)", statement)).strip()
+
+
+class QueryStats:
+    """Queries run while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_listening = False
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the request being handled, if query stats are enabled"""
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_stats_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_stats_started")
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time so the connection's later queries aren't paired with it
+    conn = exception_context.connection
+    started = conn.info.get("query_stats_started") if conn is not None else None
+    if not started:
+        return
+    duration = time.perf_counter() - started.pop()
+    stats = _current.get()
+    if stats is not None and exception_context.statement is not None:
+        stats.record(exception_context.statement, duration)
+
+
+def install_query_listeners() -> None:
+    """Hook every engine's cursor execution (once)"""
+    global _listening
+    if _listening:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _listening = True
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that counts the SQL each HTTP request runs. Queries made
+    in worker threads (sync endpoints, asyncio.to_thread) are counted too,
+    since they inherit the request's context.
+    """
+
+    def __init__(self, app, repeat_threshold: Optional[int] = None):
+        self.app = app
+        self.repeat_threshold = (
+            settings.query_repeat_warn_threshold if repeat_threshold is None else repeat_threshold
+        )
+        install_query_listeners()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = (time.perf_counter() - started) * 1000
+                timing = f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", app;dur={elapsed:.1f}'
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            for shape, count in stats.repeated(self.repeat_threshold):
+                logger.warning("Possible N+1: statement repeated in one request", extra={
+                    "path": scope.get("path"),
+                    "repeats": count,
+                    "queries": stats.count,
+                    "statement": shape[:300],
+                })
@@ -0,0 +1,56 @@
+"""
+Mo's Burritos - Request Metrics Middleware
+Records each HTTP request's latency under its route template
+(/api/orders/{order_id}, not the concrete path, so label values stay
+bounded) and tracks requests in flight, for /metrics.
+"""
+import time
+
+from ..metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT
+
+
+def route_template(scope) -> str:
+    """
+    Template of the matched route including the prefixes of the routers it
+    was included through, e.g. /api/orders/{order_id}
+    """
+    route = scope.get("route")
+    if route is None or not hasattr(route, "path_format"):
+        return "unmatched"
+    try:
+        matched = route.path_format.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return route.path_format
+    path = scope["path"]
+    prefix = path[:-len(matched)] if matched and path.endswith(matched) else ""
+    return prefix + route.path_format
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware feeding http_request_duration_seconds and http_requests_in_flight"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - started, scope["method"], route_template(scope), str(status_code)
+            )
@@ -0,0 +1,50 @@
+"""
+Mo's Burritos - Tracing Middleware
+Opens the root span of each HTTP request (TRACING_ENABLED=true), so the SQL,
+Stripe, Supabase and Socket.IO spans recorded while handling it share one
+trace. Named after the route template once routing is done.
+"""
+from ..tracing import SERVER, install_sql_tracing, start_trace
+from .request_metrics import route_template
+
+
+class TracingMiddleware:
+    """ASGI middleware starting a (sampled) trace per HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+        install_sql_tracing()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope.get("headers", ()):
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with start_trace(scope["method"], SERVER, traceparent, {
+            "http.request.method": scope["method"],
+            "url.path": scope["path"],
+        }) as span:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                if span is not None:
+                    route = route_template(scope)
+                    span.name = f"{scope['method']} {route}"
+                    span.set("http.route", route)
+                    span.set("http.response.status_code", status_code)
+                    if status_code >= 500:
+                        span.error = f"HTTP {status_code}"
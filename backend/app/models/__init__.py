@@ -6,6 +6,10 @@ from .location import Location, LocationType
 from .menu import MenuCategory, MenuItem
 from .order import Order, OrderStatusHistory, OrderStatus, PaymentStatus, PaymentMethod
 from .live_location import LiveLocation
+from .stripe_event import StripeEvent, StripeEventStatus
+from .order_event import OrderEvent, OrderEventStatus
+from .customer_stats import CustomerStats
+from .guest_customer import GuestCustomer
 
 __all__ = [
     "User",
@@ -22,4 +26,10 @@ __all__ = [
     "PaymentStatus",
     "PaymentMethod",
     "LiveLocation",
+    "StripeEvent",
+    "StripeEventStatus",
+    "OrderEvent",
+    "OrderEventStatus",
+    "CustomerStats",
+    "GuestCustomer",
 ]
@@ -0,0 +1,34 @@
+"""
+Mo's Burritos - Customer Stats Models
+Per-customer order totals for the admin customer list, kept up to date as
+orders change so the list is a plain indexed read
+"""
+from sqlalchemy import Column, String, DateTime, Float, Integer, Index
+from datetime import datetime
+
+from ..database import Base
+
+
+class CustomerStats(Base):
+    """One row per registered customer (keyed by user id) or guest (keyed by "guest_<guest_customers id>")"""
+    __tablename__ = "customer_stats"
+
+    customer_key = Column(String(300), primary_key=True)
+    customer_type = Column(String(20), nullable=False)  # registered / guest
+    name = Column(String(255), nullable=False, default="")  # "" when unknown, so it can be a sort key
+    email = Column(String(255), nullable=True)
+    phone = Column(String(20), nullable=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    total_spent = Column(Float, nullable=False, default=0.0)  # Completed orders only
+    last_order_date = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False)  # Sign-up, or first order for guests
+    last_activity_at = Column(DateTime, nullable=False)  # last_order_date, or created_at without orders
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_customer_stats_last_activity", "last_activity_at", "customer_key"),
+        Index("ix_customer_stats_total_spent", "total_spent", "customer_key"),
+        Index("ix_customer_stats_order_count", "order_count", "customer_key"),
+        Index("ix_customer_stats_name", "name", "customer_key"),
+        Index("ix_customer_stats_type", "customer_type"),
+    )
@@ -0,0 +1,21 @@
+"""
+Mo's Burritos - Guest Customer Models
+One row per person who ordered without an account, identified by their
+normalized e-mail and/or phone number
+"""
+from sqlalchemy import Column, String, DateTime, ForeignKey
+from datetime import datetime
+import uuid
+
+from ..database import Base
+
+
+class GuestCustomer(Base):
+    __tablename__ = "guest_customers"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    email = Column(String(255), unique=True, nullable=True, index=True)  # Lower-cased
+    phone = Column(String(20), unique=True, nullable=True, index=True)  # E.164, e.g. +15551234567
+    name = Column(String(255), nullable=True)  # From the first order
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=True, index=True)  # Set once the guest registers
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -37,7 +37,8 @@ class Order(Base):
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     location_id = Column(String(36), ForeignKey("locations.id"), nullable=False)
-    customer_id = Column(String(36), ForeignKey("users.id"), nullable=True)  # Nullable for guest orders
+    customer_id = Column(String(36), ForeignKey("users.id"), nullable=True, index=True)  # Nullable for guest orders
+    guest_id = Column(String(36), ForeignKey("guest_customers.id"), nullable=True, index=True)  # Guest orders only
     
     # Customer info (stored for guest orders)
     customer_name = Column(String(255), nullable=False)
@@ -78,7 +79,7 @@ class OrderStatusHistory(Base):
     __tablename__ = "order_status_history"
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    order_id = Column(String(36), ForeignKey("orders.id"), nullable=False)
+    order_id = Column(String(36), ForeignKey("orders.id"), nullable=False, index=True)
     status = Column(SQLEnum(OrderStatus), nullable=False)
     changed_by = Column(String(36), ForeignKey("users.id"), nullable=True)
     notes = Column(Text, nullable=True)
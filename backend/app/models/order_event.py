@@ -0,0 +1,39 @@
+"""
+Mo's Burritos - Order Event Outbox Models
+Order changes are written here in the same transaction as the order itself
+and pushed to Socket.IO by a background dispatcher
+"""
+from sqlalchemy import Column, String, DateTime, Enum as SQLEnum, Text, JSON, Integer, BigInteger, Index
+from datetime import datetime
+import enum
+
+from ..database import Base
+
+
+class OrderEventStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class OrderEvent(Base):
+    """
+    Outbox row for one order change. The id gives the write order; the seq
+    clients see is drawn from the same sequence when the event is dispatched.
+    """
+    __tablename__ = "order_events"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    order_id = Column(String(36), nullable=False, index=True)  # No FK - delete events outlive the order
+    location_id = Column(String(36), nullable=False)
+    op = Column(String(20), nullable=False)  # insert / update / delete
+    payload = Column(JSON, nullable=False)  # Change {op, id, location_id, fields, paid} and the order snapshot
+    status = Column(SQLEnum(OrderEventStatus), nullable=False, default=OrderEventStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    dispatched_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_order_events_status_id", "status", "id"),
+    )
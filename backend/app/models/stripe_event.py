@@ -0,0 +1,29 @@
+"""
+Mo's Burritos - Stripe Webhook Event Models
+Raw webhook events are stored first and applied by a background worker
+"""
+from sqlalchemy import Column, String, DateTime, Enum as SQLEnum, Text, JSON, Integer
+from datetime import datetime
+import enum
+
+from ..database import Base
+
+
+class StripeEventStatus(str, enum.Enum):
+    PENDING = "pending"
+    PROCESSED = "processed"
+    FAILED = "failed"
+
+
+class StripeEvent(Base):
+    """Stripe webhook event, keyed by the Stripe event id for deduplication"""
+    __tablename__ = "stripe_events"
+
+    id = Column(String(255), primary_key=True)  # Stripe event id (evt_...)
+    type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)  # Raw event body as sent by Stripe
+    status = Column(SQLEnum(StripeEventStatus), nullable=False, default=StripeEventStatus.PENDING, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    received_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
@@ -2,137 +2,220 @@
 Mo's Burritos - Admin Routes
 Endpoints under /api/admin prefix
 """
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, status
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import os
 import uuid
 from pathlib import Path
+from datetime import datetime, timezone
 
 from ..database import get_db
-from ..models import User, Order, UserRole as ModelUserRole, OrderStatus as ModelOrderStatus
-from ..schemas import UserRole
+from ..models import User
+from ..schemas import UserRole, CustomerBulkDelete
+from ..middleware import require_owner
+from ..services import (
+    list_customers, customer_summary, delete_customers,
+    SEGMENTS, get_segments, segment_summary, segment_customers,
+    EXPORTS, export_stream,
+)
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
+def _customer_response(customer: dict) -> dict:
+    registered = customer["type"] == "registered"
+    last_order = customer["last_order_date"]
+    return {
+        "id": customer["id"],
+        "type": customer["type"],
+        "name": customer["name"],
+        "email": customer["email"],
+        "phone": customer["phone"],
+        "totalOrders": customer["order_count"],
+        "totalSpent": customer["total_spent"],
+        "lastOrderDate": last_order.isoformat() if last_order else None,
+        ("registeredDate" if registered else "firstOrderDate"): customer["created_at"].isoformat(),
+        "isRegistered": registered,
+        "created_at": customer["created_at"],
+    }
+
+
+def _deletion_counts(result: dict) -> dict:
+    return {
+        "customers": result["customers"],
+        "orders": result["orders"],
+        "statusHistory": result["status_history"],
+        "guestIdentities": result["guest_identities"],
+    }
+
+
 @router.get("/customers")
 async def admin_get_customers(
+    search: Optional[str] = None,
+    type: Optional[str] = Query(None, pattern="^(registered|guest)$"),
+    sort: str = Query("last_order", pattern="^(last_order|total_spent|order_count|name)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all customers (both registered users and guest orders)"""
-    # Get registered customers
-    registered_customers = db.query(User).filter(
-        User.role == ModelUserRole.CUSTOMER
-    ).all()
-
-    # Get guest customers from orders (those without customer_id)
-    guest_orders = db.query(Order).filter(
-        Order.customer_id == None
-    ).all()
-
-    # Format registered customers
-    customers = []
-    total_orders_count = 0
-    total_revenue = 0
-
-    for customer in registered_customers:
-        # Get customer's orders
-        orders = db.query(Order).filter(Order.customer_id == customer.id).all()
-        total_spent = sum(order.total for order in orders if order.status == ModelOrderStatus.COMPLETED)
-        last_order = max(orders, key=lambda o: o.created_at) if orders else None
-
-        total_orders_count += len(orders)
-        total_revenue += total_spent
-
-        customers.append({
-            "id": customer.id,
-            "type": "registered",
-            "name": f"{customer.first_name or ''} {customer.last_name or ''}".strip() or "Unknown",
-            "email": customer.email,
-            "phone": customer.phone,
-            "totalOrders": len(orders),  # Changed from order_count
-            "totalSpent": round(total_spent, 2),  # Changed from total_spent
-            "lastOrderDate": last_order.created_at.isoformat() if last_order else None,  # Changed from last_order_date
-            "registeredDate": customer.created_at.isoformat(),  # Added
-            "isRegistered": True,  # Added
-            "created_at": customer.created_at
-        })
-
-    # Add guest customers (group by email or phone)
-    guest_customers_map = {}
-    for order in guest_orders:
-        key = order.customer_email or order.customer_phone
-        if key:
-            if key not in guest_customers_map:
-                guest_customers_map[key] = {
-                    "id": f"guest_{key}",
-                    "type": "guest",
-                    "name": order.customer_name,
-                    "email": order.customer_email,
-                    "phone": order.customer_phone,
-                    "totalOrders": 0,  # Changed from order_count
-                    "totalSpent": 0,  # Changed from total_spent
-                    "lastOrderDate": order.created_at.isoformat(),  # Changed from last_order_date
-                    "firstOrderDate": order.created_at.isoformat(),  # Added
-                    "isRegistered": False,  # Added
-                    "created_at": order.created_at
-                }
-
-            guest_customers_map[key]["totalOrders"] += 1
-            if order.status == ModelOrderStatus.COMPLETED:
-                guest_customers_map[key]["totalSpent"] += order.total
-                total_orders_count += 1
-                total_revenue += order.total
-            if order.created_at > guest_customers_map[key]["created_at"]:
-                guest_customers_map[key]["lastOrderDate"] = order.created_at.isoformat()
-
-    # Round totalSpent for guests and add to customers list
-    for guest in guest_customers_map.values():
-        guest["totalSpent"] = round(guest["totalSpent"], 2)
-        customers.append(guest)
-
-    # Sort by last order date (most recent first)
-    customers.sort(key=lambda c: c.get("lastOrderDate") or c["created_at"].isoformat(), reverse=True)
+    """
+    Get customers (both registered users and guest orders), one page at a
+    time. Pass the returned nextCursor to get the next page; the summary is
+    only computed for the first page.
+    """
+    try:
+        customers, next_cursor = list_customers(
+            db, search=search, customer_type=type, sort=sort,
+            descending=order == "desc", limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    return {
-        "customers": customers,
-        "summary": {
-            "totalCustomers": len(customers),
-            "registeredCount": len(registered_customers),
-            "guestCount": len(guest_customers_map),
-            "totalOrders": total_orders_count,
-            "totalRevenue": round(total_revenue, 2)
+    response = {
+        "customers": [_customer_response(customer) for customer in customers],
+        "nextCursor": next_cursor,
+    }
+    if not cursor:
+        summary = customer_summary(db)
+        response["summary"] = {
+            "totalCustomers": summary["total_customers"],
+            "registeredCount": summary["registered_count"],
+            "guestCount": summary["guest_count"],
+            "totalOrders": summary["total_orders"],
+            "totalRevenue": summary["total_revenue"],
         }
+    return response
+
+
+@router.get("/customers/segments")
+async def admin_get_customer_segments(
+    segment: Optional[str] = Query(None, pattern="^(" + "|".join(name for name, _ in SEGMENTS) + ")$"),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_owner)
+):
+    """
+    RFM (recency / frequency / monetary) segments over all customers, plus
+    the top spenders of one segment (or overall). Scores are 1-5 by
+    quintile; the computation is cached until orders change.
+    """
+    result = await asyncio.to_thread(get_segments, db)
+    customers = segment_customers(db, result, segment=segment, limit=limit)
+    return {
+        "segments": [
+            {
+                "segment": row["segment"],
+                "description": row["description"],
+                "customerCount": row["customer_count"],
+                "totalSpent": row["total_spent"],
+                "avgRecencyDays": row["avg_recency_days"],
+                "avgFrequency": row["avg_frequency"],
+                "avgMonetary": row["avg_monetary"],
+            }
+            for row in segment_summary(result)
+        ],
+        "customers": [
+            {
+                "id": customer["id"],
+                "type": customer["type"],
+                "name": customer["name"],
+                "email": customer["email"],
+                "phone": customer["phone"],
+                "segment": customer["segment"],
+                "scores": {"r": customer["r"], "f": customer["f"], "m": customer["m"]},
+                "recencyDays": customer["recency_days"],
+                "totalOrders": customer["frequency"],
+                "totalSpent": customer["monetary"],
+            }
+            for customer in customers
+        ],
+        "totalCustomers": len(result["keys"]),
+        "computedAt": datetime.fromtimestamp(result["computed_at"], timezone.utc).isoformat(),
     }
 
 
 @router.delete("/customers/{customer_id}")
 async def admin_delete_customer(
     customer_id: str,
-    db: Session = Depends(get_db)
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_owner)
 ):
-    """Delete a customer and all their orders"""
-    # Find customer
-    customer = db.query(User).filter(
-        User.id == customer_id,
-        User.role == ModelUserRole.CUSTOMER
-    ).first()
-
-    if not customer:
+    """Delete a customer and all their orders; dry_run only counts what would go"""
+    result = delete_customers(db, [customer_id], dry_run=dry_run)
+    if not result["customers"]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Customer not found"
         )
 
-    # Delete customer's orders first
-    db.query(Order).filter(Order.customer_id == customer_id).delete()
+    return {
+        "message": "Dry run - nothing was deleted" if dry_run else "Customer and their orders deleted successfully",
+        "deleted": _deletion_counts(result),
+        "dryRun": dry_run,
+    }
 
-    # Delete customer
-    db.delete(customer)
-    db.commit()
 
-    return {"message": "Customer and their orders deleted successfully"}
+@router.post("/customers/bulk-delete")
+async def admin_bulk_delete_customers(
+    request: CustomerBulkDelete,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_owner)
+):
+    """
+    Delete a batch of customers (e.g. GDPR erasure requests) in one
+    transaction. Ids that aren't customers are returned in notFound.
+    """
+    result = delete_customers(db, request.customer_ids, dry_run=request.dry_run)
+    return {
+        "deleted": _deletion_counts(result),
+        "notFound": result["not_found"],
+        "dryRun": request.dry_run,
+    }
+
+
+@router.get("/exports/{dataset}")
+async def admin_export(
+    dataset: str,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    gzip: bool = False,
+    location_id: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    type: Optional[str] = Query(None, pattern="^(registered|guest)$"),
+    current_user: User = Depends(require_owner)
+):
+    """
+    Download orders (one row per item), status-history or customers as CSV
+    or NDJSON, optionally gzipped. The file is streamed as rows are read, so
+    any date range can be exported. start_date/end_date filter orders and
+    status history; type filters customers.
+    """
+    if dataset not in EXPORTS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown export: {dataset}. Available: {', '.join(EXPORTS)}"
+        )
+    columns, export = EXPORTS[dataset]
+    if dataset == "customers":
+        rows = export(customer_type=type)
+    else:
+        rows = export(location_id=location_id, start_date=start_date, end_date=end_date)
+
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        export_stream(columns, rows, format, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.post("/upload-menu-image")
@@ -3,10 +3,11 @@ Mo's Burritos - Authentication Routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+import logging
 import traceback
 
 from ..database import get_db
-from ..models import User, UserRole as ModelUserRole, UserLocation, Location
+from ..models import User, UserRole as ModelUserRole
 from ..schemas import (
     UserLogin, UserRegister, Token, LoginResponse, RefreshTokenRequest,
     UserResponse, UserRole, PhoneOTPRequest, PhoneVerifyRequest, PhoneLoginResponse
@@ -23,9 +24,14 @@ from ..services import (
     sign_up_with_email,
     refresh_supabase_session,
     get_supabase_user_from_token,
+    get_location_assignments,
+    merge_guest_orders,
 )
-from ..middleware import get_current_user
+from ..middleware import get_current_user, get_supabase_user
 from ..config import settings
+from ..logging_config import sampled
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -41,13 +47,13 @@ async def customer_login(
     Customer login using Supabase Auth
     """
     try:
-        print(f"[AUTH] Customer login attempt for email: {credentials.email}")
+        logger.debug("Customer login attempt", extra=sampled())
         return await supabase_login(credentials, db)
     except HTTPException:
         raise
     except Exception as e:
         error_detail = f"Login error: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
-        print(f"[ERROR] {error_detail}")
+        logger.exception("Customer login error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=error_detail
@@ -63,12 +69,12 @@ async def customer_register(
     Customer registration using Supabase Auth
     """
     try:
-        print(f"[AUTH] Customer registration attempt for email: {user_data.email}")
+        logger.info("Customer registration attempt")
         
         # Check if email already exists
         existing_user = db.query(User).filter(User.email == user_data.email).first()
         if existing_user:
-            print(f"[AUTH] Email already registered: {user_data.email}")
+            logger.info("Email already registered", extra={"user_id": existing_user.id})
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
@@ -79,7 +85,7 @@ async def customer_register(
         raise
     except Exception as e:
         error_detail = f"Registration error: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
-        print(f"[ERROR] {error_detail}")
+        logger.exception("Customer registration error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=error_detail
@@ -98,7 +104,7 @@ async def customer_refresh(request: RefreshTokenRequest):
 async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     """Admin/Staff login using Supabase Auth"""
     try:
-        print(f"[AUTH] Staff/Admin login attempt for email: {credentials.email}")
+        logger.info("Staff/admin login attempt")
         
         # Authenticate with Supabase
         result = await sign_in_with_email(credentials.email, credentials.password)
@@ -128,36 +134,22 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
             db.add(user)
             db.commit()
             db.refresh(user)
-            print(f"[AUTH] Auto-created user: {user.email}")
+            logger.info("Auto-created user", extra={"user_id": user.id})
         elif not user.supabase_id:
             # Link existing user to Supabase
             user.supabase_id = supabase_user["id"]
             db.commit()
-            print(f"[AUTH] Linked user to Supabase: {user.email}")
+            logger.info("Linked user to Supabase", extra={"user_id": user.id})
         
         access_token = session["access_token"]
         refresh_token = session["refresh_token"]
         
-        print(f"[AUTH] User authenticated: {user.id}, role: {user.role.value}")
+        logger.debug("User authenticated", extra={"user_id": user.id, "role": user.role.value})
 
         # Get user's assigned locations
-        user_locations = db.query(UserLocation).filter(
-            UserLocation.user_id == user.id,
-            UserLocation.is_active == True
-        ).all()
-
-        print(f"[DEBUG] Found {len(user_locations)} assigned locations for user")
-
-        # Format assigned locations
-        assigned_locations = []
-        for ul in user_locations:
-            if ul.location:
-                assigned_locations.append({
-                    "location_id": ul.location_id,
-                    "location_name": ul.location.name,
-                    "role": ul.role.value,
-                    "assigned_at": ul.assigned_at
-                })
+        assigned_locations = get_location_assignments(db, user.id)
+
+        logger.debug("Assigned locations loaded", extra={"user_id": user.id, "count": len(assigned_locations)})
 
         # Set current location (first assigned location or None)
         current_location = None
@@ -167,7 +159,7 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
                 "name": assigned_locations[0]["location_name"]
             }
 
-        print(f"[DEBUG] Login successful, returning tokens and {len(assigned_locations)} locations")
+        logger.debug("Staff login successful", extra={"user_id": user.id})
 
         return LoginResponse(
             user=user,
@@ -180,7 +172,7 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         error_detail = f"Login error: {str(e)}\n\nTraceback:\n{traceback.format_exc()}"
-        print(f"[ERROR] {error_detail}")
+        logger.exception("Staff login error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=error_detail
@@ -190,12 +182,12 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
 @router.post("/register", response_model=LoginResponse)
 async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     """Register a new account using Supabase Auth"""
-    print(f"[AUTH] New registration attempt for: {user_data.email}")
+    logger.info("Registration attempt")
     
     # Check if email exists
     existing_user = db.query(User).filter(User.email == user_data.email).first()
     if existing_user:
-        print(f"[AUTH] Email already exists: {user_data.email}")
+        logger.info("Email already registered", extra={"user_id": existing_user.id})
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -237,7 +229,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     access_token = session["access_token"]
     refresh_token = session["refresh_token"]
     
-    print(f"[AUTH] Registration complete for: {new_user.email}")
+    logger.info("Registration complete", extra={"user_id": new_user.id})
     
     return LoginResponse(
         user=new_user,
@@ -254,6 +246,35 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
 
 
+@router.post("/customer/claim-guest-orders")
+async def claim_guest_orders(
+    supabase_user: dict = Depends(get_supabase_user),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Move orders placed as a guest onto the signed-in customer's account.
+    Only the e-mail and phone Supabase has verified for this account
+    (confirmed e-mail, OTP-verified phone) are matched.
+    """
+    if current_user.role != ModelUserRole.CUSTOMER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only customers can claim guest orders"
+        )
+
+    # Same Supabase user get_current_user resolved (dependencies are cached per request)
+    email = supabase_user.get("email") if supabase_user.get("email_confirmed") else None
+    phone = supabase_user.get("phone") if supabase_user.get("phone_confirmed") else None
+    guest_ids = merge_guest_orders(db, current_user, email=email, phone=phone)
+    logger.info("Guest orders claimed", extra={"user_id": current_user.id, "guests": len(guest_ids)})
+    return {
+        "claimedGuests": len(guest_ids),
+        "verifiedEmail": email is not None,
+        "verifiedPhone": phone is not None,
+    }
+
+
 @router.post("/refresh", response_model=LoginResponse)
 async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
     """Refresh access token using refresh token"""
@@ -283,21 +304,7 @@ async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_
     new_refresh_token = create_refresh_token(new_token_data)
 
     # Get user's assigned locations
-    user_locations = db.query(UserLocation).filter(
-        UserLocation.user_id == user.id,
-        UserLocation.is_active == True
-    ).all()
-
-    # Format assigned locations
-    assigned_locations = []
-    for ul in user_locations:
-        if ul.location:
-            assigned_locations.append({
-                "location_id": ul.location_id,
-                "location_name": ul.location.name,
-                "role": ul.role.value,
-                "assigned_at": ul.assigned_at
-            })
+    assigned_locations = get_location_assignments(db, user.id)
 
     # Set current location (first assigned location or None)
     current_location = None
@@ -351,13 +358,13 @@ async def supabase_login(
         user = db.query(User).filter(User.email == supabase_user["email"]).first()
         if user and not user.supabase_id:
             # Link existing user to Supabase
-            print(f"[AUTH] Linking existing user to Supabase: {user.email}")
+            logger.info("Linking existing user to Supabase", extra={"user_id": user.id})
             user.supabase_id = supabase_user["id"]
             db.commit()
 
     # If still not found, create new user
     if not user:
-        print(f"[AUTH] Creating new user from login: {supabase_user['email']}")
+        logger.info("Creating new user from login", extra={"supabase_id": supabase_user["id"]})
         user = User(
             supabase_id=supabase_user["id"],
             email=supabase_user["email"],
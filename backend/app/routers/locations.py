@@ -128,22 +128,26 @@ async def get_location_staff(
     """Get staff assigned to a location"""
     # No permission check needed per request
     
-    assignments = db.query(UserLocation).filter(
+    assignments = db.query(
+        User.id,
+        User.email,
+        User.first_name,
+        User.last_name,
+        UserLocation.role,
+        UserLocation.assigned_at,
+    ).join(User, User.id == UserLocation.user_id).filter(
         UserLocation.location_id == location_id,
         UserLocation.is_active == True
-    ).all()
-    
-    result = []
-    for assignment in assignments:
-        user = db.query(User).filter(User.id == assignment.user_id).first()
-        if user:
-            result.append({
-                "user_id": user.id,
-                "email": user.email,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "role": assignment.role.value,
-                "assigned_at": assignment.assigned_at
-            })
-    
-    return result
+    ).order_by(UserLocation.assigned_at).all()
+
+    return [
+        {
+            "user_id": assignment.id,
+            "email": assignment.email,
+            "first_name": assignment.first_name,
+            "last_name": assignment.last_name,
+            "role": assignment.role.value,
+            "assigned_at": assignment.assigned_at
+        }
+        for assignment in assignments
+    ]
@@ -4,7 +4,8 @@ Mo's Burritos - Payment Routes
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Header
 from sqlalchemy.orm import Session
 import stripe
-import os
+import json
+import uuid
 from typing import Optional
 
 from ..database import get_db
@@ -19,23 +20,34 @@ from ..schemas.payment import (
 )
 from ..middleware import get_current_user
 from ..config import settings
+from ..services import run_stripe, record_stripe_event, notify_stripe_event_received
 
 router = APIRouter(prefix="/api", tags=["Payment"])
 
-# Initialize Stripe
-stripe.api_key = settings.stripe_secret_key
 STRIPE_WEBHOOK_SECRET = settings.stripe_webhook_secret
 
 
+def _idempotency_key(header: Optional[str]) -> str:
+    """
+    Key for a Stripe create call. The checkout page sends one Idempotency-Key
+    per attempt, so a retry gets back the object a timed-out request created;
+    requests without one get a fresh key, which only covers the SDK's own
+    network retries.
+    """
+    return header or str(uuid.uuid4())
+
+
 @router.post("/create-payment-intent", response_model=PaymentIntentResponse)
 async def create_payment_intent(
     request: PaymentIntentRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db)
 ):
     """Create a Stripe payment intent for checkout"""
     try:
         # Create payment intent with Stripe
-        intent = stripe.PaymentIntent.create(
+        intent = await run_stripe(
+            stripe.PaymentIntent.create,
             amount=request.amount,
             currency=request.currency,
             automatic_payment_methods={'enabled': True},
@@ -44,7 +56,8 @@ async def create_payment_intent(
                 'customer_email': request.customerInfo.get('email', ''),
                 'customer_phone': request.customerInfo.get('phone', ''),
                 'items': str(request.items)
-            }
+            },
+            idempotency_key=_idempotency_key(idempotency_key),
         )
 
         return PaymentIntentResponse(
@@ -73,11 +86,11 @@ async def verify_payment(
         # Retrieve the payment intent from Stripe
         if request.sessionId.startswith('pi_'):
             # It's a payment intent ID
-            payment_intent = stripe.PaymentIntent.retrieve(request.sessionId)
+            payment_intent = await run_stripe(stripe.PaymentIntent.retrieve, request.sessionId)
         else:
             # It's a checkout session ID
-            session = stripe.checkout.Session.retrieve(request.sessionId)
-            payment_intent = stripe.PaymentIntent.retrieve(session.payment_intent)
+            session = await run_stripe(stripe.checkout.Session.retrieve, request.sessionId)
+            payment_intent = await run_stripe(stripe.PaymentIntent.retrieve, session.payment_intent)
 
         # Check if payment was successful
         if payment_intent.status != 'succeeded':
@@ -131,71 +144,21 @@ async def stripe_webhook(
     stripe_signature: Optional[str] = Header(None, alias="stripe-signature"),
     db: Session = Depends(get_db)
 ):
-    """Handle Stripe webhook events"""
+    """
+    Handle Stripe webhook events.
+    Verifies and stores the event, then acknowledges immediately; the Stripe
+    event worker applies it to the order. Redelivered events are ignored.
+    """
     payload = await request.body()
 
     try:
         # Verify webhook signature
         if STRIPE_WEBHOOK_SECRET:
-            event = stripe.Webhook.construct_event(
+            stripe.Webhook.construct_event(
                 payload, stripe_signature, STRIPE_WEBHOOK_SECRET
             )
-        else:
-            # For development without webhook secret
-            import json
-            event = json.loads(payload)
-
-        # Handle the event
-        if event['type'] == 'checkout.session.completed':
-            session = event['data']['object']
-
-            # Find order by stripe session ID
-            order = db.query(Order).filter(
-                Order.stripe_session_id == session['id']
-            ).first()
-
-            if order:
-                # Update order status to confirmed and paid
-                order.payment_status = ModelPaymentStatus.PAID
-                order.status = ModelOrderStatus.CONFIRMED
-                order.payment_intent_id = session.get('payment_intent')
-                db.commit()
-                db.refresh(order)
-
-                print(f"✅ Order #{order.id} confirmed via webhook - sent to restaurant #{order.location_id}")
-
-        elif event['type'] == 'payment_intent.succeeded':
-            payment_intent = event['data']['object']
-
-            # Find order by payment intent ID
-            order = db.query(Order).filter(
-                Order.payment_intent_id == payment_intent['id']
-            ).first()
-
-            if order:
-                order.payment_status = ModelPaymentStatus.PAID
-                order.status = ModelOrderStatus.CONFIRMED
-                db.commit()
-                db.refresh(order)
-
-                print(f"✅ Order #{order.id} confirmed via webhook - sent to restaurant #{order.location_id}")
-
-        elif event['type'] == 'payment_intent.payment_failed':
-            payment_intent = event['data']['object']
-
-            # Find order by payment intent ID
-            order = db.query(Order).filter(
-                Order.payment_intent_id == payment_intent['id']
-            ).first()
-
-            if order:
-                order.payment_status = ModelPaymentStatus.FAILED
-                db.commit()
-
-                print(f"❌ Order #{order.id} payment failed")
-
-        return {"status": "success"}
-
+        # Store the raw body rather than the SDK object
+        event = json.loads(payload)
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -206,16 +169,32 @@ async def stripe_webhook(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid signature"
         )
+
+    if not event.get("id") or not event.get("type"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid payload"
+        )
+
+    try:
+        is_new = record_stripe_event(db, event)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Webhook processing failed: {str(e)}"
         )
 
+    if not is_new:
+        return {"status": "duplicate"}
+
+    notify_stripe_event_received()
+    return {"status": "success"}
+
 
 @router.post("/create-checkout-session", response_model=CheckoutSessionResponse)
 async def create_checkout_session(
     request: CheckoutSessionRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db)
 ):
     """Create a Stripe Checkout Session and return the URL to redirect to"""
@@ -238,7 +217,8 @@ async def create_checkout_session(
             })
         
         # Create Stripe Checkout Session
-        session = stripe.checkout.Session.create(
+        session = await run_stripe(
+            stripe.checkout.Session.create,
             payment_method_types=['card'],
             line_items=line_items,
             mode='payment',
@@ -252,6 +232,7 @@ async def create_checkout_session(
                 'location_id': request.locationId,
                 'notes': request.notes or '',
             },
+            idempotency_key=_idempotency_key(idempotency_key),
         )
 
         return CheckoutSessionResponse(
@@ -274,7 +255,7 @@ async def create_checkout_session(
 async def get_stripe_session(session_id: str):
     """Retrieve Stripe session details including metadata"""
     try:
-        session = stripe.checkout.Session.retrieve(session_id)
+        session = await run_stripe(stripe.checkout.Session.retrieve, session_id)
         
         return {
             "id": session.id,
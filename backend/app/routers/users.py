@@ -1,9 +1,9 @@
 """
 Mo's Burritos - User Management Routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from ..database import get_db
 from ..models import User, UserLocation, Location, Order, UserRole as ModelUserRole, LocationRole as ModelLocationRole, OrderStatus as ModelOrderStatus
@@ -15,8 +15,10 @@ from ..schemas import (
     LocationAssignment,
     AssignUserToLocation,
     UserRole,
-    LocationRole
 )
+from ..services import list_customers, customer_summary, delete_customers, get_location_assignments
+from ..middleware import require_owner
+
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
@@ -52,22 +54,8 @@ async def get_user(
         )
     
     # Get location assignments
-    assignments = db.query(UserLocation).filter(
-        UserLocation.user_id == user_id,
-        UserLocation.is_active == True
-    ).all()
-    
-    locations = []
-    for assignment in assignments:
-        location = db.query(Location).filter(Location.id == assignment.location_id).first()
-        if location:
-            locations.append(LocationAssignment(
-                location_id=location.id,
-                location_name=location.name,
-                role=LocationRole(assignment.role.value),
-                assigned_at=assignment.assigned_at
-            ))
-    
+    locations = [LocationAssignment(**assignment) for assignment in get_location_assignments(db, user_id)]
+
     return UserWithLocations(
         id=user.id,
         email=user.email,
@@ -87,24 +75,7 @@ async def get_user_locations(
     db: Session = Depends(get_db)
 ):
     """Get a user's assigned locations"""
-    # Get location assignments
-    assignments = db.query(UserLocation).filter(
-        UserLocation.user_id == user_id,
-        UserLocation.is_active == True
-    ).all()
-
-    locations = []
-    for assignment in assignments:
-        location = db.query(Location).filter(Location.id == assignment.location_id).first()
-        if location:
-            locations.append(LocationAssignment(
-                location_id=location.id,
-                location_name=location.name,
-                role=LocationRole(assignment.role.value),
-                assigned_at=assignment.assigned_at
-            ))
-
-    return locations
+    return [LocationAssignment(**assignment) for assignment in get_location_assignments(db, user_id)]
 
 
 @router.post("", response_model=UserResponse)
@@ -262,109 +233,91 @@ async def admin_get_users(
 
 @router.get("/admin/customers")
 async def admin_get_customers(
+    search: Optional[str] = None,
+    type: Optional[str] = Query(None, pattern="^(registered|guest)$"),
+    sort: str = Query("last_order", pattern="^(last_order|total_spent|order_count|name)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all customers (both registered users and guest orders) - owner only"""
-    # Get registered customers
-    registered_customers = db.query(User).filter(
-        User.role == ModelUserRole.CUSTOMER
-    ).all()
-
-    # Get guest customers from orders (those without customer_id)
-    guest_orders = db.query(Order).filter(
-        Order.customer_id == None
-    ).all()
-
-    # Format registered customers
-    customers = []
-    for customer in registered_customers:
-        # Get customer's orders
-        orders = db.query(Order).filter(Order.customer_id == customer.id).all()
-        total_spent = sum(order.total for order in orders if order.status == ModelOrderStatus.COMPLETED)
-        last_order = max(orders, key=lambda o: o.created_at) if orders else None
-
-        customers.append({
-            "id": customer.id,
-            "type": "registered",
-            "name": f"{customer.first_name or ''} {customer.last_name or ''}".strip() or "Unknown",
-            "email": customer.email,
-            "phone": customer.phone,
-            "order_count": len(orders),
-            "total_spent": round(total_spent, 2),
-            "last_order_date": last_order.created_at if last_order else None,
-            "created_at": customer.created_at
+    """Get customers (both registered users and guest orders), paginated - owner only"""
+    try:
+        customers, next_cursor = list_customers(
+            db, search=search, customer_type=type, sort=sort,
+            descending=order == "desc", limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    response = {"customers": customers, "next_cursor": next_cursor}
+    if not cursor:
+        summary = customer_summary(db)
+        response.update({
+            "total_customers": summary["total_customers"],
+            "registered_count": summary["registered_count"],
+            "guest_count": summary["guest_count"],
         })
-
-    # Add guest customers (group by email or phone)
-    guest_customers_map = {}
-    for order in guest_orders:
-        key = order.customer_email or order.customer_phone
-        if key:
-            if key not in guest_customers_map:
-                guest_customers_map[key] = {
-                    "id": f"guest_{key}",
-                    "type": "guest",
-                    "name": order.customer_name,
-                    "email": order.customer_email,
-                    "phone": order.customer_phone,
-                    "order_count": 0,
-                    "total_spent": 0,
-                    "last_order_date": order.created_at,
-                    "created_at": order.created_at
-                }
-
-            guest_customers_map[key]["order_count"] += 1
-            if order.status == ModelOrderStatus.COMPLETED:
-                guest_customers_map[key]["total_spent"] += order.total
-            if order.created_at > guest_customers_map[key]["last_order_date"]:
-                guest_customers_map[key]["last_order_date"] = order.created_at
-
-    # Round total_spent for guests
-    for guest in guest_customers_map.values():
-        guest["total_spent"] = round(guest["total_spent"], 2)
-        customers.append(guest)
-
-    # Sort by last order date (most recent first)
-    customers.sort(key=lambda c: c["last_order_date"] if c["last_order_date"] else c["created_at"], reverse=True)
-
-    return {
-        "total_customers": len(customers),
-        "registered_count": len(registered_customers),
-        "guest_count": len(guest_customers_map),
-        "customers": customers
-    }
+    return response
 
 
 @router.delete("/admin/customers/{customer_id}")
 async def admin_delete_customer(
     customer_id: str,
-    db: Session = Depends(get_db)
+    hard: bool = False,
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_owner)
 ):
-    """Delete a customer and all their orders (owner only)"""
-    # Find customer
-    customer = db.query(User).filter(
-        User.id == customer_id,
-        User.role == ModelUserRole.CUSTOMER
-    ).first()
+    """
+    Deactivate a customer and cancel their orders (owner only). With hard,
+    delete the customer, their orders and status history instead; dry_run
+    only counts what a hard delete would remove.
+    """
+    if not hard:
+        if dry_run:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="dry_run applies to hard deletes only"
+            )
+        customer = db.query(User).filter(
+            User.id == customer_id,
+            User.role == ModelUserRole.CUSTOMER
+        ).first()
+
+        if not customer:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Customer not found"
+            )
+
+        # Mark all customer's orders as cancelled
+        orders = db.query(Order).filter(Order.customer_id == customer_id).all()
+        for order in orders:
+            order.status = ModelOrderStatus.CANCELLED
+
+        # Soft delete customer by marking inactive
+        customer.is_active = False
+
+        db.commit()
 
-    if not customer:
+        return {
+            "message": "Customer deleted successfully",
+            "customer_id": customer_id,
+            "orders_cancelled": len(orders)
+        }
+
+    result = delete_customers(db, [customer_id], dry_run=dry_run)
+    if not result["customers"]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Customer not found"
         )
 
-    # Mark all customer's orders as cancelled
-    orders = db.query(Order).filter(Order.customer_id == customer_id).all()
-    for order in orders:
-        order.status = ModelOrderStatus.CANCELLED
-
-    # Soft delete customer by marking inactive
-    customer.is_active = False
-
-    db.commit()
-
     return {
-        "message": "Customer deleted successfully",
+        "message": "Dry run - nothing was deleted" if dry_run else "Customer deleted successfully",
         "customer_id": customer_id,
-        "orders_cancelled": len(orders)
+        "orders_deleted": result["orders"],
+        "status_history_deleted": result["status_history"],
+        "dry_run": dry_run,
     }
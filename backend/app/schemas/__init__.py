@@ -19,6 +19,7 @@ from .user import (
     UserWithLocations,
     LocationAssignment,
     AssignUserToLocation,
+    CustomerBulkDelete,
 )
 from .location import (
     LocationType,
@@ -80,6 +81,7 @@ __all__ = [
     "UserWithLocations",
     "LocationAssignment",
     "AssignUserToLocation",
+    "CustomerBulkDelete",
     # Location
     "LocationType",
     "LocationCreate",
@@ -136,6 +136,11 @@ class AssignUserToLocation(BaseModel):
     role: LocationRole = LocationRole.STAFF
 
 
+class CustomerBulkDelete(BaseModel):
+    customer_ids: List[str] = Field(min_length=1, max_length=1000)
+    dry_run: bool = False
+
+
 # Update forward references
 LoginResponse.model_rebuild()
 UserWithLocations.model_rebuild()
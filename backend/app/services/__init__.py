@@ -9,6 +9,7 @@ from .auth_service import (
     decode_token,
     authenticate_user,
     get_user_locations,
+    get_location_assignments,
     can_access_location,
 )
 from .supabase_auth import (
@@ -21,6 +22,46 @@ from .supabase_auth import (
     sign_in_with_email,
     sign_up_with_email,
 )
+from .stripe_service import (
+    run_stripe,
+    shutdown_stripe_executor,
+)
+from .stripe_webhooks import (
+    record_stripe_event,
+    notify_stripe_event_received,
+    run_stripe_event_worker,
+)
+from .order_events import (
+    publish_order_deletes,
+    run_order_event_listener,
+    run_order_event_dispatcher,
+)
+from .customers import (
+    list_customers,
+    customer_summary,
+    refresh_customer_stats,
+)
+from .guests import (
+    normalize_email,
+    normalize_phone,
+    find_guests,
+    resolve_guest,
+    merge_guest_orders,
+)
+from .segments import (
+    SEGMENTS,
+    get_segments,
+    invalidate_segments,
+    segment_summary,
+    segment_customers,
+)
+from .customer_deletion import (
+    delete_customers,
+)
+from .exports import (
+    EXPORTS,
+    export_stream,
+)
 
 __all__ = [
     "verify_password",
@@ -30,6 +71,7 @@ __all__ = [
     "decode_token",
     "authenticate_user",
     "get_user_locations",
+    "get_location_assignments",
     "can_access_location",
     "get_supabase_client",
     "get_supabase_admin_client",
@@ -39,5 +81,29 @@ __all__ = [
     "refresh_supabase_session",
     "sign_in_with_email",
     "sign_up_with_email",
+    "run_stripe",
+    "shutdown_stripe_executor",
+    "record_stripe_event",
+    "notify_stripe_event_received",
+    "run_stripe_event_worker",
+    "publish_order_deletes",
+    "run_order_event_listener",
+    "run_order_event_dispatcher",
+    "list_customers",
+    "customer_summary",
+    "refresh_customer_stats",
+    "normalize_email",
+    "normalize_phone",
+    "find_guests",
+    "resolve_guest",
+    "merge_guest_orders",
+    "SEGMENTS",
+    "get_segments",
+    "invalidate_segments",
+    "segment_summary",
+    "segment_customers",
+    "delete_customers",
+    "EXPORTS",
+    "export_stream",
 ]
 
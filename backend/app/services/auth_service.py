@@ -9,7 +9,7 @@ import bcrypt
 from sqlalchemy.orm import Session
 
 from ..config import settings
-from ..models import User, UserRole, UserLocation
+from ..models import User, UserRole, UserLocation, Location
 from ..schemas import TokenData
 
 
@@ -108,6 +108,32 @@ def get_user_locations(db: Session, user_id: str) -> list:
     return [a.location_id for a in assignments]
 
 
+def get_location_assignments(db: Session, user_id: str) -> list:
+    """
+    A user's active location assignments with the location names, oldest
+    first, in one joined query:
+    [{location_id, location_name, role, assigned_at}]
+    """
+    rows = db.query(
+        UserLocation.location_id,
+        Location.name,
+        UserLocation.role,
+        UserLocation.assigned_at,
+    ).join(Location, Location.id == UserLocation.location_id).filter(
+        UserLocation.user_id == user_id,
+        UserLocation.is_active == True
+    ).order_by(UserLocation.assigned_at).all()
+    return [
+        {
+            "location_id": row.location_id,
+            "location_name": row.name,
+            "role": row.role.value,
+            "assigned_at": row.assigned_at,
+        }
+        for row in rows
+    ]
+
+
 def can_access_location(db: Session, user: User, location_id: str) -> bool:
     """Check if a user can access a specific location"""
     # Owner can access all locations
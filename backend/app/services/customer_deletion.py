@@ -0,0 +1,94 @@
+"""
+Mo's Burritos - Customer Deletion
+Removes customers with everything that identifies them: their orders (and
+the orders they placed as a guest before or after registering), those
+orders' status history, their guest identities and their customer_stats
+rows. Everything is done with set-based DELETEs in one transaction; orders
+are deleted in chunks so very large customers don't build huge statements.
+"""
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..models import CustomerStats, GuestCustomer, Order, OrderStatusHistory, User, UserLocation, UserRole
+from .customers import GUEST_PREFIX
+from .order_events import publish_order_deletes
+from .segments import invalidate_segments
+
+# Orders (with their status history) deleted per statement
+DELETE_CHUNK_SIZE = 1000
+
+
+def _customer_orders(customer_ids: List[str], guest_ids: List[str]):
+    match = Order.customer_id.in_(customer_ids)
+    if guest_ids:
+        match = or_(match, Order.guest_id.in_(guest_ids))
+    return match
+
+
+def delete_customers(db: Session, customer_ids: List[str], dry_run: bool = False,
+                     chunk_size: int = DELETE_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Delete these customers and commit, or with dry_run only count what
+    would be deleted. Ids that aren't customers are reported as not_found
+    and left alone.
+    """
+    customer_ids = list(dict.fromkeys(customer_ids))
+    found = db.execute(select(User.id).where(
+        User.id.in_(customer_ids),
+        User.role == UserRole.CUSTOMER,
+    )).scalars().all()
+    result: Dict[str, Any] = {
+        "customers": len(found),
+        "not_found": sorted(set(customer_ids) - set(found)),
+        "orders": 0,
+        "status_history": 0,
+        "guest_identities": 0,
+        "dry_run": dry_run,
+    }
+    if not found:
+        return result
+
+    guest_ids = db.execute(select(GuestCustomer.id).where(GuestCustomer.user_id.in_(found))).scalars().all()
+    orders = _customer_orders(found, guest_ids)
+    result["guest_identities"] = len(guest_ids)
+
+    if dry_run:
+        result["orders"] = db.execute(select(func.count()).select_from(Order).where(orders)).scalar()
+        result["status_history"] = db.execute(
+            select(func.count()).select_from(OrderStatusHistory)
+            .join(Order, Order.id == OrderStatusHistory.order_id)
+            .where(orders)
+        ).scalar()
+        return result
+
+    try:
+        while True:
+            chunk = db.execute(select(Order.id, Order.location_id).where(orders).limit(chunk_size)).all()
+            if not chunk:
+                break
+            order_ids = [row.id for row in chunk]
+            # Bulk deletes skip the change feed hook
+            publish_order_deletes(db, chunk)
+            result["status_history"] += db.execute(
+                delete(OrderStatusHistory).where(OrderStatusHistory.order_id.in_(order_ids))
+            ).rowcount
+            result["orders"] += db.execute(delete(Order).where(Order.id.in_(order_ids))).rowcount
+
+        # Status changes they made themselves (e.g. cancelling) stay, unattributed
+        db.execute(update(OrderStatusHistory).where(OrderStatusHistory.changed_by.in_(found)).values(changed_by=None))
+        db.execute(update(UserLocation).where(UserLocation.assigned_by.in_(found)).values(assigned_by=None))
+        db.execute(delete(UserLocation).where(UserLocation.user_id.in_(found)))
+        db.execute(delete(GuestCustomer).where(GuestCustomer.id.in_(guest_ids)))
+        # The stats hook only sees ORM deletes
+        db.execute(delete(CustomerStats).where(CustomerStats.customer_key.in_(
+            list(found) + [f"{GUEST_PREFIX}{guest_id}" for guest_id in guest_ids]
+        )))
+        db.execute(delete(User).where(User.id.in_(found)))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    invalidate_segments()
+    return result
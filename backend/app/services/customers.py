@@ -0,0 +1,479 @@
+"""
+Mo's Burritos - Customer Directory
+Per-customer order totals for the admin customer list. They are kept in the
+customer_stats table, which is adjusted in the same transaction whenever an
+order is created, changes status or total, or is deleted, so listing
+customers is a plain indexed read. rebuild_customer_stats() recomputes the
+table from the orders themselves.
+
+Registered customers are keyed by user id, guests by their guest_customers
+id (see guests.py).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import String, and_, case, delete, event, func, inspect, literal, or_, select, text, tuple_, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import CustomerStats, GuestCustomer, Order, User, UserRole, OrderStatus
+
+# Sort keys accepted by list_customers(); ties are broken by customer key
+CUSTOMER_SORTS = ("last_order", "total_spent", "order_count", "name")
+
+# Order columns that decide which customer an order counts towards and how much
+STATS_FIELDS = ("customer_id", "guest_id", "status", "total")
+
+# User columns copied into the stats row
+USER_FIELDS = ("first_name", "last_name", "email", "phone", "role")
+
+# customer_stats columns in the order _stats_rows() selects them
+STATS_COLUMNS = [
+    "customer_key", "customer_type", "name", "email", "phone", "order_count", "total_spent",
+    "last_order_date", "created_at", "last_activity_at", "updated_at",
+]
+
+stats = CustomerStats.__table__
+guests = GuestCustomer.__table__
+
+GUEST_PREFIX = "guest_"
+
+
+# ==================== Incremental maintenance ====================
+
+def _user_name(user: User) -> str:
+    return f"{user.first_name or ''} {user.last_name or ''}".strip()
+
+
+def _previous(obj, name: str):
+    """Value of an attribute as of the start of the flush"""
+    history = inspect(obj).attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.added:
+        return None
+    return getattr(obj, name)
+
+
+def _contribution(order: Order, previous: bool = False) -> Optional[Dict[str, Any]]:
+    """What one order adds to its customer's stats row, or None if it has no customer"""
+    value = (lambda name: _previous(order, name)) if previous else (lambda name: getattr(order, name))
+    customer_id = value("customer_id")
+    if customer_id:
+        key, customer_type = customer_id, "registered"
+    else:
+        guest_id = value("guest_id")
+        if not guest_id:
+            return None
+        key, customer_type = f"{GUEST_PREFIX}{guest_id}", "guest"
+
+    return {
+        "key": key,
+        "type": customer_type,
+        "spent": (value("total") or 0.0) if value("status") == OrderStatus.COMPLETED else 0.0,
+        "created_at": order.created_at,
+        "name": order.customer_name or "",
+    }
+
+
+# Load the previous values even when the attributes were expired by a commit,
+# so a changed order is subtracted from the right customer
+@event.listens_for(Order.customer_id, "set", active_history=True)
+@event.listens_for(Order.guest_id, "set", active_history=True)
+@event.listens_for(Order.status, "set", active_history=True)
+@event.listens_for(Order.total, "set", active_history=True)
+def _track_stats_fields(order, value, oldvalue, initiator):
+    return value
+
+
+class _StatsDeltas:
+    """Per-customer adjustments collected during one flush"""
+
+    def __init__(self):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.removed = set()  # keys that lost an order; their last order date is recomputed
+
+    def add(self, contribution: Optional[Dict[str, Any]], sign: int) -> None:
+        if contribution is None:
+            return
+        row = self.rows.setdefault(contribution["key"], {
+            "type": contribution["type"], "count": 0, "spent": 0.0, "last_order": None,
+            "name": "",
+        })
+        row["count"] += sign
+        row["spent"] += sign * contribution["spent"]
+        if sign > 0:
+            if row["last_order"] is None or contribution["created_at"] > row["last_order"]:
+                row["last_order"] = contribution["created_at"]
+            row["name"] = contribution["name"]
+
+    def move(self, previous: Optional[Dict[str, Any]], current: Optional[Dict[str, Any]]) -> None:
+        """An order whose contribution changed: subtract the old one, add the new one"""
+        self.add(previous, -1)
+        self.add(current, 1)
+        if previous is not None and (current is None or current["key"] != previous["key"]):
+            self.removed.add(previous["key"])
+
+
+def _apply_order_deltas(connection, deltas: _StatsDeltas) -> None:
+    now = datetime.utcnow()
+    for key, row in deltas.rows.items():
+        if row["count"] == 0 and row["spent"] == 0 and row["last_order"] is None:
+            continue
+
+        if row["type"] == "guest" and row["last_order"] is not None:
+            # First order from a new guest creates the row
+            guest = guests.c.id == key[len(GUEST_PREFIX):]
+            insert = pg_insert(stats).values(
+                customer_key=key,
+                customer_type="guest",
+                name=row["name"],
+                email=select(guests.c.email).where(guest).scalar_subquery(),
+                phone=select(guests.c.phone).where(guest).scalar_subquery(),
+                order_count=row["count"],
+                total_spent=row["spent"],
+                last_order_date=row["last_order"],
+                created_at=row["last_order"],
+                last_activity_at=row["last_order"],
+                updated_at=now,
+            )
+            connection.execute(insert.on_conflict_do_update(
+                index_elements=[stats.c.customer_key],
+                set_={
+                    "order_count": stats.c.order_count + insert.excluded.order_count,
+                    "total_spent": stats.c.total_spent + insert.excluded.total_spent,
+                    "last_order_date": func.greatest(stats.c.last_order_date, insert.excluded.last_order_date),
+                    "last_activity_at": func.greatest(stats.c.last_activity_at, insert.excluded.last_activity_at),
+                    # Same as max() in rebuild_customer_stats()
+                    "name": func.greatest(stats.c.name, insert.excluded.name),
+                    "email": insert.excluded.email,
+                    "phone": insert.excluded.phone,
+                    "updated_at": now,
+                },
+            ))
+            continue
+
+        # Registered customers get their row when they sign up (not staff ordering
+        # for themselves); guests that only lost orders already have one
+        last_order = func.greatest(stats.c.last_order_date, row["last_order"])
+        connection.execute(update(stats).where(stats.c.customer_key == key).values(
+            order_count=stats.c.order_count + row["count"],
+            total_spent=stats.c.total_spent + row["spent"],
+            last_order_date=last_order,
+            last_activity_at=func.coalesce(last_order, stats.c.created_at),
+            updated_at=now,
+        ))
+
+    if deltas.removed:
+        _refresh_last_order(connection, deltas.removed)
+
+
+def _refresh_last_order(connection, keys) -> None:
+    """
+    Last order date of customers that lost an order, which can't be derived
+    from the delta (one indexed max() each). Guests left without orders lose
+    their row.
+    """
+    guest_keys = []
+    for key in keys:
+        if key.startswith(GUEST_PREFIX):
+            guest_keys.append(key)
+            orders = and_(Order.guest_id == key[len(GUEST_PREFIX):], Order.customer_id.is_(None))
+        else:
+            orders = Order.customer_id == key
+        last_order = select(func.max(Order.created_at)).where(orders).scalar_subquery()
+        connection.execute(update(stats).where(stats.c.customer_key == key).values(
+            last_order_date=last_order,
+            last_activity_at=func.coalesce(last_order, stats.c.created_at),
+        ))
+    if guest_keys:
+        connection.execute(delete(stats).where(stats.c.customer_key.in_(guest_keys), stats.c.order_count <= 0))
+
+
+def _sync_user(connection, user: User) -> None:
+    if user.role != UserRole.CUSTOMER:
+        connection.execute(delete(stats).where(stats.c.customer_key == user.id))
+        return
+
+    created_at = user.created_at or datetime.utcnow()
+    insert = pg_insert(stats).values(
+        customer_key=user.id,
+        customer_type="registered",
+        name=_user_name(user),
+        email=user.email,
+        phone=user.phone,
+        order_count=0,
+        total_spent=0.0,
+        created_at=created_at,
+        last_activity_at=created_at,
+        updated_at=datetime.utcnow(),
+    )
+    connection.execute(insert.on_conflict_do_update(
+        index_elements=[stats.c.customer_key],
+        set_={
+            "name": insert.excluded.name,
+            "email": insert.excluded.email,
+            "phone": insert.excluded.phone,
+            "updated_at": insert.excluded.updated_at,
+        },
+    ))
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _update_customer_stats(session: Session, flush_context) -> None:
+    deltas = _StatsDeltas()
+    users = []
+    removed_users = []
+
+    for obj in session.new:
+        if isinstance(obj, Order):
+            deltas.add(_contribution(obj), 1)
+        elif isinstance(obj, User):
+            users.append(obj)
+    for obj in session.dirty:
+        state = inspect(obj)
+        if isinstance(obj, Order):
+            if any(state.attrs[name].history.has_changes() for name in STATS_FIELDS):
+                deltas.move(_contribution(obj, previous=True), _contribution(obj))
+        elif isinstance(obj, User):
+            if any(state.attrs[name].history.has_changes() for name in USER_FIELDS):
+                users.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Order):
+            deltas.move(_contribution(obj, previous=True), None)
+        elif isinstance(obj, User):
+            removed_users.append(obj.id)
+
+    if not (deltas.rows or users or removed_users):
+        return
+
+    connection = session.connection()
+    for user in users:
+        _sync_user(connection, user)
+    if removed_users:
+        connection.execute(delete(stats).where(stats.c.customer_key.in_(removed_users)))
+    _apply_order_deltas(connection, deltas)
+
+
+# ==================== Rebuild ====================
+
+def _completed_spend():
+    return func.coalesce(func.sum(case((Order.status == OrderStatus.COMPLETED, Order.total), else_=0.0)), 0.0)
+
+
+def _customers_from_orders(user_ids: Optional[List[str]] = None, guest_ids: Optional[List[str]] = None):
+    """
+    The stats table computed from scratch: one grouped query per customer
+    type. Given user_ids/guest_ids, only those customers are computed.
+    """
+    registered = select(
+        User.id.label("customer_key"),
+        literal("registered", String).label("customer_type"),
+        func.trim(func.coalesce(User.first_name, "") + " " + func.coalesce(User.last_name, "")).label("name"),
+        User.email.label("email"),
+        User.phone.label("phone"),
+        func.count(Order.id).label("order_count"),
+        _completed_spend().label("total_spent"),
+        func.max(Order.created_at).label("last_order_date"),
+        func.coalesce(User.created_at, func.now()).label("created_at"),
+    ).select_from(User).outerjoin(Order, Order.customer_id == User.id).where(
+        User.role == UserRole.CUSTOMER
+    ).group_by(User.id)
+
+    guest_orders = select(
+        (literal(GUEST_PREFIX, String) + GuestCustomer.id).label("customer_key"),
+        literal("guest", String).label("customer_type"),
+        func.coalesce(func.max(Order.customer_name), "").label("name"),
+        GuestCustomer.email.label("email"),
+        GuestCustomer.phone.label("phone"),
+        func.count(Order.id).label("order_count"),
+        _completed_spend().label("total_spent"),
+        func.max(Order.created_at).label("last_order_date"),
+        func.min(Order.created_at).label("created_at"),
+    ).select_from(GuestCustomer).join(Order, Order.guest_id == GuestCustomer.id).where(
+        Order.customer_id.is_(None)
+    ).group_by(GuestCustomer.id)
+
+    if user_ids is not None:
+        registered = registered.where(User.id.in_(user_ids))
+    if guest_ids is not None:
+        guest_orders = guest_orders.where(GuestCustomer.id.in_(guest_ids))
+    return union_all(registered, guest_orders).subquery("customers")
+
+
+def _stats_rows(customers):
+    """customer_stats columns selected from _customers_from_orders()"""
+    return select(
+        customers.c.customer_key,
+        customers.c.customer_type,
+        customers.c.name,
+        customers.c.email,
+        customers.c.phone,
+        customers.c.order_count,
+        customers.c.total_spent,
+        customers.c.last_order_date,
+        customers.c.created_at,
+        func.coalesce(customers.c.last_order_date, customers.c.created_at).label("last_activity_at"),
+        func.now().label("updated_at"),
+    )
+
+
+def refresh_customer_stats(connection, keys) -> None:
+    """
+    Recompute the stats rows of these customer keys from their orders, for
+    changes made without going through the ORM (bulk updates and deletes).
+    Guests left without orders and users who are no longer customers lose
+    their row.
+    """
+    keys = list(keys)
+    if not keys:
+        return
+    user_ids = [key for key in keys if not key.startswith(GUEST_PREFIX)]
+    guest_ids = [key[len(GUEST_PREFIX):] for key in keys if key.startswith(GUEST_PREFIX)]
+
+    rows = connection.execute(_stats_rows(_customers_from_orders(user_ids, guest_ids))).mappings().all()
+    connection.execute(delete(stats).where(
+        stats.c.customer_key.in_(keys),
+        stats.c.customer_key.notin_([row["customer_key"] for row in rows]),
+    ))
+    if not rows:
+        return
+    insert = pg_insert(stats).values([dict(row) for row in rows])
+    connection.execute(insert.on_conflict_do_update(
+        index_elements=[stats.c.customer_key],
+        set_={name: insert.excluded[name] for name in STATS_COLUMNS if name != "customer_key"},
+    ))
+
+
+def rebuild_customer_stats(db: Session) -> int:
+    """
+    Recompute every stats row from the orders table and commit. Order
+    writes that start meanwhile wait for the rebuild and then apply on top
+    of it. Returns the number of customers.
+    """
+    db.execute(text("LOCK TABLE customer_stats IN EXCLUSIVE MODE"))
+    db.execute(delete(stats))
+
+    db.execute(stats.insert().from_select(STATS_COLUMNS, _stats_rows(_customers_from_orders())))
+    count = db.execute(select(func.count()).select_from(stats)).scalar()
+    db.commit()
+    return count
+
+
+# ==================== Reads ====================
+
+def _sort_column(sort: str):
+    if sort == "total_spent":
+        return stats.c.total_spent
+    if sort == "order_count":
+        return stats.c.order_count
+    if sort == "name":
+        return stats.c.name
+    # Customers without orders sort by when they signed up
+    return stats.c.last_activity_at
+
+
+def encode_cursor(sort_value: Any, customer_key: str) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([sort_value, customer_key]).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, str]:
+    """Raises ValueError for a cursor that wasn't produced by encode_cursor()"""
+    try:
+        sort_value, customer_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if sort == "last_order":
+            sort_value = datetime.fromisoformat(sort_value)
+        elif sort in ("total_spent", "order_count"):
+            sort_value = float(sort_value)
+        else:
+            sort_value = str(sort_value)
+        return sort_value, str(customer_key)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def list_customers(
+    db: Session,
+    search: Optional[str] = None,
+    customer_type: Optional[str] = None,
+    sort: str = "last_order",
+    descending: bool = True,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of customers with their order count, completed spend and last
+    order date, plus the cursor for the next page (None on the last page).
+    Pages are keyed on (sort value, customer key), so deep pages cost the
+    same as the first.
+    """
+    if sort not in CUSTOMER_SORTS:
+        raise ValueError(f"Unsupported sort: {sort}")
+
+    sort_column = _sort_column(sort)
+    query = select(stats)
+
+    if customer_type:
+        query = query.where(stats.c.customer_type == customer_type)
+    if search:
+        # Match the search text literally, not as a LIKE pattern
+        term = search.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{term}%"
+        query = query.where(or_(
+            stats.c.name.ilike(pattern, escape="\\"),
+            stats.c.email.ilike(pattern, escape="\\"),
+            stats.c.phone.ilike(pattern, escape="\\"),
+        ))
+    if cursor:
+        after = tuple_(sort_column, stats.c.customer_key)
+        key = tuple_(*decode_cursor(cursor, sort))
+        query = query.where(after < key if descending else after > key)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), stats.c.customer_key.desc())
+    else:
+        query = query.order_by(sort_column.asc(), stats.c.customer_key.asc())
+
+    rows = db.execute(query.limit(limit + 1)).mappings().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][sort_column.name], rows[-1]["customer_key"])
+
+    return [
+        {
+            "id": row["customer_key"],
+            "type": row["customer_type"],
+            "name": row["name"] or "Unknown",
+            "email": row["email"],
+            "phone": row["phone"],
+            "order_count": row["order_count"],
+            "total_spent": round(row["total_spent"], 2),
+            "last_order_date": row["last_order_date"],
+            "created_at": row["created_at"],
+        }
+        for row in rows
+    ], next_cursor
+
+
+def customer_summary(db: Session) -> Dict[str, Any]:
+    """Customer counts and the order totals attributed to them"""
+    row = db.execute(select(
+        func.count().filter(stats.c.customer_type == "registered").label("registered_count"),
+        func.count().filter(stats.c.customer_type == "guest").label("guest_count"),
+        func.coalesce(func.sum(stats.c.order_count), 0).label("total_orders"),
+        func.coalesce(func.sum(stats.c.total_spent), 0.0).label("total_revenue"),
+    )).mappings().one()
+
+    return {
+        "total_customers": row["registered_count"] + row["guest_count"],
+        "registered_count": row["registered_count"],
+        "guest_count": row["guest_count"],
+        "total_orders": row["total_orders"],
+        "total_revenue": round(row["total_revenue"], 2),
+    }
@@ -0,0 +1,159 @@
+"""
+Mo's Burritos - Data Exports
+CSV / NDJSON exports of orders, order status history and customers. Rows
+are read through a server-side cursor and encoded in chunks as they arrive,
+so memory stays flat no matter how large the date range is.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from ..database import SessionLocal
+from ..models import CustomerStats, Order, OrderStatusHistory
+
+EXPORT_FORMATS = ("csv", "ndjson")
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_FETCH_SIZE = 2000
+
+# Encoded bytes buffered before a chunk is handed to the response
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+ORDER_COLUMNS = [
+    "order_id", "created_at", "location_id", "customer_id", "guest_id", "customer_name", "customer_email",
+    "customer_phone", "status", "payment_status", "payment_method", "subtotal", "tax", "total",
+    "item_id", "item_name", "price", "quantity", "line_total", "item_notes",
+]
+
+STATUS_HISTORY_COLUMNS = ["id", "order_id", "location_id", "status", "changed_by", "notes", "created_at"]
+
+CUSTOMER_COLUMNS = [
+    "customer_key", "customer_type", "name", "email", "phone", "order_count", "total_spent",
+    "last_order_date", "created_at",
+]
+
+
+def _value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "value"):  # Enums
+        return value.value
+    return value
+
+
+def _stream(query, to_rows: Callable[[Any], Iterable[Tuple]]) -> Iterator[Tuple]:
+    """
+    Rows of `query` from a server-side cursor on a session of its own (the
+    request's session is closed before the response body is streamed)
+    """
+    db = SessionLocal()
+    try:
+        for row in db.execute(query.execution_options(yield_per=EXPORT_FETCH_SIZE)):
+            yield from to_rows(row)
+    finally:
+        db.close()
+
+
+def _encode(columns: List[str], rows: Iterable[Tuple], fmt: str) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        write = lambda row: writer.writerow([_value(value) for value in row])
+    else:
+        write = lambda row: buffer.write(
+            json.dumps({column: _value(value) for column, value in zip(columns, row)}, default=str) + "\n"
+        )
+
+    for row in rows:
+        write(row)
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(columns: List[str], rows: Iterable[Tuple], fmt: str, compress: bool = False) -> Iterator[bytes]:
+    """Encoded (and optionally gzipped) body chunks for a StreamingResponse"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    chunks = _encode(columns, rows, fmt)
+    return _gzip(chunks) if compress else chunks
+
+
+def _order_item_rows(row) -> Iterator[Tuple]:
+    order = row[:-1]
+    items = row.items or [{}]  # Orders without items still get a row
+    for item in items:
+        price, quantity = item.get("price"), item.get("quantity")
+        line_total = round(price * quantity, 2) if price is not None and quantity is not None else None
+        yield order + (item.get("item_id"), item.get("name"), price, quantity, line_total, item.get("notes"))
+
+
+def export_orders(location_id: Optional[str] = None, start_date: Optional[datetime] = None,
+                  end_date: Optional[datetime] = None) -> Iterator[Tuple]:
+    """One row per order item, oldest first"""
+    query = select(
+        Order.id, Order.created_at, Order.location_id, Order.customer_id, Order.guest_id,
+        Order.customer_name, Order.customer_email, Order.customer_phone, Order.status,
+        Order.payment_status, Order.payment_method, Order.subtotal, Order.tax, Order.total,
+        Order.items,
+    ).order_by(Order.created_at, Order.id)
+    if location_id:
+        query = query.where(Order.location_id == location_id)
+    if start_date:
+        query = query.where(Order.created_at >= start_date)
+    if end_date:
+        query = query.where(Order.created_at < end_date)
+    return _stream(query, _order_item_rows)
+
+
+def export_status_history(location_id: Optional[str] = None, start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None) -> Iterator[Tuple]:
+    """Every order status change, oldest first"""
+    query = select(
+        OrderStatusHistory.id, OrderStatusHistory.order_id, Order.location_id, OrderStatusHistory.status,
+        OrderStatusHistory.changed_by, OrderStatusHistory.notes, OrderStatusHistory.created_at,
+    ).join(Order, Order.id == OrderStatusHistory.order_id).order_by(
+        OrderStatusHistory.created_at, OrderStatusHistory.id
+    )
+    if location_id:
+        query = query.where(Order.location_id == location_id)
+    if start_date:
+        query = query.where(OrderStatusHistory.created_at >= start_date)
+    if end_date:
+        query = query.where(OrderStatusHistory.created_at < end_date)
+    return _stream(query, lambda row: (tuple(row),))
+
+
+def export_customers(customer_type: Optional[str] = None) -> Iterator[Tuple]:
+    """Every customer with their order totals (from customer_stats)"""
+    query = select(*(getattr(CustomerStats, column) for column in CUSTOMER_COLUMNS)).order_by(
+        CustomerStats.customer_key
+    )
+    if customer_type:
+        query = query.where(CustomerStats.customer_type == customer_type)
+    return _stream(query, lambda row: (tuple(row),))
+
+
+EXPORTS: Dict[str, Tuple[List[str], Callable[..., Iterator[Tuple]]]] = {
+    "orders": (ORDER_COLUMNS, export_orders),
+    "status-history": (STATUS_HISTORY_COLUMNS, export_status_history),
+    "customers": (CUSTOMER_COLUMNS, export_customers),
+}
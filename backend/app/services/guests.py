@@ -0,0 +1,126 @@
+"""
+Mo's Burritos - Guest Customer Identity
+Guest orders are linked to a guest_customers row found by normalized e-mail
+or phone, so a guest's history is an indexed lookup. A registered customer
+can claim the orders of guests with an e-mail or phone they have verified
+with Supabase (confirmed e-mail, OTP-verified phone); nothing is merged on
+sign-up, since the e-mail and phone given there are unverified.
+"""
+import re
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..models import GuestCustomer, Order, User
+from .customers import GUEST_PREFIX, refresh_customer_stats
+from .segments import invalidate_segments
+
+guests = GuestCustomer.__table__
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    email = (email or "").strip().lower()
+    return email or None
+
+
+def normalize_phone(phone: Optional[str], default_country_code: str = "1") -> Optional[str]:
+    """
+    E.164 form of a phone number: "(555) 123-4567" -> "+15551234567".
+    Numbers without a country code are taken to be North American.
+    """
+    phone = (phone or "").strip()
+    digits = re.sub(r"\D", "", phone)
+    if len(digits) < 7:
+        return None
+    if phone.startswith("+"):
+        return f"+{digits}"
+    if phone.startswith("00"):
+        return f"+{digits[2:]}"
+    if len(digits) == 10:
+        return f"+{default_country_code}{digits}"
+    return f"+{digits}"
+
+
+def _identity_match(email: Optional[str], phone: Optional[str]):
+    conditions = []
+    if email:
+        conditions.append(guests.c.email == email)
+    if phone:
+        conditions.append(guests.c.phone == phone)
+    return or_(*conditions)
+
+
+def find_guests(db, email: Optional[str] = None, phone: Optional[str] = None) -> List[GuestCustomer]:
+    """Guests matching an e-mail or phone (at most one of each)"""
+    email, phone = normalize_email(email), normalize_phone(phone)
+    if not (email or phone):
+        return []
+    return db.query(GuestCustomer).filter(_identity_match(email, phone)).all()
+
+
+def resolve_guest(db: Session, name: Optional[str], email: Optional[str], phone: Optional[str]) -> Optional[str]:
+    """
+    Id of the guest identified by this e-mail/phone, created if needed.
+    A match on e-mail wins over a match on phone; a missing e-mail or phone
+    is filled in on the matched guest when no other guest has it.
+    """
+    email, phone = normalize_email(email), normalize_phone(phone)
+    if not (email or phone):
+        return None
+
+    connection = db.connection()
+    # Concurrent orders from a new guest: one insert wins, the others match it
+    connection.execute(pg_insert(guests).values(
+        id=str(uuid.uuid4()), email=email, phone=phone, name=name, created_at=datetime.utcnow(),
+    ).on_conflict_do_nothing())
+
+    matches = connection.execute(select(guests).where(_identity_match(email, phone))).mappings().all()
+    by_email = next((m for m in matches if email and m["email"] == email), None)
+    by_phone = next((m for m in matches if phone and m["phone"] == phone), None)
+    guest = by_email or by_phone
+
+    if guest is by_email and phone and guest["phone"] is None and by_phone is None:
+        connection.execute(update(guests).where(guests.c.id == guest["id"]).values(phone=phone))
+    elif guest is by_phone and email and guest["email"] is None and by_email is None:
+        connection.execute(update(guests).where(guests.c.id == guest["id"]).values(email=email))
+    return guest["id"]
+
+
+def merge_guest_orders(db: Session, user: User, email: Optional[str] = None,
+                       phone: Optional[str] = None) -> List[str]:
+    """
+    Move the orders of unclaimed guests with this e-mail or phone onto the
+    user, mark those guests as the user's and commit. Only pass identities
+    the user has verified. Returns the merged guest ids.
+    """
+    email, phone = normalize_email(email), normalize_phone(phone)
+    if not (email or phone):
+        return []
+
+    connection = db.connection()
+    guest_ids = connection.execute(select(guests.c.id).where(
+        guests.c.user_id.is_(None),
+        _identity_match(email, phone),
+    )).scalars().all()
+    if not guest_ids:
+        return []
+
+    try:
+        connection.execute(update(Order.__table__).where(
+            Order.guest_id.in_(guest_ids),
+            Order.customer_id.is_(None),
+        ).values(customer_id=user.id))
+        connection.execute(update(guests).where(guests.c.id.in_(guest_ids)).values(user_id=user.id))
+        # Bulk updates skip the stats hook
+        refresh_customer_stats(connection, [user.id] + [f"{GUEST_PREFIX}{guest_id}" for guest_id in guest_ids])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    # Orders changed customer without going through the change feed
+    invalidate_segments()
+    return guest_ids
@@ -0,0 +1,427 @@
+"""
+Mo's Burritos - Order Change Feed
+Every flushed order insert/update/delete is written to the order_events
+outbox inside the same transaction, so it exists only if the write commits,
+and survives restarts until it has been delivered. Each event carries the
+order as it was at that write. A NOTIFY on commit wakes the dispatcher,
+which drains the outbox in order to Socket.IO.
+
+Outbox ids are allocated at insert time, so a transaction holding a lower id
+can commit after a higher id was already delivered. The "seq" clients see
+is therefore drawn when an event is dispatched, under the dispatch lock, so
+it only ever grows in the order events actually go out.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..config import settings
+from ..database import SessionLocal, pg_listen
+from ..models import (
+    Location,
+    Order,
+    OrderEvent,
+    OrderEventStatus,
+    PaymentStatus as ModelPaymentStatus,
+)
+from ..socket_manager import (
+    serialize_order,
+    serialize_order_delta,
+    merge_order_deltas,
+    emit_new_order,
+    emit_order_paid,
+    emit_order_status_update,
+    emit_order_updates,
+    emit_order_deleted,
+)
+
+logger = logging.getLogger(__name__)
+
+# Order columns whose changes are worth pushing to clients
+WATCHED_FIELDS = (
+    "status",
+    "payment_status",
+    "items",
+    "total",
+    "notes",
+    "estimated_time",
+    "estimated_completion",
+    "completed_at",
+)
+
+# Advisory lock held while a batch is claimed. A claimed batch is leased
+# (dispatched_at set, still pending) and no other batch is claimed until it is
+# finished or the lease runs out, so only one process emits at a time and every
+# room sees its events in seq order - without a transaction open during emits.
+DISPATCH_LOCK_KEY = 7_041_933
+
+# Set whenever a NOTIFY says new events were committed
+_wakeup = asyncio.Event()
+_last_prune = 0.0
+
+
+def _snapshot(session: Session, order: Order) -> Dict[str, Any]:
+    """The order as it stands in this flush, for the event's payload"""
+    if order.location_id and "location" not in inspect(order).dict:
+        # Relationships of just-inserted orders aren't lazy loaded during the flush
+        set_committed_value(order, "location", session.get(Location, order.location_id))
+    return serialize_order(order)
+
+
+def _order_change(op: str, order, fields: Optional[List[str]] = None, paid: bool = False,
+                  snapshot: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    change = {"op": op, "id": order.id, "location_id": order.location_id}
+    if fields:
+        change["fields"] = fields
+    if paid:
+        change["paid"] = True
+    if snapshot is not None:
+        change["order"] = snapshot
+    return change
+
+
+def _changed_fields(order: Order) -> List[str]:
+    state = inspect(order)
+    return [name for name in WATCHED_FIELDS if state.attrs[name].history.has_changes()]
+
+
+def _became_paid(order: Order) -> bool:
+    history = inspect(order).attrs.payment_status.history
+    return (
+        bool(history.added) and history.added[0] == ModelPaymentStatus.PAID
+        and not (history.deleted and history.deleted[0] == ModelPaymentStatus.PAID)
+    )
+
+
+# Load the previous payment status even when the attribute was expired by a
+# commit, so re-marking a paid order as paid is not seen as a new payment
+@event.listens_for(Order.payment_status, "set", active_history=True)
+def _track_payment_status(order, value, oldvalue, initiator):
+    return value
+
+
+def publish_order_changes(db: Session, changes: Iterable[Dict[str, Any]]) -> None:
+    """
+    Write outbox rows and a wakeup NOTIFY on the session's current
+    transaction. Both are discarded if it rolls back.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+
+    now = datetime.utcnow()
+    connection = db.connection()
+    connection.execute(OrderEvent.__table__.insert(), [
+        {
+            "order_id": change["id"],
+            "location_id": change["location_id"],
+            "op": change["op"],
+            "payload": change,
+            "status": OrderEventStatus.PENDING,
+            "attempts": 0,
+            "created_at": now,
+        }
+        for change in changes
+    ])
+    connection.execute(text("SELECT pg_notify(:channel, '')"), {"channel": settings.order_events_channel})
+
+
+def publish_order_deletes(db: Session, orders: Iterable[Order]) -> None:
+    """Publish deletes done with bulk query.delete(), which bypasses the flush hook"""
+    publish_order_changes(db, [_order_change("delete", order) for order in orders])
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _publish_flushed_orders(session: Session, flush_context) -> None:
+    changes = []
+    for order in session.new:
+        if isinstance(order, Order):
+            changes.append(_order_change("insert", order, snapshot=_snapshot(session, order)))
+    for order in session.dirty:
+        if isinstance(order, Order) and session.is_modified(order, include_collections=False):
+            fields = _changed_fields(order)
+            if fields:
+                changes.append(_order_change(
+                    "update", order, fields, paid=_became_paid(order), snapshot=_snapshot(session, order)
+                ))
+    for order in session.deleted:
+        if isinstance(order, Order):
+            changes.append(_order_change("delete", order))
+
+    if changes:
+        publish_order_changes(session, changes)
+
+
+def _next_seqs(db: Session, count: int) -> List[int]:
+    """
+    `count` new client-facing sequence numbers. They come from the outbox id
+    sequence, so they are above every id handed out so far (and every seq
+    sent before), and clients' last seen seqs stay valid across deploys.
+    """
+    return sorted(db.execute(
+        text("SELECT nextval(pg_get_serial_sequence('order_events', 'id')) FROM generate_series(1, :count)"),
+        {"count": count},
+    ).scalars().all())
+
+
+def claim_order_events(db: Session, limit: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Lease up to `limit` pending events, oldest first, each with the seq it
+    goes out under and the order as it was when the event was written, and
+    commit. Returns None when another process holds the lock or a leased
+    batch is still being emitted; finish_order_events() ends the lease.
+    """
+    if not db.execute(select(func.pg_try_advisory_xact_lock(DISPATCH_LOCK_KEY))).scalar():
+        db.rollback()
+        return None
+
+    now = datetime.utcnow()
+    in_flight = db.query(OrderEvent.id).filter(
+        OrderEvent.status == OrderEventStatus.PENDING,
+        OrderEvent.dispatched_at >= now - timedelta(seconds=settings.order_event_lease_seconds),
+    ).first()
+    if in_flight:
+        db.rollback()
+        return None
+
+    events = db.query(OrderEvent).filter(
+        OrderEvent.status == OrderEventStatus.PENDING
+    ).order_by(OrderEvent.id).limit(limit).all()
+    if not events:
+        db.rollback()
+        return []
+
+    # Events written before snapshots were stored in the payload
+    legacy_ids = {e.order_id for e in events if e.op != "delete" and "order" not in e.payload}
+    orders = {}
+    if legacy_ids:
+        for order in db.query(Order).options(joinedload(Order.location)).filter(Order.id.in_(legacy_ids)):
+            orders[order.id] = serialize_order(order)
+
+    batch = []
+    for seq, e in zip(_next_seqs(db, len(events)), events):
+        change = dict(e.payload)
+        snapshot = change.pop("order", None) or orders.get(e.order_id)
+        batch.append({"id": e.id, "seq": seq, "change": change, "order": snapshot})
+
+    db.query(OrderEvent).filter(OrderEvent.id.in_([e.id for e in events])).update(
+        {OrderEvent.dispatched_at: now}, synchronize_session=False
+    )
+    db.commit()
+    return batch
+
+
+def finish_order_events(db: Session, claimed: List[int], sent: List[int], failed: Dict[int, str]) -> None:
+    """
+    Record the outcome of a leased batch (by outbox id) and end the lease.
+    Claimed events that weren't sent go back to pending.
+    """
+    global _last_prune
+    now = datetime.utcnow()
+
+    sent_ids = set(sent)
+    retry = [event_id for event_id in claimed if event_id not in sent_ids]
+    if retry:
+        db.query(OrderEvent).filter(OrderEvent.id.in_(retry)).update(
+            {OrderEvent.dispatched_at: None}, synchronize_session=False
+        )
+
+    if sent:
+        db.query(OrderEvent).filter(OrderEvent.id.in_(sent)).update({
+            OrderEvent.status: OrderEventStatus.SENT,
+            OrderEvent.attempts: OrderEvent.attempts + 1,
+            OrderEvent.dispatched_at: now,
+        }, synchronize_session=False)
+
+    for event_id, error in failed.items():
+        event = db.get(OrderEvent, event_id)
+        event.attempts += 1
+        event.last_error = error
+        if event.attempts >= settings.order_event_max_attempts:
+            event.status = OrderEventStatus.FAILED
+
+    # Delivered events are only kept for a while
+    if time.monotonic() - _last_prune > 3600:
+        cutoff = now - timedelta(hours=settings.order_event_retention_hours)
+        db.query(OrderEvent).filter(
+            OrderEvent.status == OrderEventStatus.SENT,
+            OrderEvent.dispatched_at < cutoff
+        ).delete(synchronize_session=False)
+        _last_prune = time.monotonic()
+
+    db.commit()
+
+
+async def dispatch_order_event(seq: int, change: Dict[str, Any], order_data: Optional[Dict[str, Any]]) -> None:
+    """
+    Emit one outbox event; raises if the emit could not be published.
+    New orders go to the kitchen as full snapshots, later changes as deltas.
+    Payloads carry the dispatch "seq" so clients can ask for a replay of
+    what they missed after a reconnect.
+    """
+    order_id = change["id"]
+    location_id = change["location_id"]
+
+    if change["op"] == "delete":
+        await emit_order_deleted(location_id, order_id, seq)
+        return
+    if order_data is None:
+        return  # Order is gone; its delete event follows
+
+    order_data = {**order_data, "seq": seq}
+    if change["op"] == "insert":
+        await emit_new_order(location_id, order_data)
+        return
+
+    delta = serialize_order_delta(order_data, change.get("fields", ()), seq)
+    if change.get("paid"):
+        await emit_order_paid(location_id, order_id, order_data, delta)
+    else:
+        await emit_order_status_update(location_id, order_id, delta)
+
+
+class _PendingDeltas:
+    """
+    Status deltas held back during one dispatcher pass, per room. Repeated
+    updates to the same order collapse into one delta, and each room gets a
+    single emit when it is flushed.
+    """
+
+    def __init__(self):
+        self.rooms: Dict[str, Dict[str, Tuple[Dict[str, Any], List[int]]]] = {}
+
+    def add(self, room: str, delta: Dict[str, Any], seq: int) -> None:
+        room_deltas = self.rooms.setdefault(room, {})
+        queued = room_deltas.get(delta["order_id"])
+        if queued:
+            room_deltas[delta["order_id"]] = (merge_order_deltas(queued[0], delta), queued[1] + [seq])
+        else:
+            room_deltas[delta["order_id"]] = (delta, [seq])
+
+    def pop(self, room: str, blocked: Dict[str, int]) -> List[Tuple[Dict[str, Any], List[int]]]:
+        # Deltas from before an order's failed event still go out
+        entries = [
+            entry for order_id, entry in self.rooms.pop(room, {}).items()
+            if order_id not in blocked or max(entry[1]) < blocked[order_id]
+        ]
+        # Clients drop anything at or below the last seq they saw, so keep seq order
+        return sorted(entries, key=lambda entry: entry[0]["seq"])
+
+
+async def drain_order_events(limit: int) -> int:
+    """
+    Dispatch one leased batch; no transaction is open while it is emitted.
+    Status deltas are coalesced per room and flushed right before any other
+    event for that room, so every room still sees its events in seq order.
+    A failed emit holds back that event and the rest of its order's events
+    until it is retried; the order's earlier events count as sent. Returns
+    the number of events done.
+    """
+    db = SessionLocal()
+    try:
+        batch = await asyncio.to_thread(claim_order_events, db, limit)
+        if not batch:
+            return 0
+
+        claimed = [item["id"] for item in batch]
+        try:
+            failed = {}
+            blocked: Dict[str, int] = {}  # order id -> seq of its first failed event
+            pending = _PendingDeltas()
+
+            def block(order_id: str, seq: int) -> None:
+                blocked[order_id] = min(seq, blocked.get(order_id, seq))
+
+            async def flush(room: str) -> None:
+                entries = pending.pop(room, blocked)
+                if not entries:
+                    return
+                try:
+                    await emit_order_updates(room, [delta for delta, _ in entries])
+                except Exception as e:
+                    logger.warning("Order updates emit failed", extra={"room": room, "error": str(e)})
+                    for delta, seqs in entries:
+                        block(delta["order_id"], min(seqs))
+                        failed.update({seq: str(e) for seq in seqs})
+
+            for item in batch:
+                seq, change, order_data = item["seq"], item["change"], item["order"]
+                order_id = change["id"]
+                if order_id in blocked:
+                    continue
+                rooms = (f"order:{order_id}", f"kitchen:{change['location_id']}")
+
+                if change["op"] == "update" and not change.get("paid"):
+                    if order_data is not None:
+                        delta = serialize_order_delta(order_data, change.get("fields", ()), seq)
+                        for room in rooms:
+                            pending.add(room, delta, seq)
+                    continue
+
+                for room in rooms:
+                    await flush(room)
+                if order_id in blocked:
+                    continue
+                try:
+                    await dispatch_order_event(seq, change, order_data)
+                except Exception as e:
+                    failed[seq] = str(e)
+                    block(order_id, seq)
+                    logger.warning("Order event emit failed", extra={"seq": seq, "order_id": order_id, "error": str(e)})
+
+            for room in list(pending.rooms):
+                await flush(room)
+        except BaseException:
+            # End the lease so the batch goes out again right away
+            await asyncio.to_thread(finish_order_events, db, claimed, [], {})
+            raise
+
+        # Blocked orders keep their failed and later events for the next pass (under new seqs)
+        event_ids = {item["seq"]: item["id"] for item in batch}
+        done = [
+            item["id"] for item in batch
+            if item["change"]["id"] not in blocked or item["seq"] < blocked[item["change"]["id"]]
+        ]
+        failed = {event_ids[seq]: error for seq, error in failed.items()}
+        await asyncio.to_thread(finish_order_events, db, claimed, done, failed)
+        return len(done)
+    finally:
+        await asyncio.to_thread(db.close)
+
+
+async def run_order_event_listener() -> None:
+    """Background task: wake the dispatcher on every committed order change"""
+    async for _ in pg_listen(settings.order_events_channel):
+        _wakeup.set()
+
+
+async def run_order_event_dispatcher() -> None:
+    """Background task started in the app lifespan"""
+    batch_size = settings.order_event_batch_size
+    while True:
+        _wakeup.clear()
+        try:
+            delivered = await drain_order_events(batch_size)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Order event dispatcher error")
+            delivered = 0
+
+        # A full batch means more may be waiting - keep draining
+        if delivered >= batch_size:
+            continue
+
+        try:
+            await asyncio.wait_for(_wakeup.wait(), settings.order_event_poll_seconds)
+        except asyncio.TimeoutError:
+            continue
+
+        # Let a burst of commits land so their updates share one emit per room
+        await asyncio.sleep(settings.socketio_coalesce_ms / 1000)
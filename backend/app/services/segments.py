@@ -0,0 +1,206 @@
+"""
+Mo's Burritos - Customer Segments
+Recency / frequency / monetary (RFM) scores for every customer, for the
+marketing and loyalty pages. Per-customer order totals are streamed as column
+arrays and scored with NumPy, and the result is cached until the order change feed moves on
+(or RFM_CACHE_SECONDS pass, since recency changes with time alone). Bulk
+writes that move orders between customers without going through the feed
+call invalidate_segments().
+
+Scores run 1-5 (5 = best) by quintile over all customers:
+    recency    time since the last non-cancelled order
+    frequency  number of non-cancelled orders
+    monetary   completed spend
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import Float, case, cast, func, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import CustomerStats, Order, OrderEvent, OrderStatus
+
+# Customers fetched per round trip
+FETCH_SIZE = 20_000
+
+SECONDS_PER_DAY = 86400.0
+
+# (name, description), in the order segments are reported
+SEGMENTS = [
+    ("champions", "Ordered recently, order often and spend the most"),
+    ("loyal", "Order often"),
+    ("potential_loyalists", "Recent customers with a few orders"),
+    ("new", "First order was recent"),
+    ("needs_attention", "Average recency and frequency"),
+    ("at_risk", "Used to order often, but not lately"),
+    ("hibernating", "Few orders, none lately"),
+]
+
+_cache_lock = threading.Lock()
+_cache: Dict[str, Any] = {"version": None, "computed_at": 0.0, "result": None}
+
+
+def _customer_columns(db: Session) -> Dict[str, np.ndarray]:
+    """
+    Customer key, last order time, order count and completed spend as
+    column arrays, fetched in one streaming query. Orders are reduced per
+    customer in the database, so only one row per customer crosses the wire.
+    """
+    customer_key = func.coalesce(Order.customer_id, "guest_" + Order.guest_id)
+    completed_spend = func.sum(case((Order.status == OrderStatus.COMPLETED, Order.total), else_=0.0))
+    query = select(
+        customer_key,
+        cast(func.extract("epoch", func.max(Order.created_at)), Float),
+        func.count(Order.id),
+        func.coalesce(completed_spend, 0.0),
+    ).where(
+        Order.status != OrderStatus.CANCELLED,
+        customer_key.isnot(None),
+    ).group_by(customer_key).execution_options(yield_per=FETCH_SIZE)
+
+    chunks = [list(zip(*rows)) for rows in db.execute(query).partitions()]
+    if not chunks:
+        return {
+            "keys": np.empty(0, dtype=object),
+            "last_order": np.empty(0),
+            "frequency": np.empty(0, np.int64),
+            "monetary": np.empty(0),
+        }
+    return {
+        "keys": np.concatenate([np.array(chunk[0], dtype=object) for chunk in chunks]),
+        "last_order": np.concatenate([np.array(chunk[1], dtype=np.float64) for chunk in chunks]),
+        "frequency": np.concatenate([np.array(chunk[2], dtype=np.int64) for chunk in chunks]),
+        "monetary": np.concatenate([np.array(chunk[3], dtype=np.float64) for chunk in chunks]),
+    }
+
+
+def _quintile_scores(values: np.ndarray) -> np.ndarray:
+    """1-5 by quintile of `values` (higher is better); equal values get equal scores"""
+    if not len(values):
+        return np.empty(0, np.int8)
+    edges = np.quantile(values, [0.2, 0.4, 0.6, 0.8])
+    return (np.searchsorted(edges, values, side="left") + 1).astype(np.int8)
+
+
+def _segment_codes(r: np.ndarray, f: np.ndarray) -> np.ndarray:
+    """Index into SEGMENTS for each customer, from recency and frequency scores"""
+    conditions = [
+        (r >= 4) & (f >= 4),
+        f >= 4,
+        (r >= 4) & (f >= 2),
+        r >= 4,
+        r >= 3,
+        (r <= 2) & (f >= 3),
+    ]
+    return np.select(conditions, np.arange(len(conditions)), default=len(SEGMENTS) - 1).astype(np.int8)
+
+
+def compute_segments(db: Session, now: Optional[float] = None) -> Dict[str, Any]:
+    """RFM scores and segment for every customer with a non-cancelled order"""
+    now = time.time() if now is None else now
+    columns = _customer_columns(db)
+    last_order, frequency, monetary = columns["last_order"], columns["frequency"], columns["monetary"]
+
+    r = _quintile_scores(last_order)
+    f = _quintile_scores(frequency.astype(np.float64))
+    m = _quintile_scores(monetary)
+    segment = _segment_codes(r, f)
+
+    return {
+        "keys": columns["keys"],
+        "recency_days": (now - last_order) / SECONDS_PER_DAY,
+        "frequency": frequency,
+        "monetary": monetary,
+        "r": r,
+        "f": f,
+        "m": m,
+        "segment": segment,
+        "computed_at": now,
+    }
+
+
+def _orders_version(db: Session) -> Optional[int]:
+    """Latest order change feed sequence number; moves on every order write"""
+    return db.execute(select(func.max(OrderEvent.id))).scalar()
+
+
+def invalidate_segments() -> None:
+    """
+    Drop this process's cached scores, after bulk writes the change feed
+    doesn't see (other workers catch up within RFM_CACHE_SECONDS)
+    """
+    with _cache_lock:
+        _cache.update(version=None, computed_at=0.0, result=None)
+
+
+def get_segments(db: Session) -> Dict[str, Any]:
+    """compute_segments(), cached until orders change or RFM_CACHE_SECONDS pass"""
+    version = _orders_version(db)
+    with _cache_lock:
+        fresh = time.monotonic() - _cache["computed_at"] < settings.rfm_cache_seconds
+        if _cache["result"] is not None and fresh and _cache["version"] == version:
+            return _cache["result"]
+
+        result = compute_segments(db)
+        _cache.update(version=version, computed_at=time.monotonic(), result=result)
+        return result
+
+
+def segment_summary(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Customer count, average scores and spend per segment"""
+    counts = np.bincount(result["segment"], minlength=len(SEGMENTS))
+    spend = np.bincount(result["segment"], weights=result["monetary"], minlength=len(SEGMENTS))
+    summary = []
+    for index, (name, description) in enumerate(SEGMENTS):
+        members = result["segment"] == index
+        count = int(counts[index])
+        summary.append({
+            "segment": name,
+            "description": description,
+            "customer_count": count,
+            "total_spent": round(float(spend[index]), 2),
+            "avg_recency_days": round(float(result["recency_days"][members].mean()), 1) if count else None,
+            "avg_frequency": round(float(result["frequency"][members].mean()), 2) if count else None,
+            "avg_monetary": round(float(spend[index] / count), 2) if count else None,
+        })
+    return summary
+
+
+def segment_customers(db: Session, result: Dict[str, Any], segment: Optional[str] = None,
+                      limit: int = 100) -> List[Dict[str, Any]]:
+    """Highest-spending customers with their scores, optionally within one segment"""
+    names = [name for name, _ in SEGMENTS]
+    if segment is not None and segment not in names:
+        raise ValueError(f"Unknown segment: {segment}")
+
+    indexes = np.arange(len(result["keys"]))
+    if segment is not None:
+        indexes = indexes[result["segment"] == names.index(segment)]
+    top = indexes[np.argsort(-result["monetary"][indexes], kind="stable")[:limit]]
+
+    keys = [result["keys"][i] for i in top]
+    profiles = {
+        row.customer_key: row for row in db.query(CustomerStats).filter(CustomerStats.customer_key.in_(keys))
+    } if keys else {}
+
+    customers = []
+    for i, key in zip(top, keys):
+        profile = profiles.get(key)
+        customers.append({
+            "id": key,
+            "type": "guest" if key.startswith("guest_") else "registered",
+            "name": profile.name if profile else "",
+            "email": profile.email if profile else None,
+            "phone": profile.phone if profile else None,
+            "segment": names[result["segment"][i]],
+            "r": int(result["r"][i]),
+            "f": int(result["f"][i]),
+            "m": int(result["m"][i]),
+            "recency_days": round(float(result["recency_days"][i]), 1),
+            "frequency": int(result["frequency"][i]),
+            "monetary": round(float(result["monetary"][i]), 2),
+        })
+    return customers
@@ -0,0 +1,68 @@
+"""
+Mo's Burritos - Stripe Service
+Runs blocking Stripe SDK calls on a dedicated, bounded thread pool so a slow
+Stripe response never stalls the event loop (order tracking, kitchen sockets)
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+import stripe
+
+from ..config import settings
+from ..tracing import CLIENT, start_span
+
+# Initialize Stripe
+stripe.api_key = settings.stripe_secret_key
+stripe.max_network_retries = settings.stripe_max_network_retries
+if settings.stripe_api_base:
+    stripe.api_base = settings.stripe_api_base
+
+# RequestsClient keeps one requests.Session per thread, so every executor
+# worker holds its own keep-alive connection pool to api.stripe.com
+stripe.default_http_client = stripe.RequestsClient(timeout=settings.stripe_timeout_seconds)
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.stripe_max_workers,
+    thread_name_prefix="stripe",
+)
+
+
+async def run_stripe(
+    func: Callable[..., Any],
+    *args: Any,
+    timeout: Optional[float] = None,
+    **kwargs: Any,
+) -> Any:
+    """
+    Run a blocking Stripe SDK call in the Stripe executor and await the result.
+
+    `timeout` bounds the whole call including time spent waiting for a free
+    worker; it defaults to the HTTP timeout plus headroom for retries.
+    Timeouts surface as stripe.error.APIConnectionError so callers can keep
+    handling them with their existing StripeError branches.
+
+    A timeout only stops the wait: the worker thread keeps running and the
+    request may still succeed at Stripe. Calls that create anything should
+    pass an `idempotency_key` so a retry returns the original object instead
+    of creating a second one.
+    """
+    loop = asyncio.get_running_loop()
+    call = partial(func, *args, **kwargs)
+    if timeout is None:
+        timeout = settings.stripe_timeout_seconds * (stripe.max_network_retries + 1)
+
+    operation = getattr(func, "__qualname__", repr(func))
+    with start_span(f"stripe {operation}", CLIENT, {"peer.service": "stripe"}, root=True):
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(_executor, call), timeout)
+        except asyncio.TimeoutError:
+            raise stripe.error.APIConnectionError(
+                f"Stripe request timed out after {timeout:.0f}s"
+            )
+
+
+def shutdown_stripe_executor() -> None:
+    """Stop accepting Stripe calls and release the worker threads"""
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,158 @@
+"""
+Mo's Burritos - Stripe Webhook Processing
+The webhook route only verifies and stores events; this worker applies them
+to orders outside the request so Stripe gets its 200 immediately. Kitchen and
+customer sockets hear about the changes through the order change feed.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import (
+    Order,
+    StripeEvent,
+    StripeEventStatus,
+    OrderStatus as ModelOrderStatus,
+    PaymentStatus as ModelPaymentStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+# Set by the webhook route whenever a new event is stored
+_wakeup = asyncio.Event()
+
+
+def record_stripe_event(db: Session, event: Dict[str, Any]) -> bool:
+    """
+    Persist a verified webhook event keyed by its Stripe event id.
+    Returns False when the event was already stored (a Stripe redelivery).
+    """
+    stmt = pg_insert(StripeEvent).values(
+        id=event["id"],
+        type=event["type"],
+        payload=event,
+        status=StripeEventStatus.PENDING,
+        attempts=0,
+        received_at=datetime.utcnow(),
+    ).on_conflict_do_nothing(index_elements=["id"])
+
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount > 0
+
+
+def notify_stripe_event_received() -> None:
+    """Wake the worker so a new event is applied without waiting for the next poll"""
+    _wakeup.set()
+
+
+def apply_stripe_event(db: Session, event_type: str, data: Dict[str, Any]) -> Optional[Order]:
+    """
+    Apply a single Stripe event to its order.
+    Returns the order if its payment status changed, otherwise None.
+    """
+    if event_type == "checkout.session.completed":
+        # Find order by stripe session ID
+        order = db.query(Order).filter(Order.stripe_session_id == data["id"]).first()
+        if order and order.payment_status != ModelPaymentStatus.PAID:
+            # Update order status to confirmed and paid
+            order.payment_status = ModelPaymentStatus.PAID
+            order.status = ModelOrderStatus.CONFIRMED
+            order.payment_intent_id = data.get("payment_intent")
+            logger.info("Order confirmed via webhook", extra={"order_id": order.id, "location_id": order.location_id})
+            return order
+        return None
+
+    if event_type == "payment_intent.succeeded":
+        # Find order by payment intent ID
+        order = db.query(Order).filter(Order.payment_intent_id == data["id"]).first()
+        if order and order.payment_status != ModelPaymentStatus.PAID:
+            order.payment_status = ModelPaymentStatus.PAID
+            order.status = ModelOrderStatus.CONFIRMED
+            logger.info("Order confirmed via webhook", extra={"order_id": order.id, "location_id": order.location_id})
+            return order
+        return None
+
+    if event_type == "payment_intent.payment_failed":
+        # Find order by payment intent ID
+        order = db.query(Order).filter(Order.payment_intent_id == data["id"]).first()
+        if order and order.payment_status != ModelPaymentStatus.FAILED:
+            order.payment_status = ModelPaymentStatus.FAILED
+            logger.info("Order payment failed", extra={"order_id": order.id})
+            return order
+        return None
+
+    return None
+
+
+def process_pending_stripe_events(limit: int) -> int:
+    """
+    Apply up to `limit` pending events, oldest first. Each event commits in
+    its own transaction; rows are claimed with SKIP LOCKED so several
+    workers (one per process) never apply the same event twice.
+    Returns the number of events claimed.
+    """
+    db = SessionLocal()
+    claimed = 0
+    failed_ids = []  # Retried on the next pass, not immediately
+    try:
+        while claimed < limit:
+            event = db.query(StripeEvent).filter(
+                StripeEvent.status == StripeEventStatus.PENDING,
+                StripeEvent.id.notin_(failed_ids)
+            ).order_by(StripeEvent.received_at).with_for_update(skip_locked=True).first()
+
+            if not event:
+                break
+            claimed += 1
+            event_id = event.id
+
+            try:
+                apply_stripe_event(db, event.type, event.payload["data"]["object"])
+                event.status = StripeEventStatus.PROCESSED
+                event.processed_at = datetime.utcnow()
+                event.attempts += 1
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                failed_ids.append(event_id)
+                event = db.query(StripeEvent).filter(StripeEvent.id == event_id).first()
+                event.attempts += 1
+                event.last_error = str(e)
+                if event.attempts >= settings.stripe_event_max_attempts:
+                    event.status = StripeEventStatus.FAILED
+                db.commit()
+                logger.warning("Stripe event failed", extra={"event_id": event.id, "attempts": event.attempts, "error": str(e)})
+    finally:
+        db.close()
+
+    return claimed
+
+
+async def run_stripe_event_worker() -> None:
+    """Background task started in the app lifespan"""
+    batch_size = settings.stripe_event_batch_size
+    while True:
+        _wakeup.clear()
+        try:
+            claimed = await asyncio.to_thread(process_pending_stripe_events, batch_size)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Stripe event worker error")
+            claimed = 0
+
+        # A full batch means more may be waiting - keep draining
+        if claimed >= batch_size:
+            continue
+
+        try:
+            await asyncio.wait_for(_wakeup.wait(), settings.stripe_event_poll_seconds)
+        except asyncio.TimeoutError:
+            pass
@@ -3,10 +3,16 @@ Mo's Burritos - Supabase Authentication Service
 Phone OTP authentication using Supabase Auth
 """
 from typing import Optional, Dict, Any
+import logging
 import httpx
 from supabase import create_client, Client
 
 from ..config import settings
+from ..tracing import traced
+
+logger = logging.getLogger(__name__)
+
+SPAN_ATTRIBUTES = {"peer.service": "supabase"}
 
 
 def get_supabase_client() -> Client:
@@ -23,6 +29,7 @@ def get_supabase_admin_client() -> Client:
     return create_client(settings.supabase_url, settings.supabase_service_key)
 
 
+@traced("supabase auth.sign_in_with_otp", attributes=SPAN_ATTRIBUTES)
 async def send_phone_otp(phone: str) -> Dict[str, Any]:
     """
     Send OTP code to phone number via Supabase Auth
@@ -39,6 +46,7 @@ async def send_phone_otp(phone: str) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+@traced("supabase auth.verify_otp", attributes=SPAN_ATTRIBUTES)
 async def verify_phone_otp(phone: str, code: str) -> Dict[str, Any]:
     """
     Verify OTP code and get session
@@ -74,6 +82,7 @@ async def verify_phone_otp(phone: str, code: str) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+@traced("supabase auth.get_user", attributes=SPAN_ATTRIBUTES)
 async def get_supabase_user_from_token(access_token: str) -> Optional[Dict[str, Any]]:
     """
     Validate Supabase JWT and get user info
@@ -89,6 +98,8 @@ async def get_supabase_user_from_token(access_token: str) -> Optional[Dict[str,
                 "id": response.user.id,
                 "phone": response.user.phone,
                 "email": response.user.email,
+                "email_confirmed": bool(response.user.email_confirmed_at),
+                "phone_confirmed": bool(response.user.phone_confirmed_at),
                 "created_at": str(response.user.created_at) if response.user.created_at else None,
             }
         return None
@@ -97,6 +108,7 @@ async def get_supabase_user_from_token(access_token: str) -> Optional[Dict[str,
         return None
 
 
+@traced("supabase auth.refresh_session", attributes=SPAN_ATTRIBUTES)
 async def refresh_supabase_session(refresh_token: str) -> Dict[str, Any]:
     """Refresh Supabase session using refresh token"""
     supabase = get_supabase_client()
@@ -124,6 +136,7 @@ async def refresh_supabase_session(refresh_token: str) -> Dict[str, Any]:
         return {"success": False, "error": str(e)}
 
 
+@traced("supabase auth.sign_up", attributes=SPAN_ATTRIBUTES)
 async def sign_up_with_email(email: str, password: str, user_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Sign up new user with email and password
@@ -131,9 +144,8 @@ async def sign_up_with_email(email: str, password: str, user_metadata: Optional[
     supabase = get_supabase_client()
 
     try:
-        print(f"[SUPABASE] Attempting signup for: {email}")
-        print(f"[SUPABASE] Metadata: {user_metadata}")
-        
+        logger.debug("Attempting Supabase signup", extra={"email": email})
+
         response = supabase.auth.sign_up({
             "email": email,
             "password": password,
@@ -142,17 +154,13 @@ async def sign_up_with_email(email: str, password: str, user_metadata: Optional[
             }
         })
 
-        print(f"[SUPABASE] Response received")
-        print(f"[SUPABASE] Has session: {response.session is not None}")
-        print(f"[SUPABASE] Has user: {response.user is not None}")
-        
-        if response.user:
-            print(f"[SUPABASE] User ID: {response.user.id}")
-            print(f"[SUPABASE] User email: {response.user.email}")
-            print(f"[SUPABASE] Email confirmed: {getattr(response.user, 'email_confirmed_at', 'N/A')}")
+        logger.debug("Supabase signup response", extra={
+            "email": email,
+            "has_session": response.session is not None,
+            "user_id": response.user.id if response.user else None,
+        })
 
         if response.session:
-            print(f"[SUPABASE] Session created successfully")
             return {
                 "success": True,
                 "session": {
@@ -168,22 +176,22 @@ async def sign_up_with_email(email: str, password: str, user_metadata: Optional[
             }
         elif response.user:
             # User was created but no session (email confirmation required)
-            print(f"[SUPABASE] User created but no session - email confirmation likely required")
+            logger.info("Supabase user created without session - email confirmation required", extra={"user_id": response.user.id})
             return {
                 "success": False, 
                 "error": "Email confirmation required. User created in Supabase but needs to confirm email.",
                 "user_id": response.user.id
             }
         else:
-            print(f"[SUPABASE] No session and no user returned")
+            logger.warning("Supabase signup returned no session and no user", extra={"email": email})
             return {"success": False, "error": "Failed to create account - no user returned"}
 
     except Exception as e:
-        print(f"[SUPABASE] Exception during signup: {str(e)}")
-        print(f"[SUPABASE] Exception type: {type(e).__name__}")
+        logger.warning("Supabase signup failed: %s", e, extra={"email": email, "error_type": type(e).__name__})
         return {"success": False, "error": str(e)}
 
 
+@traced("supabase auth.sign_in_with_password", attributes=SPAN_ATTRIBUTES)
 async def sign_in_with_email(email: str, password: str) -> Dict[str, Any]:
     """
     Sign in user with email and password
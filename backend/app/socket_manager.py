@@ -2,50 +2,300 @@
 Mo's Burritos - Socket.IO Manager for Real-Time Updates
 Handles WebSocket connections for order status updates and kitchen notifications
 """
+import asyncio
+import time
+import uuid
+from collections import deque
 import socketio
 from .config import settings
+from .database import SessionLocal
+from .models import Order, User, UserLocation, UserRole
+from .socket_queue import create_client_manager
+from .logging_config import sampled
+from .metrics import EMIT_LATENCY, register_socketio_gauges
+from .tracing import PRODUCER, start_span
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Log CORS configuration
-logger.info(f"Socket.IO CORS origins: {settings.cors_origins_list}")
+logger.info("Socket.IO CORS origins: %s", settings.cors_origins_list)
 
 # Create Socket.IO AsyncServer
 # Use '*' for all origins in development, specific origins in production
 cors_origins = settings.cors_origins_list if settings.cors_origins != '*' else '*'
 
-sio = socketio.AsyncServer(
+# Rooms are shared across workers when SOCKETIO_MESSAGE_QUEUE is set
+client_manager = create_client_manager()
+logger.info("Socket.IO client manager: %s", type(client_manager).__name__)
+
+# Deltas a slow client can skip: it is told to reload over REST instead.
+# Matched on the encoded packet, so nothing is parsed on the send path.
+DROPPABLE_EVENTS = ("order_status_updated", "order_updates")
+_DROPPABLE_PREFIXES = tuple(f'{socketio.packet.EVENT}["{event}"' for event in DROPPABLE_EVENTS)
+
+
+# Private python-socketio methods BackpressureServer overrides. The version is
+# pinned in requirements.txt; a release without them fails at startup instead
+# of silently losing backpressure.
+_SERVER_HOOKS = ("_send_eio_packet", "_send_packet", "_handle_eio_disconnect")
+
+
+def _packet_size(pkt) -> int:
+    data = pkt.data if pkt is not None else None
+    return len(data) if isinstance(data, (str, bytes)) else 0
+
+
+class _ByteCountingQueue(asyncio.Queue):
+    """Engine.IO send queue that keeps a running total of the bytes waiting in it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.queued_bytes = 0
+
+    def put_nowait(self, item):
+        super().put_nowait(item)
+        self.queued_bytes += _packet_size(item)
+
+    def get_nowait(self):
+        item = super().get_nowait()
+        self.queued_bytes -= _packet_size(item)
+        return item
+
+
+class _Backlog:
+    """Send-side state for a client whose outbound queue is not empty"""
+    __slots__ = ("queued_at", "dropped", "watcher")
+
+    def __init__(self):
+        self.queued_at = deque()  # enqueue times of packets that may still be waiting
+        self.dropped = 0
+        self.watcher = None
+
+
+class BackpressureServer(socketio.AsyncServer):
+    """
+    AsyncServer that watches each client's Engine.IO send queue. A client
+    is slow when too many packets are waiting or the oldest has waited too
+    long; slow clients skip order deltas (and get one `resync_needed` once
+    they catch up), and are disconnected when their queue outgrows the
+    memory budget or stops draining, so one tablet on bad Wi-Fi cannot grow
+    the worker without bound.
+    """
+
+    def __init__(self, *args, **kwargs):
+        missing = [name for name in _SERVER_HOOKS if not callable(getattr(socketio.AsyncServer, name, None))]
+        if missing:
+            raise RuntimeError(
+                f"python-socketio lacks {', '.join(missing)}; "
+                "BackpressureServer needs the version pinned in requirements.txt"
+            )
+        super().__init__(*args, **kwargs)
+        self.backlogs = {}  # eio_sid -> _Backlog
+        # Every client's send queue is created through this public factory
+        self.eio.create_queue = _ByteCountingQueue
+
+    def client_backlog_stats(self) -> dict:
+        """Queue depth and oldest-packet age per backlogged client"""
+        now = time.monotonic()
+        stats = {}
+        for eio_sid, backlog in self.backlogs.items():
+            socket = self.eio.sockets.get(eio_sid)
+            if socket is not None:
+                stats[eio_sid] = {
+                    "depth": socket.queue.qsize(),
+                    "latency": now - backlog.queued_at[0] if backlog.queued_at else 0.0,
+                    "dropped": backlog.dropped,
+                }
+        return stats
+
+    async def emit(self, event, *args, **kwargs):
+        started = time.perf_counter()
+        target = kwargs.get("to", kwargs.get("room"))
+        try:
+            with start_span(f"socketio.emit {event}", PRODUCER, {
+                "messaging.system": "socketio",
+                "messaging.destination.name": target if isinstance(target, str) else None,
+                "socketio.rooms": len(target) if isinstance(target, (list, tuple)) else None,
+            }, root=True):
+                return await super().emit(event, *args, **kwargs)
+        finally:
+            EMIT_LATENCY.observe(time.perf_counter() - started, event)
+
+    async def _send_eio_packet(self, eio_sid, eio_pkt):
+        socket = self.eio.sockets.get(eio_sid)
+        depth = socket.queue.qsize() if socket is not None else 0
+        backlog = self.backlogs.get(eio_sid)
+        if backlog is None:
+            if depth == 0:
+                return await super()._send_eio_packet(eio_sid, eio_pkt)
+            backlog = self.backlogs[eio_sid] = _Backlog()
+
+        # The queue is FIFO, so only the newest `depth` packets can still be waiting
+        queued_at = backlog.queued_at
+        while len(queued_at) > depth:
+            queued_at.popleft()
+
+        now = time.monotonic()
+        if depth >= settings.socketio_slow_queue_depth or (
+            queued_at and now - queued_at[0] >= settings.socketio_slow_send_seconds
+        ):
+            if isinstance(eio_pkt.data, str) and eio_pkt.data.startswith(_DROPPABLE_PREFIXES):
+                backlog.dropped += 1
+                if backlog.watcher is None:
+                    logger.warning("Slow Socket.IO client, dropping order deltas", extra={"eio_sid": eio_sid, "depth": depth})
+                    backlog.watcher = asyncio.create_task(self._watch_slow_client(eio_sid, backlog))
+                return
+            if socket.queue.queued_bytes > settings.socketio_max_queue_bytes:
+                await self._drop_slow_client(eio_sid, "memory budget exceeded")
+                return
+
+        if depth == 0 and backlog.watcher is None:
+            del self.backlogs[eio_sid]
+        else:
+            queued_at.append(now)
+
+        await super()._send_eio_packet(eio_sid, eio_pkt)
+
+    async def _watch_slow_client(self, eio_sid, backlog: _Backlog) -> None:
+        """Wait for a slow client to catch up, or disconnect it if it doesn't"""
+        try:
+            while True:
+                await asyncio.sleep(0.5)
+                socket = self.eio.sockets.get(eio_sid)
+                if socket is None or socket.closed:
+                    return
+                if socket.queue.qsize() == 0:
+                    break
+                if backlog.queued_at and time.monotonic() - backlog.queued_at[0] >= settings.socketio_max_send_seconds:
+                    await self._drop_slow_client(eio_sid, "send queue stalled")
+                    return
+
+            logger.info("Slow Socket.IO client caught up", extra={"eio_sid": eio_sid, "dropped": backlog.dropped})
+            await self._send_packet(eio_sid, self.packet_class(
+                socketio.packet.EVENT, data=["resync_needed", {"dropped": backlog.dropped}]))
+        finally:
+            if self.backlogs.get(eio_sid) is backlog:
+                del self.backlogs[eio_sid]
+
+    async def _drop_slow_client(self, eio_sid, reason: str) -> None:
+        socket = self.eio.sockets.get(eio_sid)
+        if socket is None:
+            return
+        logger.warning("Disconnecting slow Socket.IO client: %s", reason,
+                       extra={"eio_sid": eio_sid, "depth": socket.queue.qsize()})
+        # Don't wait for a client that isn't reading; free what it never got
+        await socket.close(wait=False, abort=True, reason=self.eio.reason.SERVER_DISCONNECT)
+        while not socket.queue.empty():
+            socket.queue.get_nowait()
+            socket.queue.task_done()
+        socket.queue.put_nowait(None)  # stops the writer task
+        self.eio.sockets.pop(eio_sid, None)
+        self.backlogs.pop(eio_sid, None)
+
+    async def _handle_eio_disconnect(self, eio_sid, reason):
+        backlog = self.backlogs.pop(eio_sid, None)
+        if backlog is not None and backlog.watcher not in (None, asyncio.current_task()):
+            backlog.watcher.cancel()
+        await super()._handle_eio_disconnect(eio_sid, reason)
+
+
+sio = BackpressureServer(
     async_mode='asgi',
+    client_manager=client_manager,
     cors_allowed_origins=cors_origins,
     ping_timeout=60,
     ping_interval=25,
-    logger=True,
-    engineio_logger=True,
-    always_connect=True  # Always accept connections, handle auth in events
+    # Packet-level logging costs real CPU at our message rates - opt in only
+    logger=settings.socketio_packet_logging,
+    engineio_logger=settings.socketio_packet_logging,
 )
 
+register_socketio_gauges(sio)
+
 # Create ASGI app (will be used to wrap FastAPI app)
 socket_app = socketio.ASGIApp(sio)
 
 
+# Roles that may join kitchen rooms (owners for every location)
+KITCHEN_ROLES = {UserRole.OWNER.value, UserRole.MANAGER.value, UserRole.STAFF.value}
+
+
+def load_socket_identity(supabase_id: str):
+    """Role and assigned locations for a Supabase user, or None if unknown/disabled"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.supabase_id == supabase_id).first()
+        if not user or not user.is_active:
+            return None
+        location_ids = [row.location_id for row in db.query(UserLocation.location_id).filter(
+            UserLocation.user_id == user.id,
+            UserLocation.is_active == True
+        )]
+        return {'user_id': user.id, 'role': user.role.value, 'location_ids': set(location_ids)}
+    finally:
+        db.close()
+
+
 @sio.event
 async def connect(sid, environ, auth):
-    """Handle client connection"""
-    # Log connection details for debugging
+    """
+    Handle client connection. A Supabase access token in `auth` is validated
+    once here and the user's role and location assignments are cached in the
+    socket session, so room joins are authorized without touching the
+    database. Connections without a token are accepted as anonymous (guest
+    order tracking); assignment changes apply from the next connect.
+    """
+    # Imported here: app.services imports this module for the order change feed
+    from .services import get_supabase_user_from_token
+
+    token = auth.get('token') if isinstance(auth, dict) else None
+    identity = {'user_id': None, 'role': None, 'location_ids': set()}
+
+    if token:
+        supabase_user = await get_supabase_user_from_token(token)
+        if not supabase_user:
+            logger.info("Socket.IO connection refused: invalid token", extra={"sid": sid})
+            raise socketio.exceptions.ConnectionRefusedError('authentication failed')
+        identity = await asyncio.to_thread(load_socket_identity, supabase_user['id'])
+        if identity is None:
+            logger.info("Socket.IO connection refused: unknown or disabled user", extra={"sid": sid})
+            raise socketio.exceptions.ConnectionRefusedError('authentication failed')
+
+    identity['order_rooms'] = set()
+    await sio.save_session(sid, identity)
     origin = environ.get('HTTP_ORIGIN', 'unknown')
-    logger.info(f"Client connected: {sid} from origin: {origin}")
-    print(f"[Socket.IO] Client connected: {sid} from origin: {origin}")
-    return True
+    logger.debug("Client connected", extra=sampled(sid=sid, origin=origin, role=identity['role']))
 
 
 @sio.event
 async def disconnect(sid):
     """Handle client disconnection"""
-    logger.info(f"Client disconnected: {sid}")
-    print(f"[Socket.IO] Client disconnected: {sid}")
+    logger.debug("Client disconnected", extra=sampled(sid=sid))
+
+
+async def replay_missed_events(sid, room: str, since_seq) -> dict:
+    """
+    Re-send events the client missed while disconnected. `complete` is False
+    when the buffer no longer reaches back to `since_seq` and the client
+    should reload over REST.
+    """
+    if since_seq is None:
+        # First join - nothing to replay, just hand back the current position
+        _, _, latest = client_manager.replay(room, 0)
+        return {'seq': latest, 'replayed': 0, 'complete': True}
+
+    try:
+        since_seq = int(since_seq)
+    except (TypeError, ValueError):
+        return {'seq': None, 'replayed': 0, 'complete': False}
+
+    events, complete, latest = client_manager.replay(room, since_seq)
+    for seq, event, payload in events:
+        await sio.emit(event, payload, to=sid, ignore_queue=True)
+    if events:
+        logger.info("Replayed missed events", extra={"sid": sid, "room": room, "since_seq": since_seq, "count": len(events)})
+    return {'seq': latest, 'replayed': len(events), 'complete': complete}
 
 
 @sio.event
@@ -54,30 +304,46 @@ async def join_order_room(sid, data):
     Customer joins a specific order room to receive real-time updates
 
     Args:
-        data: dict with 'order_id' key
+        data: dict with 'order_id' key and optional 'since_seq' (last seq
+            received) to replay events missed while disconnected
     """
     try:
         order_id = data.get('order_id')
         if not order_id:
-            logger.warning(f"join_order_room called without order_id by {sid}")
+            logger.warning("join_order_room called without order_id", extra={"sid": sid})
             return {'success': False, 'error': 'order_id required'}
 
+        # Order ids are random UUIDs that only the customer and staff know,
+        # like GET /orders/{id}; reject anything else so clients can't open
+        # arbitrary rooms, and cap the rooms per connection
+        try:
+            uuid.UUID(str(order_id))
+        except ValueError:
+            return {'success': False, 'error': 'invalid order_id'}
+
         room = f"order:{order_id}"
+        async with sio.session(sid) as session:
+            order_rooms = session['order_rooms']
+            if room not in order_rooms and len(order_rooms) >= settings.socketio_max_order_rooms:
+                return {'success': False, 'error': 'too many order rooms'}
+            order_rooms.add(room)
 
-        # Use await for AsyncServer compatibility
         await sio.enter_room(sid, room)
+        logger.debug("Client joined room", extra=sampled(sid=sid, room=room))
 
-        logger.info(f"Client {sid} joined order room: {room}")
-        print(f"[Socket.IO] Client {sid} joined order room: {room}")
+        replay = await replay_missed_events(sid, room, data.get('since_seq'))
 
-        # Get list of rooms client is in for debugging
-        rooms = sio.rooms(sid)
-        print(f"[Socket.IO] Client {sid} is now in rooms: {rooms}")
+        # Deltas only make sense on top of a full order, so send one on the
+        # first join and whenever the replay could not cover the gap
+        if data.get('since_seq') is None or not replay['complete']:
+            order_data = await asyncio.to_thread(load_order_snapshot, order_id)
+            if order_data:
+                await emit_order_snapshot(sid, {**order_data, "seq": replay['seq']})
+                replay['complete'] = True
 
-        return {'success': True, 'room': room}
+        return {'success': True, 'room': room, **replay}
     except Exception as e:
-        logger.error(f"Error joining order room: {e}")
-        print(f"[Socket.IO] Error joining order room: {e}")
+        logger.exception("Error joining order room", extra={"sid": sid})
         return {'success': False, 'error': str(e)}
 
 
@@ -96,11 +362,13 @@ async def leave_order_room(sid, data):
 
         room = f"order:{order_id}"
         await sio.leave_room(sid, room)
-        logger.info(f"Client {sid} left order room: {room}")
+        async with sio.session(sid) as session:
+            session['order_rooms'].discard(room)
+        logger.debug("Client left room", extra=sampled(sid=sid, room=room))
 
         return {'success': True, 'room': room}
     except Exception as e:
-        logger.error(f"Error leaving order room: {e}")
+        logger.exception("Error leaving order room", extra={"sid": sid})
         return {'success': False, 'error': str(e)}
 
 
@@ -110,27 +378,30 @@ async def join_kitchen_room(sid, data):
     Kitchen staff joins location-specific room for new order notifications
 
     Args:
-        data: dict with 'location_id' key
+        data: dict with 'location_id' key and optional 'since_seq' (last seq
+            received) to replay events missed while disconnected
     """
     try:
         location_id = data.get('location_id')
         if not location_id:
-            logger.warning(f"join_kitchen_room called without location_id by {sid}")
+            logger.warning("join_kitchen_room called without location_id", extra={"sid": sid})
             return {'success': False, 'error': 'location_id required'}
 
+        session = await sio.get_session(sid)
+        if session['role'] not in KITCHEN_ROLES or (
+            session['role'] != UserRole.OWNER.value and location_id not in session['location_ids']
+        ):
+            logger.info("Kitchen room join denied", extra={"sid": sid, "user_id": session['user_id'], "location_id": location_id})
+            return {'success': False, 'error': 'not authorized for this location'}
+
         room = f"kitchen:{location_id}"
         await sio.enter_room(sid, room)
-        logger.info(f"Client {sid} joined kitchen room: {room}")
-        print(f"[Socket.IO] Client {sid} joined kitchen room: {room}")
+        logger.debug("Client joined room", extra=sampled(sid=sid, room=room))
 
-        # Get list of rooms client is in for debugging
-        rooms = sio.rooms(sid)
-        print(f"[Socket.IO] Client {sid} is now in rooms: {rooms}")
-
-        return {'success': True, 'room': room}
+        replay = await replay_missed_events(sid, room, data.get('since_seq'))
+        return {'success': True, 'room': room, **replay}
     except Exception as e:
-        logger.error(f"Error joining kitchen room: {e}")
-        print(f"[Socket.IO] Error joining kitchen room: {e}")
+        logger.exception("Error joining kitchen room", extra={"sid": sid})
         return {'success': False, 'error': str(e)}
 
 
@@ -149,36 +420,118 @@ async def leave_kitchen_room(sid, data):
 
         room = f"kitchen:{location_id}"
         await sio.leave_room(sid, room)
-        logger.info(f"Client {sid} left kitchen room: {room}")
+        logger.debug("Client left room", extra=sampled(sid=sid, room=room))
 
         return {'success': True, 'room': room}
     except Exception as e:
-        logger.error(f"Error leaving kitchen room: {e}")
+        logger.exception("Error leaving kitchen room", extra={"sid": sid})
         return {'success': False, 'error': str(e)}
 
 
 # Helper functions for emitting events
 
-async def emit_order_status_update(order_id: str, order_data: dict):
+def serialize_order(order) -> dict:
+    """Build the full order snapshot sent to the kitchen and on room join"""
+    location = order.location
+    return {
+        "id": order.id,
+        "location_id": order.location_id,
+        "status": order.status.value,
+        "payment_status": order.payment_status.value if order.payment_status else None,
+        "payment_method": order.payment_method.value if order.payment_method else None,
+        "customer_name": order.customer_name,
+        "customer_email": order.customer_email,
+        "customer_phone": order.customer_phone,
+        "items": order.items,
+        "subtotal": float(order.subtotal),
+        "tax": float(order.tax),
+        "total": float(order.total),
+        "location": {
+            "id": location.id,
+            "name": location.name,
+            "address": location.address,
+            "phone": location.phone
+        } if location else None,
+        "created_at": order.created_at.isoformat() if order.created_at else None,
+        "updated_at": order.updated_at.isoformat() if order.updated_at else None,
+        "estimated_time": order.estimated_time,
+        "estimated_completion": order.estimated_completion.isoformat() if order.estimated_completion else None,
+        "completed_at": order.completed_at.isoformat() if order.completed_at else None,
+        "notes": order.notes
+    }
+
+
+# Contact details only go to the kitchen; order rooms are open to anyone
+# holding the order id
+CONTACT_FIELDS = ("customer_email", "customer_phone")
+
+
+def public_order(order_data: dict) -> dict:
+    """An order snapshot without the customer's contact details, for order rooms"""
+    return {key: value for key, value in order_data.items() if key not in CONTACT_FIELDS}
+
+
+def serialize_order_delta(order_data: dict, fields, seq: int) -> dict:
     """
-    Emit order status update to all clients in the order's room
+    Build the compact order_status_updated payload: the fields that changed,
+    taken from a snapshot built by serialize_order. It goes to order rooms
+    too, so contact fields are never included.
+    """
+    return {
+        "order_id": order_data["id"],
+        "location_id": order_data["location_id"],
+        "seq": seq,
+        "status": order_data["status"],
+        "updated_at": order_data["updated_at"],
+        "changes": {field: order_data.get(field) for field in fields if field not in CONTACT_FIELDS},
+    }
+
+
+def merge_order_deltas(older: dict, newer: dict) -> dict:
+    """Collapse two deltas for the same order into one carrying the newer seq"""
+    return {**newer, "changes": {**older["changes"], **newer["changes"]}}
+
+
+def load_order_snapshot(order_id: str):
+    """Read an order's current snapshot (runs in a worker thread)"""
+    db = SessionLocal()
+    try:
+        order = db.query(Order).filter(Order.id == order_id).first()
+        return serialize_order(order) if order else None
+    finally:
+        db.close()
+
+
+async def emit_order_paid(location_id: str, order_id: str, order_data: dict, delta: dict):
+    """
+    Notify the kitchen and the customer that an order's payment went through
 
     Args:
+        location_id: UUID of the location
         order_id: UUID of the order
-        order_data: Full order object as dict
+        order_data: Full order object as dict, for the kitchen ticket
+        delta: Changed fields, built by serialize_order_delta
     """
-    try:
-        room = f"order:{order_id}"
-        print(f"[Socket.IO] Emitting order_status_updated to room {room}")
-        print(f"[Socket.IO] Order data: status={order_data.get('status')}, id={order_data.get('id')}")
+    await emit_new_order(location_id, order_data)
+    await emit_order_status_update(location_id, order_id, delta)
 
-        await sio.emit('order_status_updated', order_data, room=room)
+async def emit_order_status_update(location_id: str, order_id: str, delta: dict):
+    """
+    Emit an order change to the customer's order room and the kitchen room
 
-        logger.info(f"Emitted order_status_updated to room {room}")
-        print(f"[Socket.IO] Successfully emitted order_status_updated to room {room}")
-    except Exception as e:
-        logger.error(f"Error emitting order status update: {e}")
-        print(f"[Socket.IO] Error emitting order status update: {e}")
+    Args:
+        location_id: UUID of the location
+        order_id: UUID of the order
+        delta: Changed fields, built by serialize_order_delta
+    """
+    try:
+        rooms = [f"order:{order_id}", f"kitchen:{location_id}"]
+        await sio.emit('order_status_updated', delta, room=rooms)
+        logger.debug("Emitted order_status_updated", extra=sampled(
+            order_id=order_id, status=delta.get('status'), seq=delta.get('seq')))
+    except Exception:
+        logger.exception("Error emitting order status update", extra={"order_id": order_id})
+        raise  # Let the outbox dispatcher retry
 
 
 async def emit_new_order(location_id: str, order_data: dict):
@@ -191,29 +544,60 @@ async def emit_new_order(location_id: str, order_data: dict):
     """
     try:
         room = f"kitchen:{location_id}"
-        print(f"[Socket.IO] Emitting new_order_created to room {room}")
-        print(f"[Socket.IO] Order: id={order_data.get('id')}, customer={order_data.get('customer_name')}")
-
         await sio.emit('new_order_created', order_data, room=room)
+        logger.debug("Emitted new_order_created", extra=sampled(
+            room=room, order_id=order_data.get('id'), seq=order_data.get('seq')))
+    except Exception:
+        logger.exception("Error emitting new order", extra={"location_id": location_id})
+        raise  # Let the outbox dispatcher retry
 
-        logger.info(f"Emitted new_order_created to room {room}")
-        print(f"[Socket.IO] Successfully emitted new_order_created to room {room}")
-    except Exception as e:
-        logger.error(f"Error emitting new order: {e}")
-        print(f"[Socket.IO] Error emitting new order: {e}")
+
+async def emit_order_updates(room: str, deltas: list):
+    """
+    Emit coalesced order deltas to one room: a single delta goes out as
+    order_status_updated, several as one order_updates event
+
+    Args:
+        room: Room name (order:{id} or kitchen:{id})
+        deltas: Deltas built by serialize_order_delta, in seq order
+    """
+    try:
+        if len(deltas) == 1:
+            await sio.emit('order_status_updated', deltas[0], room=room)
+        else:
+            await sio.emit('order_updates', {"updates": deltas}, room=room)
+        logger.debug("Emitted order updates", extra=sampled(room=room, count=len(deltas)))
+    except Exception:
+        logger.exception("Error emitting order updates", extra={"room": room})
+        raise
 
 
-async def emit_order_cancelled(order_id: str, order_data: dict):
+async def emit_order_snapshot(sid, order_data: dict):
     """
-    Emit order cancellation to order room
+    Send the current order to one client in an order room, on join or when
+    its missed events can no longer be replayed. Contact details are left out.
 
     Args:
-        order_id: UUID of the order
-        order_data: Full order object as dict with cancelled status
+        sid: Socket.IO session id
+        order_data: Full order object as dict
+    """
+    await sio.emit('order_snapshot', public_order(order_data), to=sid, ignore_queue=True)
+
+
+async def emit_order_deleted(location_id: str, order_id: str, seq: int = None):
+    """
+    Tell the kitchen and the customer that an order was removed
+
+    Args:
+        location_id: UUID of the location
+        order_id: UUID of the deleted order
+        seq: Outbox sequence number of the delete
     """
     try:
-        room = f"order:{order_id}"
-        await sio.emit('order_status_updated', order_data, room=room)
-        logger.info(f"Emitted order cancellation to room {room}")
-    except Exception as e:
-        logger.error(f"Error emitting order cancellation: {e}")
+        payload = {"id": order_id, "location_id": location_id, "seq": seq}
+        await sio.emit('order_deleted', payload, room=f"kitchen:{location_id}")
+        await sio.emit('order_deleted', payload, room=f"order:{order_id}")
+        logger.debug("Emitted order_deleted", extra={"order_id": order_id, "seq": seq})
+    except Exception:
+        logger.exception("Error emitting order deletion", extra={"order_id": order_id})
+        raise
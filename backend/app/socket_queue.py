@@ -0,0 +1,173 @@
+"""
+Mo's Burritos - Socket.IO Message Queue Managers
+Lets several uvicorn workers / Fly machines share Socket.IO rooms: an emit on
+one process is published to a message queue and delivered by every process
+to its own connected clients. Every manager also keeps a short replay buffer
+per kitchen/order room for clients that reconnect.
+"""
+import asyncio
+import base64
+import zlib
+from collections import OrderedDict, deque
+from typing import Any, List, Optional, Tuple
+
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from .config import settings
+from .database import create_listen_connection, pg_listen
+
+# NOTIFY payloads are limited to 8000 bytes by Postgres
+PG_NOTIFY_MAX_BYTES = 7900
+
+# Rooms whose events are kept for replay
+REPLAY_ROOM_PREFIXES = ("kitchen:", "order:")
+
+
+class ReplayBufferManager(socketio.AsyncManager):
+    """
+    Records every event delivered to a kitchen/order room that carries a
+    "seq" (the order_events outbox id) in a bounded ring buffer, so a client
+    that rejoins with the last seq it saw can be sent what it missed.
+
+    It sits below the pub/sub managers in the MRO, so it sees the messages
+    each process delivers locally, including those received from the queue.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # room -> deque of (seq, event, data); least recently used rooms are evicted
+        self.replay_buffers: "OrderedDict[str, deque]" = OrderedDict()
+
+    def record_event(self, room: str, event: str, data: Any) -> None:
+        if event == "order_updates" and isinstance(data, dict):
+            # Batched deltas are replayed one by one
+            for update in data.get("updates", ()):
+                self.record_event(room, "order_status_updated", update)
+            return
+        if not isinstance(data, dict) or not isinstance(data.get("seq"), int):
+            return
+        if not room.startswith(REPLAY_ROOM_PREFIXES):
+            return
+
+        buffer = self.replay_buffers.get(room)
+        if buffer is None:
+            buffer = deque(maxlen=settings.socketio_replay_buffer_size)
+            self.replay_buffers[room] = buffer
+            if len(self.replay_buffers) > settings.socketio_replay_max_rooms:
+                self.replay_buffers.popitem(last=False)
+        else:
+            self.replay_buffers.move_to_end(room)
+
+        buffer.append((data["seq"], event, data))
+
+    def replay(self, room: str, since_seq: int) -> Tuple[List[Tuple[int, str, Any]], bool, Optional[int]]:
+        """
+        Events in `room` newer than `since_seq`, whether the buffer still
+        covers everything after it, and the latest seq recorded for the room.
+
+        Seqs are global, so a room's seqs have gaps; the buffer is only known
+        to be complete when it reaches back to `since_seq` itself. A buffer
+        that was evicted, trimmed past it or lost with a restart is not.
+        """
+        buffer = self.replay_buffers.get(room) or ()
+        events = [entry for entry in buffer if entry[0] > since_seq]
+        complete = bool(buffer) and buffer[0][0] <= since_seq + 1
+        latest = buffer[-1][0] if buffer else None
+        return events, complete, latest
+
+    async def emit(self, event, data, namespace, room=None, skip_sid=None, callback=None, to=None, **kwargs):
+        target = to or room
+        if isinstance(target, str):
+            self.record_event(target, event, data)
+        elif isinstance(target, (list, tuple)):
+            for target_room in target:
+                self.record_event(target_room, event, data)
+        return await super().emit(event, data, namespace, room=room, skip_sid=skip_sid,
+                                  callback=callback, to=to, **kwargs)
+
+
+class AsyncPostgresManager(AsyncPubSubManager):
+    """
+    Socket.IO client manager that uses Postgres LISTEN/NOTIFY as the message
+    queue, so no extra infrastructure is needed beyond the existing database.
+
+    Large messages are zlib-compressed to fit the NOTIFY payload limit.
+    """
+    name = "asyncpostgres"
+
+    def __init__(self, url: str, channel: str = "socketio", write_only: bool = False, logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.url = url
+        self._publish_conn = None
+        self._publish_lock = asyncio.Lock()
+
+    def _encode(self, data) -> str:
+        payload = self.json.dumps(data, separators=(",", ":"))
+        if len(payload.encode()) <= PG_NOTIFY_MAX_BYTES:
+            return payload
+        compressed = "z:" + base64.b64encode(zlib.compress(payload.encode())).decode()
+        if len(compressed) > PG_NOTIFY_MAX_BYTES:
+            raise ValueError(f"Socket.IO message too large for NOTIFY ({len(payload)} bytes)")
+        return compressed
+
+    def _decode(self, payload: str):
+        if payload.startswith("z:"):
+            payload = zlib.decompress(base64.b64decode(payload[2:])).decode()
+        return self.json.loads(payload)
+
+    def _notify(self, payload: str):
+        if self._publish_conn is None or self._publish_conn.closed:
+            self._publish_conn = create_listen_connection(self.url)
+        try:
+            with self._publish_conn.cursor() as cur:
+                cur.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+        except Exception:
+            # Drop the connection so the next publish reconnects
+            self._publish_conn.close()
+            self._publish_conn = None
+            raise
+
+    async def _publish(self, data):
+        payload = self._encode(data)
+        async with self._publish_lock:
+            await asyncio.to_thread(self._notify, payload)
+
+    async def _listen(self):
+        async for payload in pg_listen(self.channel, self.url):
+            try:
+                yield self._decode(payload)
+            except (ValueError, zlib.error):
+                self._get_logger().warning("Ignoring malformed Socket.IO NOTIFY payload")
+
+
+class BufferedRedisManager(socketio.AsyncRedisManager, ReplayBufferManager):
+    """Redis pub/sub with per-room replay buffers"""
+
+
+class BufferedPostgresManager(AsyncPostgresManager, ReplayBufferManager):
+    """Postgres LISTEN/NOTIFY with per-room replay buffers"""
+
+
+def create_client_manager():
+    """
+    Build the Socket.IO client manager selected by SOCKETIO_MESSAGE_QUEUE:
+        ""                   in-process rooms (single worker)
+        redis://...          Redis pub/sub (requires the `redis` package)
+        postgres             Postgres LISTEN/NOTIFY on DATABASE_URL
+        postgresql://...     Postgres LISTEN/NOTIFY on a separate database
+    """
+    queue_url = settings.socketio_message_queue
+    channel = settings.socketio_channel
+
+    if not queue_url:
+        return ReplayBufferManager()
+    if queue_url.startswith(("redis://", "rediss://", "unix://")):
+        return BufferedRedisManager(queue_url, channel=channel)
+    if queue_url == "postgres":
+        return BufferedPostgresManager(settings.db_url, channel=channel)
+    if queue_url.startswith(("postgres://", "postgresql://", "postgresql+psycopg2://")):
+        return BufferedPostgresManager(queue_url, channel=channel)
+
+    raise ValueError(f"Unsupported SOCKETIO_MESSAGE_QUEUE: {queue_url}")
+
@@ -0,0 +1,374 @@
+"""
+Mo's Burritos FastAPI Backend - Tracing
+Lightweight OpenTelemetry-compatible spans for the slow parts of a request:
+SQL statements, Stripe calls, Supabase Auth calls and Socket.IO emits.
+Off unless TRACING_ENABLED=true; then TRACING_SAMPLE_RATE of the traces are
+recorded and exported in the background as OTLP/JSON, either appended to a
+file (one export request per line, readable by the collector's otlpjsonfile
+receiver) or POSTed to an OTLP/HTTP collector.
+
+    TRACING_ENABLED=true
+    TRACING_SAMPLE_RATE=0.1
+    TRACING_EXPORTER=traces.jsonl                        or http://collector:4318/v1/traces
+
+Requests carrying a W3C `traceparent` header continue the caller's trace and
+follow its sampling decision.
+"""
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Union
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "mos-burritos-api"
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT, PRODUCER = 1, 2, 3, 4
+
+# Finished spans sent per export; anything beyond the queue limit is dropped
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL_SECONDS = 5.0
+EXPORT_QUEUE_LIMIT = 20_000
+
+
+class Span:
+    """One timed operation within a trace"""
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start", "end", "attributes", "error")
+
+    def __init__(self, name: str, kind: int, trace_id: str, parent_id: Optional[str],
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = 0
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.end = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        _exporter.submit(self)
+
+
+# Marks a trace that was not sampled, so nothing below it starts one of its own
+_NOT_SAMPLED = object()
+
+_current: ContextVar[Union[Span, object, None]] = ContextVar("trace_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """The innermost recording span, if this code runs in a sampled trace"""
+    span = _current.get()
+    return span if isinstance(span, Span) else None
+
+
+class _SpanScope:
+    """Makes a span current for a `with` block and finishes it on exit"""
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Union[Span, object]):
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Optional[Span]:
+        self.token = _current.set(self.span)
+        return self.span if isinstance(self.span, Span) else None
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current.reset(self.token)
+        if isinstance(self.span, Span):
+            self.span.finish(exc)
+
+
+class _NoopScope:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NOOP = _NoopScope()
+
+
+def _sampled() -> bool:
+    return random.random() < settings.tracing_sample_rate
+
+
+def parse_traceparent(header: Optional[str]):
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, or None"""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def start_trace(name: str, kind: int = SERVER, traceparent: Optional[str] = None,
+                attributes: Optional[Dict[str, Any]] = None):
+    """
+    Root scope for one unit of work (an HTTP request). The sampling decision
+    is made here, or taken from `traceparent`; unsampled traces record nothing.
+    """
+    if not settings.tracing_enabled:
+        return _NOOP
+    remote = parse_traceparent(traceparent)
+    if remote is not None:
+        trace_id, parent_id, sampled = remote
+    else:
+        trace_id, parent_id, sampled = os.urandom(16).hex(), None, _sampled()
+    if not sampled:
+        return _SpanScope(_NOT_SAMPLED)
+    return _SpanScope(Span(name, kind, trace_id, parent_id, attributes))
+
+
+def start_span(name: str, kind: int = INTERNAL, attributes: Optional[Dict[str, Any]] = None,
+               root: bool = False):
+    """
+    Child span of the current trace, as a context manager yielding the Span
+    (or None when nothing is recorded). With `root`, work that runs outside
+    any request (background workers, Socket.IO handlers) starts a sampled
+    trace of its own.
+
+        with start_span("stripe PaymentIntent.create", CLIENT) as span:
+            ...
+    """
+    if not settings.tracing_enabled:
+        return _NOOP
+    parent = _current.get()
+    if parent is _NOT_SAMPLED:
+        return _NOOP
+    if parent is None:
+        if not root or not _sampled():
+            return _NOOP
+        return _SpanScope(Span(name, kind, os.urandom(16).hex(), None, attributes))
+    return _SpanScope(Span(name, kind, parent.trace_id, parent.span_id, attributes))
+
+
+def traced(name: str, kind: int = CLIENT, attributes: Optional[Dict[str, Any]] = None):
+    """
+    Decorator recording every call of a function (sync or async) as a span.
+    With tracing disabled the function is returned unchanged.
+    """
+    def decorate(func):
+        if not settings.tracing_enabled:
+            return func
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with start_span(name, kind, dict(attributes or {}), root=True):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(name, kind, dict(attributes or {}), root=True):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+# SQL statements
+
+_sql_listening = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current.get()
+    if not isinstance(parent, Span):
+        return
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    span = Span(f"db {operation}", CLIENT, parent.trace_id, parent.span_id, {
+        "db.system": conn.dialect.name,
+        "db.operation": operation,
+        "db.statement": statement[:2000],
+    })
+    if executemany:
+        span.attributes["db.executemany"] = True
+    conn.info.setdefault("trace_spans", []).append(span)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        span = spans.pop()
+        if cursor is not None and cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.attributes["db.rowcount"] = cursor.rowcount
+        span.finish()
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get("trace_spans") if conn is not None else None
+    if spans:
+        spans.pop().finish(exception_context.original_exception)
+
+
+def install_sql_tracing() -> None:
+    """Record every engine's cursor executions as spans of the current trace (once)"""
+    global _sql_listening
+    if _sql_listening or not settings.tracing_enabled:
+        return
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _sql_listening = True
+
+
+# Export
+
+def _attribute_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _attribute_value(value)} for key, value in values.items() if value is not None]
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    entry = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start),
+        "endTimeUnixNano": str(span.end),
+        "attributes": _attributes(span.attributes),
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 0},
+    }
+    if span.parent_id:
+        entry["parentSpanId"] = span.parent_id
+    return entry
+
+
+def otlp_payload(spans: List[Span]) -> Dict[str, Any]:
+    """An OTLP/JSON ExportTraceServiceRequest for these spans"""
+    return {"resourceSpans": [{
+        "resource": {"attributes": _attributes({
+            "service.name": SERVICE_NAME,
+            "deployment.environment": settings.environment,
+            "process.pid": os.getpid(),
+        })},
+        "scopeSpans": [{
+            "scope": {"name": __name__},
+            "spans": [_otlp_span(span) for span in spans],
+        }],
+    }]}
+
+
+class _Exporter:
+    """Batches finished spans and writes them out on a background thread"""
+
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=EXPORT_QUEUE_LIMIT)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._client = None
+        self.dropped = 0
+
+    def submit(self, span: Span) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Span] = []
+            deadline = time.monotonic() + EXPORT_INTERVAL_SECONDS
+            while len(batch) < EXPORT_BATCH_SIZE:
+                try:
+                    span = self._queue.get(timeout=max(deadline - time.monotonic(), 0.001))
+                except queue.Empty:
+                    break
+                if span is None:
+                    stopping = True
+                    break
+                batch.append(span)
+            if batch:
+                try:
+                    self._export(batch)
+                except Exception:
+                    logger.warning("Trace export failed, dropped %d spans", len(batch), exc_info=True)
+
+    def _export(self, spans: List[Span]) -> None:
+        payload = otlp_payload(spans)
+        target = settings.tracing_exporter
+        if target.startswith(("http://", "https://")):
+            if self._client is None:
+                import httpx
+                self._client = httpx.Client(timeout=5.0)
+            self._client.post(target, json=payload).raise_for_status()
+        else:
+            with open(target, "a", encoding="utf-8") as f:
+                f.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Flush queued spans and stop the export thread"""
+        thread = self._thread
+        if thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+        self._thread = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+_exporter = _Exporter()
+
+
+def shutdown_tracing() -> None:
+    """Export whatever is still queued (application shutdown)"""
+    _exporter.shutdown()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Backfill Guest Customers
+
+Links every existing guest order to a guest identity (by normalized e-mail,
+else phone) and then rebuilds customer_stats so guests are keyed by their new
+id. The guest_customers table and orders.guest_id are created at startup
+(ensure_schema in app/database.py). Safe to re-run: orders that already have
+a guest_id are skipped.
+
+Usage:
+    python scripts/backfill_guest_customers.py [--batch-size 500]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import select, update
+
+from app.database import Base, SessionLocal, engine, ensure_schema
+from app.models import Order
+from app.services.customers import rebuild_customer_stats
+from app.services.guests import resolve_guest
+
+
+def backfill(batch_size: int) -> int:
+    """Link unlinked guest orders, one batch of distinct identities per transaction"""
+    linked = 0
+    skipped = set()
+    db = SessionLocal()
+    try:
+        while True:
+            unlinked = (Order.customer_id.is_(None), Order.guest_id.is_(None))
+            identities = db.execute(
+                select(Order.customer_email, Order.customer_phone, Order.customer_name)
+                .where(*unlinked)
+                .distinct(Order.customer_email, Order.customer_phone)
+                .order_by(Order.customer_email, Order.customer_phone)
+                .limit(batch_size + len(skipped))
+            ).all()
+            identities = [row for row in identities if (row.customer_email, row.customer_phone) not in skipped]
+            if not identities:
+                break
+
+            for email, phone, name in identities[:batch_size]:
+                guest_id = resolve_guest(db, name, email, phone)
+                if guest_id is None:
+                    # Neither a usable e-mail nor phone: stays unlinked
+                    skipped.add((email, phone))
+                    continue
+                result = db.execute(update(Order).where(
+                    *unlinked,
+                    Order.customer_email.is_not_distinct_from(email),
+                    Order.customer_phone.is_not_distinct_from(phone),
+                ).values(guest_id=guest_id))
+                linked += result.rowcount
+            db.commit()
+            print(f"   linked {linked} orders...")
+    finally:
+        db.close()
+    if skipped:
+        print(f"⚠️  {len(skipped)} guest identities have no usable e-mail or phone and were left unlinked")
+    return linked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Link guest orders to guest_customers")
+    parser.add_argument("--batch-size", type=int, default=500, help="Distinct guest identities per transaction")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    # Same schema steps as app startup, in case the script runs before a deploy
+    Base.metadata.create_all(bind=engine)
+    ensure_schema()
+    linked = backfill(args.batch_size)
+    print(f"✅ Linked {linked} guest orders in {time.perf_counter() - started:.2f}s")
+
+    db = SessionLocal()
+    try:
+        count = rebuild_customer_stats(db)
+        print(f"✅ Rebuilt stats for {count} customers")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Local Stripe Stand-in
+
+A small HTTP server that speaks the subset of the Stripe API used by
+app/routers/payment.py (PaymentIntents and Checkout Sessions) and delivers
+signed webhooks back to the app, so the payment path can be benchmarked
+without network access.
+
+Usage:
+    python scripts/fake_stripe.py --port 12111 \\
+        --webhook-url http://localhost:8000/api/webhook/stripe \\
+        --webhook-secret whsec_local
+
+Point the backend at it with:
+    STRIPE_API_BASE=http://localhost:12111
+    STRIPE_SECRET_KEY=sk_test_local
+    STRIPE_WEBHOOK_SECRET=whsec_local
+
+Test helpers (not part of the Stripe API):
+    POST /_fake/checkout/sessions/{id}/complete   pay a session, send checkout.session.completed
+    POST /v1/payment_intents/{id}/confirm         succeed an intent, send payment_intent.succeeded
+    POST /_fake/payment_intents/{id}/fail         fail an intent, send payment_intent.payment_failed
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import re
+import secrets
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Tuple
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+payment_intents: Dict[str, Dict[str, Any]] = {}
+checkout_sessions: Dict[str, Dict[str, Any]] = {}
+
+_webhook_client = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _webhook_client
+    _webhook_client = httpx.AsyncClient(timeout=30)
+    yield
+    await _webhook_client.aclose()
+
+
+app = FastAPI(title="Fake Stripe", lifespan=lifespan)
+
+# Runtime configuration, filled in by main()
+config = {
+    "webhook_url": "",
+    "webhook_secret": "",
+    "latency_ms": 0.0,
+    "public_url": "",
+}
+
+
+@app.exception_handler(HTTPException)
+async def stripe_error_handler(request: Request, exc: HTTPException):
+    """Return errors in Stripe's {"error": {...}} shape so the SDK raises proper StripeErrors"""
+    return JSONResponse(status_code=exc.status_code, content=exc.detail)
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_{secrets.token_hex(12)}"
+
+
+def _unflatten(pairs: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Decode Stripe's bracketed form encoding (metadata[key], line_items[0][price_data][...])"""
+    result: Dict[str, Any] = {}
+    for key, value in pairs:
+        parts = re.findall(r"[^\[\]]+", key)
+        node = result
+        for i, part in enumerate(parts):
+            last = i == len(parts) - 1
+            if last:
+                node[part] = value
+            else:
+                node = node.setdefault(part, {})
+
+    def listify(node):
+        if isinstance(node, dict):
+            if node and all(k.isdigit() for k in node):
+                return [listify(node[k]) for k in sorted(node, key=int)]
+            return {k: listify(v) for k, v in node.items()}
+        return node
+
+    return listify(result)
+
+
+async def _parse(request: Request) -> Dict[str, Any]:
+    if config["latency_ms"]:
+        await asyncio.sleep(config["latency_ms"] / 1000)
+    form = await request.form()
+    return _unflatten(list(form.multi_items()))
+
+
+def _sign(payload: bytes) -> str:
+    """Build a Stripe-Signature header the way Stripe does"""
+    timestamp = int(time.time())
+    signed = f"{timestamp}.".encode() + payload
+    signature = hmac.new(config["webhook_secret"].encode(), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+async def _deliver(event_type: str, obj: Dict[str, Any]) -> Dict[str, Any]:
+    """POST a signed event to the app's webhook endpoint and report how it went"""
+    event = {
+        "id": _new_id("evt"),
+        "object": "event",
+        "type": event_type,
+        "created": int(time.time()),
+        "livemode": False,
+        "data": {"object": obj},
+    }
+    if not config["webhook_url"]:
+        return {"event_id": event["id"], "delivered": False}
+
+    payload = json.dumps(event).encode()
+    started = time.perf_counter()
+    response = await _webhook_client.post(
+        config["webhook_url"],
+        content=payload,
+        headers={"Content-Type": "application/json", "Stripe-Signature": _sign(payload)},
+    )
+    return {
+        "event_id": event["id"],
+        "delivered": True,
+        "status_code": response.status_code,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def _get(store: Dict[str, Dict[str, Any]], object_id: str, name: str) -> Dict[str, Any]:
+    obj = store.get(object_id)
+    if not obj:
+        raise HTTPException(
+            status_code=404,
+            detail={"error": {"type": "invalid_request_error", "message": f"No such {name}: '{object_id}'"}},
+        )
+    return obj
+
+
+def _create_intent(amount: int, currency: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    intent_id = _new_id("pi")
+    intent = {
+        "id": intent_id,
+        "object": "payment_intent",
+        "amount": amount,
+        "currency": currency,
+        "client_secret": f"{intent_id}_secret_{secrets.token_hex(8)}",
+        "status": "requires_payment_method",
+        "metadata": metadata,
+        "created": int(time.time()),
+        "livemode": False,
+    }
+    payment_intents[intent_id] = intent
+    return intent
+
+
+# ==================== Stripe API subset ====================
+
+@app.post("/v1/payment_intents")
+async def create_payment_intent(request: Request):
+    params = await _parse(request)
+    return _create_intent(int(params.get("amount", 0)), params.get("currency", "usd"), params.get("metadata", {}))
+
+
+@app.get("/v1/payment_intents/{intent_id}")
+async def retrieve_payment_intent(intent_id: str, request: Request):
+    await _parse(request)
+    return _get(payment_intents, intent_id, "payment_intent")
+
+
+@app.post("/v1/payment_intents/{intent_id}/confirm")
+async def confirm_payment_intent(intent_id: str, request: Request):
+    await _parse(request)
+    intent = _get(payment_intents, intent_id, "payment_intent")
+    intent["status"] = "succeeded"
+    await _deliver("payment_intent.succeeded", intent)
+    return intent
+
+
+@app.post("/v1/checkout/sessions")
+async def create_checkout_session(request: Request):
+    params = await _parse(request)
+    line_items = params.get("line_items", [])
+    amount_total = sum(
+        int(item["price_data"]["unit_amount"]) * int(item.get("quantity", 1))
+        for item in line_items
+    )
+    session_id = _new_id("cs_test")
+    session = {
+        "id": session_id,
+        "object": "checkout.session",
+        "mode": params.get("mode", "payment"),
+        "status": "open",
+        "payment_status": "unpaid",
+        "payment_intent": None,
+        "amount_total": amount_total,
+        "currency": line_items[0]["price_data"]["currency"] if line_items else "usd",
+        "customer_email": params.get("customer_email"),
+        "metadata": params.get("metadata", {}),
+        "success_url": params.get("success_url"),
+        "cancel_url": params.get("cancel_url"),
+        "url": f"{config['public_url']}/pay/{session_id}",
+        "livemode": False,
+    }
+    checkout_sessions[session_id] = session
+    return session
+
+
+@app.get("/v1/checkout/sessions/{session_id}")
+async def retrieve_checkout_session(session_id: str, request: Request):
+    await _parse(request)
+    return _get(checkout_sessions, session_id, "checkout.session")
+
+
+# ==================== Test helpers ====================
+
+@app.post("/_fake/checkout/sessions/{session_id}/complete")
+async def complete_checkout_session(session_id: str):
+    """Simulate the customer paying on the hosted checkout page"""
+    session = _get(checkout_sessions, session_id, "checkout.session")
+    intent = _create_intent(session["amount_total"], session["currency"], session["metadata"])
+    intent["status"] = "succeeded"
+    session.update(status="complete", payment_status="paid", payment_intent=intent["id"])
+    delivery = await _deliver("checkout.session.completed", session)
+    return {"session": session, "webhook": delivery}
+
+
+@app.post("/_fake/payment_intents/{intent_id}/fail")
+async def fail_payment_intent(intent_id: str):
+    intent = _get(payment_intents, intent_id, "payment_intent")
+    intent["status"] = "requires_payment_method"
+    delivery = await _deliver("payment_intent.payment_failed", intent)
+    return {"payment_intent": intent, "webhook": delivery}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Stripe stand-in for payment benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--webhook-url", default="http://localhost:8000/api/webhook/stripe")
+    parser.add_argument("--webhook-secret", default="whsec_local")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Artificial delay added to every API call, to mimic Stripe round trips")
+    args = parser.parse_args()
+
+    config.update(
+        webhook_url=args.webhook_url,
+        webhook_secret=args.webhook_secret,
+        latency_ms=args.latency_ms,
+        public_url=f"http://{args.host}:{args.port}",
+    )
+    print(f"💳 Fake Stripe listening on http://{args.host}:{args.port}")
+    print(f"   Webhooks -> {args.webhook_url}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Local Supabase Auth Stand-in
+
+A lightweight GoTrue-compatible server covering the calls made by
+app/services/supabase_auth.py: email sign-up, password login, phone OTP,
+refresh-token rotation and get_user, with HS256-signed JWTs. Users live in
+memory, so login storms and authenticated order flows can be load-tested
+on a laptop without network access.
+
+Usage:
+    python scripts/fake_supabase_auth.py --port 54399
+
+Point the backend at it with:
+    SUPABASE_URL=http://127.0.0.1:54399
+    SUPABASE_ANON_KEY=<anon key printed on startup>
+
+Tokens are signed with --jwt-secret (or the SUPABASE_JWT_SECRET environment
+variable); the backend only checks them through get_user, so it needs no copy.
+
+Every phone OTP is accepted with the fixed code given by --otp-code.
+"""
+import argparse
+import hashlib
+import os
+import secrets
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import uvicorn
+from fastapi import APIRouter, FastAPI, Header, Request
+from fastapi.responses import JSONResponse, Response
+from jose import JWTError, jwt
+
+# Runtime configuration, filled in by main()
+config = {
+    "jwt_secret": "",
+    "jwt_expiry": 3600,
+    "otp_code": "123456",
+}
+
+users: Dict[str, Dict[str, Any]] = {}  # id -> user
+users_by_email: Dict[str, str] = {}
+users_by_phone: Dict[str, str] = {}
+passwords: Dict[str, str] = {}  # id -> sha256(password)
+refresh_tokens: Dict[str, str] = {}  # token -> user id
+
+router = APIRouter(prefix="/auth/v1")
+
+
+class AuthError(Exception):
+    def __init__(self, status_code: int, error_code: str, msg: str):
+        self.status_code = status_code
+        self.error_code = error_code
+        self.msg = msg
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _hash(password: str) -> str:
+    # Real GoTrue uses bcrypt; a fast hash keeps the stand-in out of the measurements
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def _create_user(email: Optional[str] = None, phone: Optional[str] = None,
+                 metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    user_id = str(uuid.uuid4())
+    now = _now()
+    user = {
+        "id": user_id,
+        "aud": "authenticated",
+        "role": "authenticated",
+        "email": email or "",
+        "phone": (phone or "").lstrip("+"),
+        "email_confirmed_at": now if email else None,
+        "phone_confirmed_at": now if phone else None,
+        "confirmed_at": now,
+        "app_metadata": {"provider": "email" if email else "phone", "providers": ["email" if email else "phone"]},
+        "user_metadata": metadata or {},
+        "identities": [],
+        "created_at": now,
+        "updated_at": now,
+        "last_sign_in_at": None,
+        "is_anonymous": False,
+    }
+    users[user_id] = user
+    if email:
+        users_by_email[email.lower()] = user_id
+    if phone:
+        users_by_phone[phone.lstrip("+")] = user_id
+    return user
+
+
+def _issue_session(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Sign an access token and rotate in a fresh refresh token"""
+    issued_at = int(time.time())
+    expires_at = issued_at + config["jwt_expiry"]
+    claims = {
+        "aud": "authenticated",
+        "role": "authenticated",
+        "sub": user["id"],
+        "email": user["email"],
+        "phone": user["phone"],
+        "app_metadata": user["app_metadata"],
+        "user_metadata": user["user_metadata"],
+        "session_id": str(uuid.uuid4()),
+        "iat": issued_at,
+        "exp": expires_at,
+    }
+    refresh_token = secrets.token_urlsafe(24)
+    refresh_tokens[refresh_token] = user["id"]
+    user["last_sign_in_at"] = _now()
+    return {
+        "access_token": jwt.encode(claims, config["jwt_secret"], algorithm="HS256"),
+        "token_type": "bearer",
+        "expires_in": config["jwt_expiry"],
+        "expires_at": expires_at,
+        "refresh_token": refresh_token,
+        "user": user,
+    }
+
+
+def _user_from_bearer(authorization: Optional[str]) -> Dict[str, Any]:
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise AuthError(401, "no_authorization", "This endpoint requires a Bearer token")
+    try:
+        claims = jwt.decode(authorization[7:], config["jwt_secret"], algorithms=["HS256"], audience="authenticated")
+    except JWTError as e:
+        raise AuthError(403, "bad_jwt", f"invalid JWT: {e}")
+    user = users.get(claims["sub"])
+    if not user:
+        raise AuthError(403, "user_not_found", "User from sub claim in JWT does not exist")
+    return user
+
+
+@router.post("/signup")
+async def signup(request: Request):
+    body = await request.json()
+    email = (body.get("email") or "").lower()
+    if not email or not body.get("password"):
+        raise AuthError(400, "validation_failed", "Signup requires a valid password")
+    if email in users_by_email:
+        raise AuthError(422, "user_already_exists", "User already registered")
+
+    user = _create_user(email=email, metadata=body.get("data"))
+    passwords[user["id"]] = _hash(body["password"])
+    return _issue_session(user)
+
+
+@router.post("/token")
+async def token(request: Request, grant_type: str):
+    body = await request.json()
+
+    if grant_type == "password":
+        user_id = users_by_email.get((body.get("email") or "").lower())
+        if not user_id or passwords.get(user_id) != _hash(body.get("password") or ""):
+            raise AuthError(400, "invalid_credentials", "Invalid login credentials")
+        return _issue_session(users[user_id])
+
+    if grant_type == "refresh_token":
+        user_id = refresh_tokens.pop(body.get("refresh_token") or "", None)
+        if not user_id:
+            raise AuthError(400, "refresh_token_not_found", "Invalid Refresh Token: Refresh Token Not Found")
+        return _issue_session(users[user_id])
+
+    raise AuthError(400, "unsupported_grant_type", f"Unsupported grant type: {grant_type}")
+
+
+@router.post("/otp")
+async def send_otp(request: Request):
+    body = await request.json()
+    phone = (body.get("phone") or "").lstrip("+")
+    if not phone:
+        raise AuthError(400, "validation_failed", "Only an email address or phone number should be provided")
+    if phone not in users_by_phone and body.get("create_user", True):
+        _create_user(phone=phone, metadata=body.get("data"))
+    return {"message_id": str(uuid.uuid4())}
+
+
+@router.post("/verify")
+async def verify(request: Request):
+    body = await request.json()
+    user_id = users_by_phone.get((body.get("phone") or "").lstrip("+"))
+    if not user_id or body.get("token") != config["otp_code"]:
+        raise AuthError(403, "otp_expired", "Token has expired or is invalid")
+    return _issue_session(users[user_id])
+
+
+@router.get("/user")
+async def get_user(authorization: Optional[str] = Header(None)):
+    return _user_from_bearer(authorization)
+
+
+@router.post("/logout")
+async def logout(authorization: Optional[str] = Header(None)):
+    user = _user_from_bearer(authorization)
+    for refresh_token in [t for t, uid in refresh_tokens.items() if uid == user["id"]]:
+        del refresh_tokens[refresh_token]
+    return Response(status_code=204)
+
+
+@router.get("/health")
+async def health():
+    return {"name": "GoTrue (local stand-in)", "users": len(users)}
+
+
+app = FastAPI(title="Fake Supabase Auth")
+app.include_router(router)
+
+
+@app.exception_handler(AuthError)
+async def auth_error_handler(request: Request, exc: AuthError):
+    """GoTrue error shape, so supabase_auth raises AuthApiError with the right message"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"code": exc.status_code, "error_code": exc.error_code, "msg": exc.msg},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local GoTrue stand-in for offline load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54399)
+    parser.add_argument("--jwt-secret", default=os.environ.get("SUPABASE_JWT_SECRET", "local-supabase-jwt-secret"),
+                        help="HS256 signing secret (defaults to SUPABASE_JWT_SECRET)")
+    parser.add_argument("--jwt-expiry", type=int, default=3600, help="Access token lifetime in seconds")
+    parser.add_argument("--otp-code", default="123456", help="Code accepted for every phone OTP")
+    args = parser.parse_args()
+
+    config.update(jwt_secret=args.jwt_secret, jwt_expiry=args.jwt_expiry, otp_code=args.otp_code)
+    anon_key = jwt.encode({"role": "anon", "iss": "supabase-local", "iat": int(time.time())},
+                          args.jwt_secret, algorithm="HS256")
+
+    print(f"🔐 Fake Supabase Auth listening on http://{args.host}:{args.port}/auth/v1")
+    print(f"   SUPABASE_URL=http://{args.host}:{args.port}")
+    print(f"   SUPABASE_ANON_KEY={anon_key}")
+    print(f"   Phone OTP code: {args.otp_code}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Authentication Load Test
+
+Simulates a login storm followed by authenticated order traffic against a
+backend pointed at the local Supabase Auth stand-in
+(scripts/fake_supabase_auth.py).
+
+Each simulated customer:
+    1. POST /api/auth/customer/register (first run) or /api/auth/customer/login
+    2. GET  /api/auth/me
+    3. POST /api/orders linked to the customer
+    4. GET  /api/orders/my-orders
+
+Usage:
+    python scripts/load_test_auth.py --users 500 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from load_test_payments import percentile
+
+
+class AuthLoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def _call(self, stage: str, request):
+        started = time.perf_counter()
+        response = await request
+        self.timings[stage].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[f"{stage}:{response.status_code}"] += 1
+            return None
+        return response.json()
+
+    async def run_one(self, n: int, api: httpx.AsyncClient, location_id: str):
+        email = f"{self.args.email_prefix}{n}@example.com"
+        credentials = {"email": email, "password": "load-test-password"}
+
+        session = await self._call("login", api.post("/api/auth/customer/login", json=credentials))
+        if session is None:
+            session = await self._call("register", api.post("/api/auth/customer/register", json={
+                **credentials,
+                "first_name": "Load",
+                "last_name": f"Tester {n}",
+            }))
+        if session is None:
+            return
+
+        headers = {"Authorization": f"Bearer {session['accessToken']}"}
+        me = await self._call("me", api.get("/api/auth/me", headers=headers))
+        if me is None:
+            return
+
+        for _ in range(self.args.orders_per_user):
+            await self._call("create_order", api.post("/api/orders", json={
+                "location_id": location_id,
+                "customer_id": me["id"],
+                "customer_name": f"Load Tester {n}",
+                "customer_phone": f"+1555{n:07d}",
+                "customer_email": email,
+                "items": [{"item_id": "load-test-taco", "name": "Load Test Taco", "price": 3.5, "quantity": 3}],
+                "payment_method": "cash",
+            }))
+        await self._call("my_orders", api.get("/api/orders/my-orders", headers=headers))
+
+    async def run(self):
+        limits = httpx.Limits(max_connections=self.args.concurrency)
+        async with httpx.AsyncClient(base_url=self.args.api, timeout=60, limits=limits) as api:
+            response = await api.get("/api/locations")
+            response.raise_for_status()
+            locations = response.json()
+            if not locations:
+                raise SystemExit("No active locations - seed the database first (python seed_db.py)")
+            location_id = self.args.location_id or locations[0]["id"]
+
+            semaphore = asyncio.Semaphore(self.args.concurrency)
+
+            async def bounded(n):
+                async with semaphore:
+                    try:
+                        await self.run_one(n, api, location_id)
+                    except httpx.HTTPError as e:
+                        self.errors[type(e).__name__] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(bounded(n) for n in range(self.args.users)))
+            elapsed = time.perf_counter() - started
+
+        self.report(elapsed)
+
+    def report(self, elapsed: float):
+        print("\n" + "=" * 78)
+        print(f"AUTH FLOW: {self.args.users} users, concurrency {self.args.concurrency}")
+        print("=" * 78)
+        print(f"{'stage':<20}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+        for stage in ("register", "login", "me", "create_order", "my_orders"):
+            values = self.timings.get(stage, [])
+            if not values:
+                continue
+            print(f"{stage:<20}{len(values):>8}{statistics.mean(values):>10.1f}"
+                  f"{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}"
+                  f"{percentile(values, 99):>10.1f}{max(values):>10.1f}")
+        print("-" * 78)
+        total = sum(len(v) for v in self.timings.values())
+        print(f"{total} requests in {elapsed:.2f}s ({total / elapsed:.1f} req/s)")
+        if self.errors:
+            print(f"Errors: {dict(self.errors)}")
+        print("(all latencies in ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test login storms and authenticated order flows")
+    parser.add_argument("--api", default="http://localhost:8000", help="Backend base URL")
+    parser.add_argument("--location-id", default=None, help="Location to order from (default: first active)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--orders-per-user", type=int, default=1)
+    parser.add_argument("--email-prefix", default="loadtest+", help="Reuse a prefix to replay logins for existing users")
+    args = parser.parse_args()
+
+    asyncio.run(AuthLoadTest(args).run())
+
+
+if __name__ == "__main__":
+    main()
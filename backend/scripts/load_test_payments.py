@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Payment Path Load Test
+
+Drives checkout -> webhook -> order confirmation end to end against a
+running backend that is pointed at the local Stripe stand-in
+(scripts/fake_stripe.py), and reports latency percentiles per stage and
+overall throughput.
+
+Each iteration:
+    1. POST /api/create-checkout-session
+    2. POST /api/orders with the returned stripe_session_id
+    3. Fake Stripe completes the session and delivers checkout.session.completed
+    4. GET /api/orders/{id} until payment_status is "paid"
+
+Usage:
+    python scripts/load_test_payments.py --orders 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class PaymentLoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.completed = 0
+
+    async def _timed(self, stage: str, coro):
+        started = time.perf_counter()
+        result = await coro
+        self.timings[stage].append((time.perf_counter() - started) * 1000)
+        return result
+
+    async def resolve_location(self, api: httpx.AsyncClient) -> str:
+        if self.args.location_id:
+            return self.args.location_id
+        response = await api.get("/api/locations")
+        response.raise_for_status()
+        locations = response.json()
+        if not locations:
+            raise SystemExit("No active locations - seed the database first (python seed_db.py)")
+        return locations[0]["id"]
+
+    async def run_one(self, n: int, api: httpx.AsyncClient, fake: httpx.AsyncClient, location_id: str):
+        items = [{"item_id": "load-test-burrito", "name": "Load Test Burrito", "price": 9.5, "quantity": 2}]
+        customer = {
+            "name": f"Load Tester {n}",
+            "email": f"load{n}@example.com",
+            "phone": f"+1555{n:07d}",
+        }
+        started = time.perf_counter()
+
+        try:
+            response = await self._timed("checkout_session", api.post("/api/create-checkout-session", json={
+                "amount": 2057,
+                "currency": "usd",
+                "customerInfo": customer,
+                "items": items,
+                "locationId": location_id,
+            }))
+            response.raise_for_status()
+            session_id = response.json()["sessionId"]
+
+            response = await self._timed("create_order", api.post("/api/orders", json={
+                "location_id": location_id,
+                "customer_name": customer["name"],
+                "customer_phone": customer["phone"],
+                "customer_email": customer["email"],
+                "items": items,
+                "payment_method": "online",
+                "stripe_session_id": session_id,
+            }))
+            response.raise_for_status()
+            order_id = response.json()["id"]
+
+            paid_at = time.perf_counter()
+            response = await fake.post(f"/_fake/checkout/sessions/{session_id}/complete")
+            response.raise_for_status()
+            webhook = response.json()["webhook"]
+            if webhook.get("status_code") != 200:
+                self.errors["webhook"] += 1
+                return
+            self.timings["webhook_ack"].append(webhook["latency_ms"])
+
+            confirmed_at = await self._wait_for_paid(api, order_id)
+            if confirmed_at is None:
+                self.errors["confirmation_timeout"] += 1
+                return
+            self.timings["payment_to_paid"].append((confirmed_at - paid_at) * 1000)
+            self.timings["end_to_end"].append((confirmed_at - started) * 1000)
+            self.completed += 1
+        except httpx.HTTPError as e:
+            self.errors[type(e).__name__] += 1
+
+    async def _wait_for_paid(self, api: httpx.AsyncClient, order_id: str) -> Optional[float]:
+        deadline = time.perf_counter() + self.args.confirm_timeout
+        while time.perf_counter() < deadline:
+            response = await api.get(f"/api/orders/{order_id}")
+            if response.status_code == 200 and response.json().get("payment_status") == "paid":
+                return time.perf_counter()
+            await asyncio.sleep(self.args.poll_interval)
+        return None
+
+    async def run(self):
+        limits = httpx.Limits(max_connections=self.args.concurrency * 2)
+        async with httpx.AsyncClient(base_url=self.args.api, timeout=30, limits=limits) as api, \
+                httpx.AsyncClient(base_url=self.args.stripe, timeout=30, limits=limits) as fake:
+            location_id = await self.resolve_location(api)
+            semaphore = asyncio.Semaphore(self.args.concurrency)
+
+            async def bounded(n):
+                async with semaphore:
+                    await self.run_one(n, api, fake, location_id)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(bounded(n) for n in range(self.args.orders)))
+            elapsed = time.perf_counter() - started
+
+        self.report(elapsed)
+
+    def report(self, elapsed: float):
+        print("\n" + "=" * 78)
+        print(f"PAYMENT PATH: {self.args.orders} orders, concurrency {self.args.concurrency}")
+        print("=" * 78)
+        print(f"{'stage':<20}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+        for stage in ("checkout_session", "create_order", "webhook_ack", "payment_to_paid", "end_to_end"):
+            values = self.timings.get(stage, [])
+            if not values:
+                continue
+            print(f"{stage:<20}{len(values):>8}{statistics.mean(values):>10.1f}"
+                  f"{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}"
+                  f"{percentile(values, 99):>10.1f}{max(values):>10.1f}")
+        print("-" * 78)
+        print(f"Completed: {self.completed}/{self.args.orders} in {elapsed:.2f}s "
+              f"({self.completed / elapsed:.1f} confirmed orders/s)")
+        if self.errors:
+            print(f"Errors: {dict(self.errors)}")
+        print("(all latencies in ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test checkout -> webhook -> confirmation")
+    parser.add_argument("--api", default="http://localhost:8000", help="Backend base URL")
+    parser.add_argument("--stripe", default="http://127.0.0.1:12111", help="Fake Stripe base URL")
+    parser.add_argument("--location-id", default=None, help="Location to order from (default: first active)")
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--confirm-timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    asyncio.run(PaymentLoadTest(args).run())
+
+
+if __name__ == "__main__":
+    main()
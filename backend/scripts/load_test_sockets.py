@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Socket.IO Fan-out Load Test
+
+Connects many Socket.IO clients to a running backend, drives orders through
+their status changes over the REST API, and reports how long each change
+takes to reach the sockets, how much server memory each connection costs,
+and how many updates never arrived.
+
+Each run:
+    1. Kitchen clients connect with a staff token and join_kitchen_room
+    2. POST /api/orders for --orders orders (kitchen: new_order_created)
+    3. Tracking clients connect and join_order_room, spread over the orders
+    4. PATCH /api/orders/{id}/status through confirmed -> completed
+    5. Wait --drain seconds for stragglers, then report
+
+Latency is measured from the moment a REST call is made until the client
+receives the matching event, so it includes the commit, the outbox
+dispatcher and the coalescing window. Run the clients on a separate machine
+from the server for thousands of connections - a saturated client event
+loop shows up as latency.
+
+Usage:
+    python scripts/load_test_sockets.py --clients 2000 --orders 100 \\
+        --kitchen-clients 4 --staff-email owner@example.com --staff-password ... \\
+        --server-pid $(pgrep -f "uvicorn app.main")
+
+Requires aiohttp for the python-socketio client.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import socketio
+
+from load_test_payments import percentile
+
+STATUS_STEPS = ["confirmed", "preparing", "ready", "completed"]
+
+
+def read_rss_kb(pid: Optional[int]) -> Optional[int]:
+    """Resident set size of a local process, from /proc (Linux only)"""
+    if not pid:
+        return None
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+class SocketLoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.clients: List[socketio.AsyncClient] = []
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.events: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.connect_times: List[float] = []
+        # (order_id, status) -> when the REST call that causes it was made
+        self.sent_at: Dict[Tuple[str, str], float] = {}
+        # order_id -> when it was created, for kitchen new_order_created latency
+        self.created_at: Dict[str, float] = {}
+        # per client: order_id -> last status seen
+        self.seen: List[Dict[str, str]] = []
+        # per client: orders it should end up seeing as completed
+        self.expected: List[List[str]] = []
+
+    def _on_delta(self, kind: str, seen: Dict[str, str], delta: dict):
+        received = time.perf_counter()
+        order_id, status = delta.get("order_id"), delta.get("status")
+        if seen.get(order_id) == status:
+            return
+        seen[order_id] = status
+        sent = self.sent_at.get((order_id, status))
+        if sent is not None:
+            self.latencies[kind].append((received - sent) * 1000)
+
+    def _attach_handlers(self, client: socketio.AsyncClient, kind: str, seen: Dict[str, str]):
+        @client.on("order_status_updated")
+        async def on_update(data):
+            self.events["order_status_updated"] += 1
+            self._on_delta(kind, seen, data)
+
+        @client.on("order_updates")
+        async def on_updates(data):
+            self.events["order_updates"] += 1
+            for delta in data.get("updates", ()):
+                self._on_delta(kind, seen, delta)
+
+        @client.on("new_order_created")
+        async def on_new_order(data):
+            self.events["new_order_created"] += 1
+            created = self.created_at.get(data.get("id"))
+            if created is not None:
+                self.latencies["new_order"].append((time.perf_counter() - created) * 1000)
+
+        @client.on("resync_needed")
+        async def on_resync(data):
+            self.events["resync_needed"] += 1
+
+        @client.on("disconnect")
+        async def on_disconnect(*args):
+            self.events["disconnect"] += 1
+
+    async def _connect(self, kind: str, token: Optional[str] = None) -> Optional[Tuple[socketio.AsyncClient, Dict[str, str]]]:
+        client = socketio.AsyncClient(reconnection=False)
+        seen: Dict[str, str] = {}
+        self._attach_handlers(client, kind, seen)
+        started = time.perf_counter()
+        try:
+            await client.connect(self.args.api, transports=["websocket"], auth={"token": token} if token else None,
+                                 wait_timeout=30)
+        except socketio.exceptions.ConnectionError as e:
+            self.errors[f"connect:{e}"] += 1
+            return None
+        self.connect_times.append((time.perf_counter() - started) * 1000)
+        self.clients.append(client)
+        return client, seen
+
+    async def _join(self, client: socketio.AsyncClient, event: str, payload: dict) -> bool:
+        response = await client.call(event, payload, timeout=30)
+        if not response or not response.get("success"):
+            self.errors[f"{event}:{(response or {}).get('error')}"] += 1
+            return False
+        return True
+
+    async def _staff_token(self, api: httpx.AsyncClient) -> Optional[str]:
+        if not (self.args.staff_email and self.args.staff_password):
+            return None
+        response = await api.post("/api/auth/login", json={
+            "email": self.args.staff_email,
+            "password": self.args.staff_password,
+        })
+        response.raise_for_status()
+        return response.json()["accessToken"]
+
+    async def _create_order(self, api: httpx.AsyncClient, n: int, location_id: str) -> Optional[str]:
+        started = time.perf_counter()
+        response = await api.post("/api/orders", json={
+            "location_id": location_id,
+            "customer_name": f"Socket Tester {n}",
+            "customer_phone": f"+1555{n:07d}",
+            "items": [{"item_id": "load-test-taco", "name": "Load Test Taco", "price": 3.5, "quantity": 2}],
+            "payment_method": "cash",
+        })
+        self.latencies["rest:create_order"].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[f"create_order:{response.status_code}"] += 1
+            return None
+        order_id = response.json()["id"]
+        self.created_at[order_id] = started
+        return order_id
+
+    async def _set_status(self, api: httpx.AsyncClient, order_id: str, status: str):
+        started = time.perf_counter()
+        self.sent_at[(order_id, status)] = started
+        response = await api.patch(f"/api/orders/{order_id}/status", json={"status": status})
+        self.latencies["rest:set_status"].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[f"set_status:{response.status_code}"] += 1
+
+    async def run(self):
+        args = self.args
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=args.api, timeout=60, limits=limits) as api:
+            response = await api.get("/api/locations")
+            response.raise_for_status()
+            locations = response.json()
+            if not locations:
+                raise SystemExit("No active locations - seed the database first (python seed_db.py)")
+            location_id = args.location_id or locations[0]["id"]
+
+            rss_before = read_rss_kb(args.server_pid)
+
+            # 1. Kitchen screens
+            kitchen = []
+            token = await self._staff_token(api)
+            if args.kitchen_clients and not token:
+                print("⚠️  No --staff-email/--staff-password given, skipping kitchen clients")
+            for _ in range(args.kitchen_clients if token else 0):
+                connected = await self._connect("kitchen", token)
+                if connected and await self._join(connected[0], "join_kitchen_room", {"location_id": location_id}):
+                    kitchen.append(connected)
+
+            # 2. Orders
+            order_ids = [
+                order_id for order_id in await asyncio.gather(
+                    *(bounded(self._create_order(api, n, location_id)) for n in range(args.orders))
+                ) if order_id
+            ]
+            if not order_ids:
+                raise SystemExit("No orders could be created")
+            for _, seen in kitchen:
+                self.seen.append(seen)
+                self.expected.append(order_ids)
+
+            # 3. Tracking clients, spread evenly over the orders
+            async def track(n: int):
+                order_id = order_ids[n % len(order_ids)]
+                connected = await self._connect("tracking")
+                if connected and await self._join(connected[0], "join_order_room", {"order_id": order_id}):
+                    self.seen.append(connected[1])
+                    self.expected.append([order_id])
+
+            started = time.perf_counter()
+            await asyncio.gather(*(bounded(track(n)) for n in range(args.clients)))
+            connect_elapsed = time.perf_counter() - started
+            rss_connected = read_rss_kb(args.server_pid)
+
+            # 4. Status changes, one step for every order at a time
+            started = time.perf_counter()
+            for status in STATUS_STEPS:
+                await asyncio.gather(*(bounded(self._set_status(api, order_id, status)) for order_id in order_ids))
+                await asyncio.sleep(args.step_interval)
+            drive_elapsed = time.perf_counter() - started
+
+            # 5. Stragglers
+            await asyncio.sleep(args.drain)
+            rss_after = read_rss_kb(args.server_pid)
+
+        await asyncio.gather(*(client.disconnect() for client in self.clients), return_exceptions=True)
+        self.report(len(order_ids), connect_elapsed, drive_elapsed, rss_before, rss_connected, rss_after)
+
+    def report(self, orders: int, connect_elapsed: float, drive_elapsed: float,
+               rss_before: Optional[int], rss_connected: Optional[int], rss_after: Optional[int]):
+        print("\n" + "=" * 78)
+        print(f"SOCKET.IO FAN-OUT: {len(self.clients)} clients, {orders} orders, "
+              f"{len(STATUS_STEPS)} status changes each")
+        print("=" * 78)
+        print(f"{'stage':<20}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+        rows = [("connect", self.connect_times)] + [
+            (stage, self.latencies.get(stage, []))
+            for stage in ("tracking", "kitchen", "new_order", "rest:create_order", "rest:set_status")
+        ]
+        for stage, values in rows:
+            if not values:
+                continue
+            print(f"{stage:<20}{len(values):>8}{statistics.mean(values):>10.1f}"
+                  f"{percentile(values, 50):>10.1f}{percentile(values, 95):>10.1f}"
+                  f"{percentile(values, 99):>10.1f}{max(values):>10.1f}")
+        print("-" * 78)
+        print(f"Connected and joined in {connect_elapsed:.2f}s "
+              f"({len(self.clients) / connect_elapsed:.1f} clients/s)")
+        print(f"Drove status changes in {drive_elapsed:.2f}s")
+
+        # A client missed updates if it never saw its orders completed
+        final = STATUS_STEPS[-1]
+        missed = sum(
+            1 for seen, expected in zip(self.seen, self.expected)
+            for order_id in expected if seen.get(order_id) != final
+        )
+        subscriptions = sum(len(expected) for expected in self.expected)
+        print(f"Missed final status: {missed}/{subscriptions} subscriptions")
+        print(f"Events received: {dict(self.events)}")
+
+        if rss_before is not None and rss_connected is not None:
+            per_client = (rss_connected - rss_before) / max(1, len(self.clients))
+            print(f"Server RSS: {rss_before / 1024:.1f} MB idle, {rss_connected / 1024:.1f} MB connected, "
+                  f"{(rss_after or 0) / 1024:.1f} MB after run ({per_client:.1f} KB per connection)")
+        if self.errors:
+            print(f"Errors: {dict(self.errors)}")
+        print("(all latencies in ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test Socket.IO order tracking and kitchen fan-out")
+    parser.add_argument("--api", default="http://localhost:8000", help="Backend base URL")
+    parser.add_argument("--location-id", default=None, help="Location to order from (default: first active)")
+    parser.add_argument("--clients", type=int, default=500, help="Order tracking clients")
+    parser.add_argument("--orders", type=int, default=50, help="Orders the tracking clients are spread over")
+    parser.add_argument("--kitchen-clients", type=int, default=2)
+    parser.add_argument("--staff-email", default=None, help="Staff/owner login for kitchen clients")
+    parser.add_argument("--staff-password", default=None)
+    parser.add_argument("--concurrency", type=int, default=50, help="Parallel connects and REST calls")
+    parser.add_argument("--step-interval", type=float, default=1.0, help="Seconds between status steps")
+    parser.add_argument("--drain", type=float, default=5.0, help="Seconds to wait for late events")
+    parser.add_argument("--server-pid", type=int, default=None, help="Backend process to sample RSS from")
+    args = parser.parse_args()
+
+    asyncio.run(SocketLoadTest(args).run())
+
+
+if __name__ == "__main__":
+    main()
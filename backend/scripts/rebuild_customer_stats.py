@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Rebuild Customer Stats
+
+Recomputes the customer_stats table (order count, completed spend and last
+order date per customer) from the orders table. Run it once after deploying
+the table, and whenever the totals are suspected to have drifted, e.g.
+after editing orders directly in SQL.
+
+Usage:
+    python scripts/rebuild_customer_stats.py
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database import SessionLocal, engine
+from app.models import CustomerStats
+from app.services.customers import rebuild_customer_stats
+
+
+def main():
+    CustomerStats.__table__.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        count = rebuild_customer_stats(db)
+        print(f"✅ Rebuilt stats for {count} customers in {time.perf_counter() - started:.2f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Mo's Burritos - Customer Stats Flush Hook
+Registered customers get their customer_stats row from the SessionLocal
+after_flush hook, and profile changes are copied into it.
+"""
+from app.models import CustomerStats, User, UserRole
+
+
+def test_customer_stats_follow_registered_customers(db):
+    user = User(email="pat@example.com", first_name="Pat", last_name="Lee", phone="+15551234567", role=UserRole.CUSTOMER)
+    db.add(user)
+    db.commit()
+
+    row = db.get(CustomerStats, user.id)
+    assert (row.customer_type, row.name, row.email, row.order_count) == ("registered", "Pat Lee", "pat@example.com", 0)
+
+    user.first_name = "Sam"
+    db.commit()
+    db.expire_all()
+
+    assert db.get(CustomerStats, user.id).name == "Sam Lee"
@@ -0,0 +1,78 @@
+"""
+Mo's Burritos - Location Assignment Query Counts
+A user's assignments and a location's staff are each loaded with one joined
+query, however many assignments there are.
+"""
+import asyncio
+
+from app.models import Location, LocationRole, User, UserLocation, UserRole
+from app.routers.locations import get_location_staff
+from app.routers.users import get_user, get_user_locations
+from app.services import get_location_assignments
+
+
+def _seed(db, staff_count=5, location_count=4):
+    locations = [Location(name=f"Location {i}", address=f"{i} Main St", phone="555-0100") for i in range(location_count)]
+    users = [
+        User(email=f"staff{i}@example.com", first_name="Staff", last_name=str(i), role=UserRole.STAFF)
+        for i in range(staff_count)
+    ]
+    db.add_all(locations + users)
+    db.flush()
+    db.add_all([
+        UserLocation(user_id=user.id, location_id=location.id, role=LocationRole.STAFF, is_active=True)
+        for user in users
+        for location in locations
+    ])
+    db.commit()
+    return users, locations
+
+
+def test_location_assignments_use_one_query(db, count_queries):
+    users, locations = _seed(db)
+    user_id, names = users[0].id, sorted(location.name for location in locations)
+    db.expire_all()
+
+    with count_queries() as statements:
+        assignments = get_location_assignments(db, user_id)
+
+    assert len(statements) == 1
+    assert sorted(a["location_name"] for a in assignments) == names
+    assert {a["role"] for a in assignments} == {"staff"}
+
+
+def test_location_staff_uses_one_query(db, count_queries):
+    users, locations = _seed(db)
+    location_id, emails = locations[0].id, sorted(user.email for user in users)
+    db.expire_all()
+
+    with count_queries() as statements:
+        staff = asyncio.run(get_location_staff(location_id, db))
+
+    assert len(statements) == 1
+    assert sorted(member["email"] for member in staff) == emails
+
+
+def test_get_user_loads_assignments_in_one_query(db, count_queries):
+    users, locations = _seed(db)
+    user_id, names = users[0].id, sorted(location.name for location in locations)
+    db.expire_all()
+
+    with count_queries() as statements:
+        user = asyncio.run(get_user(user_id, db))
+
+    # The user, then all of their assignments
+    assert len(statements) == 2
+    assert sorted(location.location_name for location in user.locations) == names
+
+
+def test_get_user_locations_uses_one_query(db, count_queries):
+    users, locations = _seed(db)
+    user_id = users[0].id
+    db.expire_all()
+
+    with count_queries() as statements:
+        assignments = asyncio.run(get_user_locations(user_id, db))
+
+    assert len(statements) == 1
+    assert len(assignments) == len(locations)
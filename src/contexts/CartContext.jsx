@@ -1,4 +1,4 @@
-import React, { createContext, useContext, useState, useEffect, useCallback } from 'react'
+import React, { createContext, useContext, useState, useEffect, useCallback, useRef } from 'react'
 import { useLocation } from './LocationContext'
 import { paymentApi } from '../services/api/paymentApi'
 
@@ -36,6 +36,11 @@ export const CartProvider = ({ children }) => {
 
   const [isCartOpen, setIsCartOpen] = useState(false)
   const [isCheckoutLoading, setIsCheckoutLoading] = useState(false)
+
+  // Idempotency key of the current checkout attempt: a retry of the same cart
+  // reuses it, so Stripe returns the session a timed-out request created
+  // instead of making a second one
+  const checkoutAttemptRef = useRef(null)
   
   // Get location context for fallback
   const locationContext = useLocation()
@@ -49,6 +54,8 @@ export const CartProvider = ({ children }) => {
     } else {
       localStorage.removeItem('cart_location_id')
     }
+    // A changed cart is a new checkout attempt
+    checkoutAttemptRef.current = null
   }, [items, locationId])
 
   // Calculate item price including options
@@ -253,6 +260,10 @@ export const CartProvider = ({ children }) => {
         phone: user.phone || 'Not provided'
       };
 
+      if (checkoutAttemptRef.current?.userId !== user.id) {
+        checkoutAttemptRef.current = { userId: user.id, key: crypto.randomUUID() };
+      }
+
       const amountInCents = Math.round(total * 100);
       const checkoutSession = await paymentApi.createCheckoutSession(
         amountInCents,
@@ -264,7 +275,8 @@ export const CartProvider = ({ children }) => {
           quantity: item.quantity
         })),
         locationId,
-        ''
+        '',
+        checkoutAttemptRef.current.key
       );
 
       sessionStorage.setItem('stripeSessionId', checkoutSession.sessionId);
@@ -10,8 +10,10 @@ const AdminCustomersPage = () => {
 
     const [customers, setCustomers] = useState([])
     const [stats, setStats] = useState({ total_customers: 0, registered_count: 0, guest_count: 0 })
+    const [nextCursor, setNextCursor] = useState(null)
     const [isLoading, setIsLoading] = useState(true)
     const [isRefreshing, setIsRefreshing] = useState(false)
+    const [isLoadingMore, setIsLoadingMore] = useState(false)
 
     // Filters
     const [searchQuery, setSearchQuery] = useState('')
@@ -20,24 +22,34 @@ const AdminCustomersPage = () => {
     const [sortOrder, setSortOrder] = useState('desc')
 
 
+    // Filtering, sorting and paging happen on the server
     useEffect(() => {
-        if (true) {
-            loadCustomers()
-        }
-    }, [])
+        const timer = setTimeout(() => loadCustomers(), searchQuery ? 300 : 0)
+        return () => clearTimeout(timer)
+    }, [searchQuery, typeFilter, sortBy, sortOrder])
+
+    const customerParams = (cursor = null) => ({
+        search: searchQuery || undefined,
+        type: typeFilter !== 'all' ? typeFilter : undefined,
+        sort: sortBy,
+        order: sortOrder,
+        cursor: cursor || undefined
+    })
 
     const loadCustomers = async (showRefresh = false) => {
         if (showRefresh) setIsRefreshing(true)
-        else setIsLoading(true)
 
         try {
-            const data = await userApi.getCustomers()
+            const data = await userApi.getCustomers(customerParams())
             setCustomers(data.customers || [])
-            setStats({
-                total_customers: data.total_customers || 0,
-                registered_count: data.registered_count || 0,
-                guest_count: data.guest_count || 0
-            })
+            setNextCursor(data.nextCursor || null)
+            if (data.summary) {
+                setStats({
+                    total_customers: data.summary.totalCustomers || 0,
+                    registered_count: data.summary.registeredCount || 0,
+                    guest_count: data.summary.guestCount || 0
+                })
+            }
         } catch (error) {
             console.error('Error loading customers:', error)
             showToast('Failed to load customers', 'error')
@@ -47,6 +59,21 @@ const AdminCustomersPage = () => {
         }
     }
 
+    const loadMore = async () => {
+        if (!nextCursor) return
+        setIsLoadingMore(true)
+        try {
+            const data = await userApi.getCustomers(customerParams(nextCursor))
+            setCustomers(prev => [...prev, ...(data.customers || [])])
+            setNextCursor(data.nextCursor || null)
+        } catch (error) {
+            console.error('Error loading customers:', error)
+            showToast('Failed to load more customers', 'error')
+        } finally {
+            setIsLoadingMore(false)
+        }
+    }
+
     const handleRefresh = () => {
         loadCustomers(true)
         showToast('Customers refreshed', 'success')
@@ -78,45 +105,7 @@ const AdminCustomersPage = () => {
         return date.toLocaleDateString('en-US', { month: 'short', day: 'numeric', year: 'numeric' })
     }
 
-    // Filter and sort customers
     const filteredCustomers = customers
-        .filter(customer => {
-            // Type filter
-            if (typeFilter !== 'all' && customer.type !== typeFilter) return false
-
-            // Search filter
-            if (searchQuery) {
-                const query = searchQuery.toLowerCase()
-                return (
-                    customer.name?.toLowerCase().includes(query) ||
-                    customer.email?.toLowerCase().includes(query) ||
-                    customer.phone?.includes(query)
-                )
-            }
-            return true
-        })
-        .sort((a, b) => {
-            let compareValue = 0
-
-            switch (sortBy) {
-                case 'name':
-                    compareValue = (a.name || '').localeCompare(b.name || '')
-                    break
-                case 'order_count':
-                    compareValue = (a.order_count || 0) - (b.order_count || 0)
-                    break
-                case 'total_spent':
-                    compareValue = (a.total_spent || 0) - (b.total_spent || 0)
-                    break
-                case 'last_order':
-                    compareValue = new Date(a.last_order_date || 0) - new Date(b.last_order_date || 0)
-                    break
-                default:
-                    compareValue = 0
-            }
-
-            return sortOrder === 'desc' ? -compareValue : compareValue
-        })
 
     const toggleSort = (column) => {
         if (sortBy === column) {
@@ -222,9 +211,9 @@ const AdminCustomersPage = () => {
                                             {customer.type === 'registered' ? 'Registered' : 'Guest'}
                                         </span>
                                     </td>
-                                    <td className="orders-cell">{customer.order_count || 0}</td>
-                                    <td className="spent-cell">{formatPrice(customer.total_spent)}</td>
-                                    <td className="date-cell">{formatDate(customer.last_order_date)}</td>
+                                    <td className="orders-cell">{customer.totalOrders || 0}</td>
+                                    <td className="spent-cell">{formatPrice(customer.totalSpent)}</td>
+                                    <td className="date-cell">{formatDate(customer.lastOrderDate)}</td>
                                     <td className="date-cell">{formatDate(customer.created_at)}</td>
                                     {true && (
                                         <td className="actions-cell">
@@ -242,6 +231,11 @@ const AdminCustomersPage = () => {
                         </tbody>
                     </table>
                 )}
+                {nextCursor && (
+                    <button className="refresh-btn" onClick={loadMore} disabled={isLoadingMore}>
+                        {isLoadingMore ? 'Loading...' : 'Load more'}
+                    </button>
+                )}
             </div>
         </div>
     )
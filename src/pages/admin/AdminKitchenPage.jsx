@@ -48,7 +48,10 @@ const AdminKitchenPage = () => {
         try {
             const filters = selectedLocation !== 'all' ? { location_id: selectedLocation } : {}
             const ordersData = await orderApi.getAllOrders(filters)
-            setOrders(Array.isArray(ordersData) ? ordersData : ordersData.orders || [])
+            const list = Array.isArray(ordersData) ? ordersData : ordersData.orders || []
+            setOrders(list)
+            // Status deltas arrive without a snapshot; they are merged into these
+            socketService.seedOrders(list)
         } catch (error) {
             console.error('Error loading orders:', error)
             showToast('Failed to load orders', 'error')
@@ -90,9 +93,25 @@ const AdminKitchenPage = () => {
 
             socketService.onNewOrder(handleNewOrder)
 
+            // Status changes arrive as the full order with the delta applied
+            const handleOrderUpdate = (orderData) => {
+                setOrders(prev => prev.map(o => o.id === orderData.id ? { ...o, ...orderData } : o))
+            }
+
+            socketService.onOrderStatusUpdate(handleOrderUpdate)
+
+            // Missed events that could not be replayed: reload the queue
+            const handleResync = ({ type, id }) => {
+                if (type === 'kitchen' && id === selectedLocation) loadOrders(true)
+            }
+
+            socketService.onResyncNeeded(handleResync)
+
             // Cleanup on unmount or location change
             return () => {
                 socketService.offNewOrder(handleNewOrder)
+                socketService.offOrderStatusUpdate(handleOrderUpdate)
+                socketService.offResyncNeeded(handleResync)
                 socketService.leaveKitchenRoom(selectedLocation)
                 if (socketService.socket) {
                     socketService.socket.off('connect', handleConnect)
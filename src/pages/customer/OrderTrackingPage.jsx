@@ -72,15 +72,24 @@ const OrderTrackingPage = () => {
             // Listen for order status updates
             const handleOrderUpdate = (data) => {
                 console.log('Order update received:', data)
-                setOrder(data)
+                // Socket payloads leave out contact details; keep the ones loaded over REST
+                setOrder(prev => ({ ...prev, ...data }))
                 showToast('Order status updated!', 'success')
             }
 
             socketService.onOrderStatusUpdate(handleOrderUpdate)
 
+            // Missed updates that could not be replayed: reload the order
+            const handleResync = ({ type, id }) => {
+                if (type === 'order' && id === orderId) fetchOrder(true)
+            }
+
+            socketService.onResyncNeeded(handleResync)
+
             // Cleanup on unmount
             return () => {
                 socketService.offOrderStatusUpdate(handleOrderUpdate)
+                socketService.offResyncNeeded(handleResync)
                 socketService.leaveOrderRoom(orderId)
                 if (socketService.socket) {
                     socketService.socket.off('connect', handleConnect)
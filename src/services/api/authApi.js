@@ -65,6 +65,14 @@ export const authApi = {
     return response.data
   },
 
+  /**
+   * Move orders placed as a guest (with a verified e-mail/phone) onto the customer's account
+   */
+  claimGuestOrders: async () => {
+    const response = await customerClient.post('/auth/customer/claim-guest-orders')
+    return response.data
+  },
+
   /**
    * Get current user (admin)
    */
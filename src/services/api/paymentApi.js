@@ -2,14 +2,17 @@ import { customerClient, publicClient } from './apiClient'
 
 export const paymentApi = {
   /**
-   * Create a Stripe payment intent
+   * Create a Stripe payment intent. Pass the same idempotencyKey when
+   * retrying an attempt so Stripe does not create a second intent.
    */
-  createPaymentIntent: async (amount, currency = 'usd', customerInfo, items) => {
+  createPaymentIntent: async (amount, currency = 'usd', customerInfo, items, idempotencyKey) => {
     const response = await publicClient.post('/create-payment-intent', {
       amount,
       currency,
       customerInfo: customerInfo,
       items
+    }, {
+      headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}
     })
     return response.data
   },
@@ -45,9 +48,10 @@ export const paymentApi = {
   },
 
   /**
-   * Create a Stripe Checkout Session and get redirect URL
+   * Create a Stripe Checkout Session and get redirect URL. Pass the same
+   * idempotencyKey when retrying an attempt so only one session is created.
    */
-  createCheckoutSession: async (amount, currency, customerInfo, items, locationId, notes) => {
+  createCheckoutSession: async (amount, currency, customerInfo, items, locationId, notes, idempotencyKey) => {
     const response = await publicClient.post('/create-checkout-session', {
       amount,
       currency,
@@ -55,6 +59,8 @@ export const paymentApi = {
       items,
       locationId: locationId,
       notes: notes || ''
+    }, {
+      headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}
     })
     return response.data
   },
@@ -74,18 +74,49 @@ export const userApi = {
   },
 
   /**
-   * Get all customers (admin)
+   * Get one page of customers (admin)
+   * params: search, type, sort, order, limit, cursor (nextCursor of the previous page)
    */
-  getCustomers: async () => {
-    const response = await adminClient.get('/admin/customers')
+  getCustomers: async (params = {}) => {
+    const response = await adminClient.get('/admin/customers', { params })
+    return response.data
+  },
+
+  /**
+   * Get RFM customer segments (admin)
+   * params: segment (one segment's top spenders instead of overall), limit
+   */
+  getCustomerSegments: async (params = {}) => {
+    const response = await adminClient.get('/admin/customers/segments', { params })
+    return response.data
+  },
+
+  /**
+   * Download an export as a Blob (owner only)
+   * dataset: orders | status-history | customers
+   * params: format (csv | ndjson), gzip, location_id, start_date, end_date, type
+   */
+  exportData: async (dataset, params = {}) => {
+    const response = await adminClient.get(`/admin/exports/${dataset}`, { params, responseType: 'blob' })
     return response.data
   },
 
   /**
    * Delete a customer (admin/owner only)
    */
-  deleteCustomer: async (customerId) => {
-    const response = await adminClient.delete(`/admin/customers/${customerId}`)
+  deleteCustomer: async (customerId, { dryRun = false } = {}) => {
+    const response = await adminClient.delete(`/admin/customers/${customerId}`, { params: { dry_run: dryRun } })
+    return response.data
+  },
+
+  /**
+   * Delete a batch of customers, e.g. erasure requests (owner only)
+   */
+  bulkDeleteCustomers: async (customerIds, { dryRun = false } = {}) => {
+    const response = await adminClient.post('/admin/customers/bulk-delete', {
+      customer_ids: customerIds,
+      dry_run: dryRun
+    })
     return response.data
   },
 
@@ -3,10 +3,14 @@
  * Manages WebSocket connections for real-time order updates
  */
 import { io } from 'socket.io-client'
+import { getSupabaseSession, isSupabaseEnabled } from './supabaseClient'
 
 // Get Socket.IO server URL from environment or default to API URL
 const SOCKET_URL = import.meta.env.VITE_API_URL || (window.location.hostname === 'localhost' ? 'http://localhost:8000' : 'https://web-production-93566.up.railway.app')
 
+// Server events routed through _dispatch (dedupe by seq, delta merging)
+const ORDER_EVENTS = ['new_order_created', 'order_status_updated', 'order_updates', 'order_snapshot', 'order_deleted']
+
 class SocketService {
   constructor() {
     this.socket = null
@@ -15,6 +19,9 @@ class SocketService {
     this.activeRooms = [] // Rooms to maintain (rejoin on reconnect)
     this.connectedPromise = null
     this.eventListeners = [] // Track event listeners for reconnection
+    this.lastSeq = {} // Last event seq seen per room, for replay after reconnect
+    this.resyncCallbacks = [] // Called when missed events can't be replayed
+    this.orders = {} // Latest full order per joined order room or kitchen order; deltas are merged into these
   }
 
   /**
@@ -42,6 +49,26 @@ class SocketService {
         reconnectionDelayMax: 5000,
         timeout: 20000,
         transports: ['polling', 'websocket'], // Start with polling, upgrade to websocket
+        // Called on every (re)connect, so a refreshed token is picked up.
+        // The server checks it once; kitchen rooms require staff access.
+        auth: async (callback) => {
+          const session = isSupabaseEnabled() ? await getSupabaseSession() : null
+          callback(session?.access_token ? { token: session.access_token } : {})
+        },
+      })
+
+      // One handler per server event; it fans out to the tracked listeners
+      ORDER_EVENTS.forEach(event => {
+        this.socket.on(event, (data) => this._dispatch(event, data))
+      })
+
+      // Sent after the server skipped order deltas while this client was
+      // too slow to keep up; every tracked room needs a reload
+      this.socket.on('resync_needed', (data) => {
+        console.warn('Socket.IO fell behind, dropped events:', data?.dropped)
+        this.activeRooms.forEach(({ type, id }) => {
+          this.resyncCallbacks.forEach(callback => callback({ type, id }))
+        })
       })
 
       // Connection event handlers
@@ -58,12 +85,6 @@ class SocketService {
           }
         })
 
-        // Attach all tracked event listeners
-        this.eventListeners.forEach(({ event, callback }) => {
-          console.log('Attaching listener for:', event)
-          this.socket.on(event, callback)
-        })
-
         resolve(this.socket)
       })
 
@@ -75,6 +96,12 @@ class SocketService {
       this.socket.on('connect_error', (error) => {
         console.error('Socket.IO connection error:', error.message)
         this.updateConnectionStatus('reconnecting')
+
+        // Refused by the server (e.g. expired token): the client won't retry
+        // by itself, so try again with whatever session is current by then
+        if (!this.socket.active) {
+          setTimeout(() => this.socket?.connect(), 5000)
+        }
       })
 
       this.socket.on('reconnect', (attemptNumber) => {
@@ -89,12 +116,6 @@ class SocketService {
             this._emitJoinKitchenRoom(id)
           }
         })
-
-        // Re-attach all event listeners on reconnection
-        this.eventListeners.forEach(({ event, callback }) => {
-          console.log('Re-attaching listener for:', event)
-          this.socket.on(event, callback)
-        })
       })
 
       this.socket.on('reconnect_attempt', (attemptNumber) => {
@@ -129,6 +150,8 @@ class SocketService {
       this.connectedPromise = null
       this.activeRooms = []
       this.eventListeners = []
+      this.lastSeq = {}
+      this.orders = {}
       this.updateConnectionStatus('disconnected')
     }
   }
@@ -171,14 +194,156 @@ class SocketService {
     return this.socket?.connected || false
   }
 
+  /**
+   * Subscribe to "missed events could not be replayed" notifications.
+   * Called with { type, id } - reload that order/kitchen over REST.
+   */
+  onResyncNeeded(callback) {
+    this.resyncCallbacks.push(callback)
+  }
+
+  /**
+   * Unsubscribe from resync notifications
+   */
+  offResyncNeeded(callback) {
+    this.resyncCallbacks = this.resyncCallbacks.filter(cb => cb !== callback)
+  }
+
+  /**
+   * Room an incoming event was received through, for seq tracking.
+   * Status deltas go to both the order and kitchen rooms; the order room
+   * wins when this client is in both.
+   */
+  _roomForEvent(event, data) {
+    if (event === 'new_order_created' && data?.location_id) {
+      return `kitchen:${data.location_id}`
+    }
+    if (event === 'order_status_updated' && data?.order_id) {
+      if (this.activeRooms.find(r => r.type === 'order' && r.id === data.order_id)) {
+        return `order:${data.order_id}`
+      }
+      return `kitchen:${data.location_id}`
+    }
+    return null
+  }
+
+  /**
+   * Record an event's seq; returns false for events already seen
+   * (a live event that was also replayed on rejoin)
+   */
+  _isNewEvent(event, data) {
+    const room = this._roomForEvent(event, data)
+    if (!room || typeof data?.seq !== 'number') return true
+    if (this.lastSeq[room] !== undefined && data.seq <= this.lastSeq[room]) return false
+    this.lastSeq[room] = data.seq
+    return true
+  }
+
+  /**
+   * Store a full order sent on join. Returns true when it replaces an
+   * earlier copy with newer data (a catch-up after a reconnect).
+   */
+  _storeSnapshot(order) {
+    const previous = this.orders[order.id]
+    this.orders[order.id] = order
+
+    const room = `order:${order.id}`
+    if (typeof order.seq === 'number' && !(this.lastSeq[room] >= order.seq)) {
+      this.lastSeq[room] = order.seq
+    }
+    return Boolean(previous) && previous.updated_at !== order.updated_at
+  }
+
+  /**
+   * Hold full orders fetched over REST (the kitchen queue) so status deltas
+   * for them can be applied; kitchen rooms never get a snapshot on join
+   */
+  seedOrders(orders) {
+    (orders || []).forEach(order => {
+      if (order?.id) this.orders[order.id] = order
+    })
+  }
+
+  /**
+   * Merge a status delta into the stored order.
+   * Returns the full updated order, or null if no snapshot is held for it.
+   */
+  _applyDelta(delta) {
+    const current = this.orders[delta.order_id]
+    if (!current) return null
+
+    const order = {
+      ...current,
+      ...delta.changes,
+      status: delta.status,
+      updated_at: delta.updated_at,
+      seq: delta.seq,
+    }
+    this.orders[delta.order_id] = order
+    return order
+  }
+
+  /**
+   * Route a server event to the tracked listeners: drop replayed duplicates,
+   * turn deltas into full orders, and surface catch-up snapshots as updates
+   */
+  _dispatch(event, data) {
+    // Coalesced deltas for one room, in seq order
+    if (event === 'order_updates') {
+      (data?.updates || []).forEach(update => this._dispatch('order_status_updated', update))
+      return
+    }
+
+    let deliverAs = event
+    let payload = data
+
+    if (event === 'order_snapshot') {
+      if (!this._storeSnapshot(data)) return
+      deliverAs = 'order_status_updated'
+    } else {
+      if (!this._isNewEvent(event, data)) return
+      if (event === 'new_order_created' && data?.id) {
+        this.orders[data.id] = data
+      }
+      if (event === 'order_status_updated') {
+        payload = this._applyDelta(data)
+        if (!payload) return
+      }
+    }
+
+    this.eventListeners
+      .filter(l => l.event === deliverAs)
+      .forEach(l => l.callback(payload))
+  }
+
+  /**
+   * Handle a join acknowledgement: remember the room position and ask for
+   * a REST reload if missed events could not all be replayed
+   */
+  _handleJoinResponse(type, id, response) {
+    const room = `${type}:${id}`
+    if (response.seq != null && this.lastSeq[room] === undefined) {
+      this.lastSeq[room] = response.seq
+    }
+    if (response.replayed) {
+      console.log(`Replayed ${response.replayed} missed events in ${room}`)
+    }
+    if (response.complete === false) {
+      console.warn('Missed events could not be replayed, resync needed:', room)
+      this.resyncCallbacks.forEach(callback => callback({ type, id }))
+    }
+  }
+
   /**
    * Internal method to emit join order room
    */
   _emitJoinOrderRoom(orderId) {
     console.log('Emitting join_order_room:', orderId)
-    this.socket.emit('join_order_room', { order_id: orderId }, (response) => {
+    const payload = { order_id: orderId, since_seq: this.lastSeq[`order:${orderId}`] }
+    this.socket.emit('join_order_room', payload, (response) => {
       if (response?.success) {
         console.log('Successfully joined order room:', response.room)
+        this._handleJoinResponse('order', orderId, response)
       } else {
         console.error('Failed to join order room:', response?.error)
       }
@@ -190,9 +355,11 @@ class SocketService {
    */
   _emitJoinKitchenRoom(locationId) {
     console.log('Emitting join_kitchen_room:', locationId)
-    this.socket.emit('join_kitchen_room', { location_id: locationId }, (response) => {
+    const payload = { location_id: locationId, since_seq: this.lastSeq[`kitchen:${locationId}`] }
+    this.socket.emit('join_kitchen_room', payload, (response) => {
       if (response?.success) {
         console.log('Successfully joined kitchen room:', response.room)
+        this._handleJoinResponse('kitchen', locationId, response)
       } else {
         console.error('Failed to join kitchen room:', response?.error)
       }
@@ -222,6 +389,8 @@ class SocketService {
   leaveOrderRoom(orderId) {
     // Remove from active rooms
     this.activeRooms = this.activeRooms.filter(r => !(r.type === 'order' && r.id === orderId))
+    delete this.lastSeq[`order:${orderId}`]
+    delete this.orders[orderId]
 
     if (!this.socket?.connected) return
 
@@ -252,6 +421,13 @@ class SocketService {
   leaveKitchenRoom(locationId) {
     // Remove from active rooms
     this.activeRooms = this.activeRooms.filter(r => !(r.type === 'kitchen' && r.id === locationId))
+    delete this.lastSeq[`kitchen:${locationId}`]
+    // Keep orders an order room still tracks
+    Object.values(this.orders).forEach(order => {
+      if (order.location_id === locationId && !this.activeRooms.find(r => r.type === 'order' && r.id === order.id)) {
+        delete this.orders[order.id]
+      }
+    })
 
     if (!this.socket?.connected) return
 
@@ -260,67 +436,49 @@ class SocketService {
   }
 
   /**
-   * Subscribe to order status updates
+   * Track a listener; events reach it through _dispatch, so it survives
+   * reconnects and sees replayed events only once
    */
-  onOrderStatusUpdate(callback) {
-    // Track listener for reconnection
-    const listener = { event: 'order_status_updated', callback }
-    if (!this.eventListeners.find(l => l.event === listener.event && l.callback === callback)) {
-      this.eventListeners.push(listener)
+  _addListener(event, callback) {
+    if (!this.eventListeners.find(l => l.event === event && l.callback === callback)) {
+      this.eventListeners.push({ event, callback })
     }
+  }
 
-    if (!this.socket) {
-      console.log('Socket not ready yet, listener will be attached on connect')
-      return
-    }
+  /**
+   * Stop delivering an event to a listener added with _addListener
+   */
+  _removeListener(event, callback) {
+    this.eventListeners = this.eventListeners.filter(l => !(l.event === event && l.callback === callback))
+  }
 
-    console.log('Attaching order_status_updated listener')
-    this.socket.on('order_status_updated', callback)
+  /**
+   * Subscribe to order status updates.
+   * The callback receives the full order, with the server's delta applied.
+   */
+  onOrderStatusUpdate(callback) {
+    this._addListener('order_status_updated', callback)
   }
 
   /**
    * Unsubscribe from order status updates
    */
   offOrderStatusUpdate(callback) {
-    // Remove from tracked listeners
-    this.eventListeners = this.eventListeners.filter(
-      l => !(l.event === 'order_status_updated' && l.callback === callback)
-    )
-
-    if (!this.socket) return
-    this.socket.off('order_status_updated', callback)
+    this._removeListener('order_status_updated', callback)
   }
 
   /**
    * Subscribe to new order events (for kitchen)
    */
   onNewOrder(callback) {
-    // Track listener for reconnection
-    const listener = { event: 'new_order_created', callback }
-    if (!this.eventListeners.find(l => l.event === listener.event && l.callback === callback)) {
-      this.eventListeners.push(listener)
-    }
-
-    if (!this.socket) {
-      console.log('Socket not ready yet, listener will be attached on connect')
-      return
-    }
-
-    console.log('Attaching new_order_created listener')
-    this.socket.on('new_order_created', callback)
+    this._addListener('new_order_created', callback)
   }
 
   /**
    * Unsubscribe from new order events
    */
   offNewOrder(callback) {
-    // Remove from tracked listeners
-    this.eventListeners = this.eventListeners.filter(
-      l => !(l.event === 'new_order_created' && l.callback === callback)
-    )
-
-    if (!this.socket) return
-    this.socket.off('new_order_created', callback)
+    this._removeListener('new_order_created', callback)
   }
 }
 